@@ -0,0 +1,150 @@
+"""
+Benchmark: monolithic vs chunked VP9 encode of the same clip.
+
+Both runs use identical encoder settings; the monolithic run is one segment
+with all cores given to a single ffmpeg (-threads N), the chunked run encodes
+segments concurrently with one thread each. Reports wall time, output size
+and (with --ssim) SSIM of each output against the source.
+
+Usage:
+    python bench_chunked.py --input clip.mp4
+    python bench_chunked.py --synthetic 60      # 60 s generated test clip
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+from chunked_encode import chunked_encode, vp9_args
+
+
+def make_synthetic(path, seconds, size="1280x720"):
+    """Generated clip with motion and hard cuts (testsrc2 + mandelbrot, alternating)."""
+    half = max(1, seconds // 4)
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate=30:duration={half}",
+            "-f",
+            "lavfi",
+            "-i",
+            f"mandelbrot=size={size}:rate=30,trim=duration={half}",
+            "-filter_complex",
+            "[0:v][1:v][0:v][1:v]concat=n=4:v=1[v]",
+            "-map",
+            "[v]",
+            "-c:v",
+            "libx264",
+            "-g",
+            "60",
+            "-crf",
+            "18",
+            path,
+        ],
+        check=True,
+    )
+
+
+def ssim(output_path, source_path, vf=None):
+    """Mean SSIM of output vs source (source scaled through the same filters)."""
+    ref = f"[1:v]{vf}[ref]" if vf else "[1:v]null[ref]"
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-i",
+            output_path,
+            "-i",
+            source_path,
+            "-lavfi",
+            f"{ref};[0:v][ref]ssim",
+            "-f",
+            "null",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    match = re.search(r"All:([0-9.]+)", result.stderr)
+    return float(match.group(1)) if match else None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Monolithic vs chunked VP9 encode")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--input")
+    src.add_argument("--synthetic", type=int, metavar="SECONDS")
+    ap.add_argument("--segment-seconds", type=float, default=10.0)
+    ap.add_argument("--split", choices=["keyframes", "scenes", "even"], default="keyframes")
+    ap.add_argument("--crf", type=int, default=25)
+    ap.add_argument("--deadline", default="good", help="best is faithful but very slow")
+    ap.add_argument("--cpu-used", type=int, default=2)
+    ap.add_argument("--vf", default=None)
+    ap.add_argument("--single-pass", action="store_true")
+    ap.add_argument("--ssim", action="store_true", help="Also score both outputs vs the source")
+    ap.add_argument("--json", default=None, help="Append the result as a JSON line to this file")
+    args = ap.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_chunked_")
+    source = args.input
+    if args.synthetic:
+        source = os.path.join(work_dir, "synthetic.mp4")
+        make_synthetic(source, args.synthetic)
+
+    cores = os.cpu_count() or 1
+    runs = {}
+    for name, segment_seconds, jobs, threads in (
+        ("monolithic", 0, 1, cores),
+        ("chunked", args.segment_seconds, cores, 1),
+    ):
+        out = os.path.join(work_dir, f"{name}.webm")
+        stats = chunked_encode(
+            source,
+            out,
+            segment_seconds=segment_seconds,
+            split=args.split,
+            jobs=jobs,
+            codec_args=vp9_args(args.crf, args.deadline, args.cpu_used, threads, args.vf),
+            two_pass=not args.single_pass,
+        )
+        if args.ssim:
+            stats["ssim"] = ssim(out, source, args.vf)
+        runs[name] = stats
+        print(
+            f"{name:<11} {stats['seconds']:8.2f}s  {stats['bytes'] / 1_000_000:7.2f} MB  "
+            f"{stats['segments']:3d} segment(s)"
+            + (f"  SSIM {stats['ssim']:.4f}" if stats.get("ssim") else "")
+        )
+
+    mono, chunked = runs["monolithic"], runs["chunked"]
+    print(
+        f"speedup x{mono['seconds'] / chunked['seconds']:.2f}, "
+        f"size {(chunked['bytes'] - mono['bytes']) / mono['bytes'] * 100:+.1f}%"
+    )
+    print(f"Outputs kept in {work_dir}")
+    if args.json:
+        record = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "source": source,
+            "cores": cores,
+            "settings": vars(args),
+            **runs,
+        }
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmark: ImageMagick subprocess path vs in-process Pillow backend.
+
+Both backends produce every (format, width) output for each source:
+- magick: ImageCompressor.compress_<format>, one `magick` process (and one
+  decode) per output, as process_all does today;
+- pillow: pillow_backend.encode_all, one decode per source for all outputs.
+
+Runs single-process so the numbers are per-output cost; process_all spreads
+either backend over its worker pool. Reports wall time, ms per output and
+total bytes per backend.
+
+Usage:
+    python bench_image_backends.py --input-dir image_input --formats jpg,webp --widths 1600,800,400
+    python bench_image_backends.py --synthetic 200      # 200 generated 1920x1280 images
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+import pillow_backend
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_image_compressor():
+    """ImageCompressor from ffmeg-image-new.py (the hyphen rules out a plain import)."""
+    spec = importlib.util.spec_from_file_location(
+        "ffmeg_image_new", os.path.join(current_dir, "ffmeg-image-new.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.ImageCompressor
+
+
+def make_synthetic(folder, count, size=(1920, 1280)):
+    """Smooth gradients plus noise: compresses like a photo, not like flat color."""
+    rng = np.random.default_rng(0)
+    w, h = size
+    x, y = np.meshgrid(np.linspace(0, 1, w), np.linspace(0, 1, h))
+    paths = []
+    for i in range(count):
+        phase = rng.uniform(0, 6.28, 3)
+        channels = [np.sin(6 * x + 4 * y + p) * 100 + 128 for p in phase]
+        img = np.stack(channels, axis=-1) + rng.normal(0, 12, (h, w, 3))
+        path = os.path.join(folder, f"synthetic_{i:04d}.jpg")
+        Image.fromarray(np.clip(img, 0, 255).astype(np.uint8)).save(path, quality=92)
+        paths.append(path)
+    return paths
+
+
+def outputs_for(source, formats, widths, out_dir):
+    base = os.path.splitext(os.path.basename(source))[0]
+    return [
+        (fmt, width, os.path.join(out_dir, f"{base}-{width}.{fmt}"))
+        for width in sorted(widths, reverse=True)
+        for fmt in formats
+    ]
+
+
+def run_magick(sources, formats, widths, out_dir, config):
+    ImageCompressor = load_image_compressor()
+    handlers = {}
+    for width in widths:
+        compressor = ImageCompressor({**config, "target_width": width})
+        handlers[width] = {
+            "jpg": compressor.compress_jpeg,
+            "jpeg": compressor.compress_jpeg,
+            "png": compressor.compress_png,
+            "webp": compressor.compress_webp,
+            "gif": compressor.compress_gif,
+            "avif": compressor.compress_avif,
+        }
+    for source in sources:
+        for fmt, width, path in outputs_for(source, formats, widths, out_dir):
+            if not handlers[width][fmt](source, path):
+                raise RuntimeError(f"magick failed on {source} -> {path}")
+
+
+def run_pillow(sources, formats, widths, out_dir, config):
+    for source in sources:
+        pillow_backend.encode_all(source, outputs_for(source, formats, widths, out_dir), config)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ImageMagick vs Pillow image encoding")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--input-dir", default=os.path.join(current_dir, "image_input"))
+    src.add_argument("--synthetic", type=int, metavar="COUNT")
+    ap.add_argument("--formats", default="jpg,webp")
+    ap.add_argument("--widths", default="881")
+    ap.add_argument("--limit", type=int, default=None, help="Use only the first N sources")
+    ap.add_argument("--json", default=None, help="Append the result as a JSON line to this file")
+    args = ap.parse_args()
+
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    widths = [int(w) for w in args.widths.split(",")]
+    missing = [f for f in formats if not pillow_backend.can_encode(f)]
+    if missing:
+        raise SystemExit(f"This Pillow build can't write: {', '.join(missing)}")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_images_")
+    if args.synthetic:
+        sources = make_synthetic(work_dir, args.synthetic)
+    else:
+        sources = sorted(
+            os.path.join(args.input_dir, f)
+            for f in os.listdir(args.input_dir)
+            if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".bmp", ".heic"))
+        )
+    sources = sources[: args.limit] if args.limit else sources
+    if not sources:
+        raise SystemExit("No source images")
+
+    config = {
+        "max_colors": None,
+        "preserve_transparency": False,
+        "png_compression_level": 4,
+        "use_pngquant": False,
+        "jpeg_quality": 60,
+        "webp_quality": 80,
+        "webp_lossless": False,
+        "gif_colors": 128,
+        "avif_quality": 50,
+    }
+    outputs = len(sources) * len(formats) * len(widths)
+    print(f"{len(sources)} sources x {len(formats)} formats x {len(widths)} widths = {outputs} outputs")
+
+    runs = {}
+    for name, run in (("magick", run_magick), ("pillow", run_pillow)):
+        if name == "magick" and not shutil.which("magick"):
+            print("magick      not installed, skipped")
+            continue
+        out_dir = os.path.join(work_dir, name)
+        os.makedirs(out_dir)
+        started = time.perf_counter()
+        try:
+            run(sources, formats, widths, out_dir, config)
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"{name:<11} failed: {e}")
+            continue
+        seconds = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+        runs[name] = {"seconds": round(seconds, 2), "bytes": size}
+        print(
+            f"{name:<11} {seconds:8.2f}s  {seconds / outputs * 1000:7.1f} ms/output  "
+            f"{size / 1_000_000:7.2f} MB"
+        )
+
+    if "magick" in runs and "pillow" in runs:
+        mono, pil = runs["magick"], runs["pillow"]
+        print(
+            f"speedup x{mono['seconds'] / pil['seconds']:.2f}, "
+            f"size {(pil['bytes'] - mono['bytes']) / mono['bytes'] * 100:+.1f}%"
+        )
+    print(f"Outputs kept in {work_dir}")
+    if args.json:
+        record = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sources": len(sources),
+            "formats": formats,
+            "widths": widths,
+            **runs,
+        }
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
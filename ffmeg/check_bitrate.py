@@ -1,34 +1,18 @@
 import subprocess
 import os
-import json
-import re
+from typing import Iterable, Iterator, Tuple
+
+import probe
 
 
 def get_video_bitrate(input_path):
     try:
-        result = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-select_streams",
-                "v:0",
-                "-show_entries",
-                "stream=bit_rate",
-                "-of",
-                "default=noprint_wrappers=1:nokey=1",
-                input_path,
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        bitrate_str = result.stdout.strip()
-        if bitrate_str:
-            bitrate = int(bitrate_str)
+        # Stream bit_rate, or packet bytes / duration when the container has none
+        bps = probe.bitrate(input_path)
+        if bps:
             # Convert to megabits per second for convenience
-            mbps = bitrate / 1_000_000
-            return mbps, bitrate  # returns both in Mbps and bps
+            mbps = bps / 1_000_000
+            return mbps, bps  # returns both in Mbps and bps
         else:
             return None, None
     except subprocess.CalledProcessError as e:
@@ -37,86 +21,71 @@ def get_video_bitrate(input_path):
 
 
 def get_bitrate_per_second(input_path):
-    """Get the bitrate for each second of the video using ffprobe."""
+    """Get the bitrate for each second of the video (one cached ffprobe pass, see probe.py)."""
     try:
-        # Get video duration first
-        duration_cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "format=duration",
-            "-of",
-            "default=noprint_wrappers=1:nokey=1",
-            input_path,
-        ]
-        duration_result = subprocess.run(
-            duration_cmd, capture_output=True, text=True, check=True
-        )
-        duration = float(duration_result.stdout.strip())
-
-        # Use ffprobe with the -f segment_frames option to analyze the video
-        cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-hide_banner",
-            "-select_streams",
-            "v:0",
-            "-show_entries",
-            "packet=pts_time,size",
-            "-of",
-            "csv=p=0",
-            input_path,
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-
-        # Parse the output to get bitrate per second
-        lines = result.stdout.strip().split("\n")
-
-        # Create a dictionary to store packets by second
-        packets_by_second = {}
-
-        for line in lines:
-            parts = line.split(",")
-            if len(parts) == 2:
-                try:
-                    pts_time = float(parts[0])
-                    size = int(parts[1])
-
-                    # Round down to get the second
-                    second = int(pts_time)
-
-                    if second not in packets_by_second:
-                        packets_by_second[second] = []
-
-                    packets_by_second[second].append(size)
-                except (ValueError, IndexError):
-                    continue
-
-        # Calculate bitrate for each second
-        bitrates = {}
-        for second, packets in packets_by_second.items():
-            # Total bits for this second
-            total_bits = sum(packets) * 8
-
-            # Convert to Mbps
-            mbps = total_bits / 1_000_000
-            bitrates[second] = mbps
-
-        # Fill in missing seconds with 0
-        for second in range(int(duration) + 1):
-            if second not in bitrates:
-                bitrates[second] = 0
-
-        return bitrates, duration
+        video_duration = probe.duration(input_path)
+        # Bytes per whole second of the first video stream, zeros included
+        histogram = probe.bytes_per_second(input_path)
+        bitrates = {second: size * 8 / 1_000_000 for second, size in enumerate(histogram)}
+        return bitrates, video_duration
 
     except subprocess.CalledProcessError as e:
         print(f"Error: {e}")
         return None, None
 
 
+def rolling_bitrate(
+    bytes_per_second: Iterable[int], window: int
+) -> Iterator[Tuple[int, float]]:
+    """(start second, Mbps averaged over `window` seconds), one running sum, O(window) memory."""
+    window = max(1, window)
+    recent = [0] * window  # Ring buffer of the last `window` seconds
+    total = 0
+    for second, size in enumerate(bytes_per_second):
+        slot = second % window
+        total += size - recent[slot]
+        recent[slot] = size
+        if second + 1 >= window:
+            yield second + 1 - window, total * 8 / window / 1_000_000
+
+
+def analyze_bitrate(input_path, window=5):
+    """
+    Average, peak-second and peak-window bitrate of every stream.
+    :param input_path: Media file (one cached, streamed ffprobe pass; see probe.py)
+    :param window: Rolling window in seconds for the sustained peak
+    :return: [{"index", "codec_type", "average_mbps", "peak_second", "peak_mbps",
+        "peak_window_start", "peak_window_mbps"}]
+    """
+    try:
+        record = probe.probe(input_path)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: {e}")
+        return None
+
+    results = []
+    for stream in record["streams"]:
+        histogram = stream["bytes_per_second"]
+        if not any(histogram):
+            continue  # e.g. attached cover art
+        peak_second = max(range(len(histogram)), key=histogram.__getitem__)
+        # Clips shorter than the window: the whole clip is the window
+        windows = rolling_bitrate(histogram, min(window, len(histogram)))
+        peak_window_start, peak_window_mbps = max(windows, key=lambda w: w[1])
+        results.append(
+            {
+                "index": stream["index"],
+                "codec_type": stream["codec_type"],
+                "average_mbps": (stream["bit_rate"] or 0) / 1_000_000,
+                "peak_second": peak_second,
+                "peak_mbps": histogram[peak_second] * 8 / 1_000_000,
+                "peak_window_start": peak_window_start,
+                "peak_window_mbps": peak_window_mbps,
+            }
+        )
+    return results
+
+
 # Example usage:
 if __name__ == "__main__":
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -140,3 +109,12 @@ if __name__ == "__main__":
             print(f"Second {second}: {bitrate:.2f} Mbps")
     else:
         print("Failed to analyze bitrate per second.")
+
+    # Peaks per stream
+    print("\nPeak bitrates (5 s rolling window):")
+    for s in analyze_bitrate(input_video, window=5) or []:
+        print(
+            f"#{s['index']} {s['codec_type']}: avg {s['average_mbps']:.2f} Mbps, "
+            f"peak {s['peak_mbps']:.2f} Mbps at {s['peak_second']}s, "
+            f"sustained {s['peak_window_mbps']:.2f} Mbps from {s['peak_window_start']}s"
+        )
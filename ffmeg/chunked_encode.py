@@ -0,0 +1,296 @@
+"""
+Chunked parallel VP9 encoding.
+
+A two-pass `-deadline best` VP9 encode is effectively serial: one long clip
+keeps one encoder busy for ages. This splits the clip into segments, encodes
+them concurrently (one ffmpeg process each, same settings), and joins the
+results losslessly with the concat demuxer.
+
+- Segment boundaries snap to source keyframes (cheap: packet flags only) or
+  to detected scene cuts (a decode pass with the `scene` score), so every
+  segment starts on a natural cut. With no usable cuts the clip is split
+  evenly.
+- Each segment is decoded straight from the source with accurate input
+  seeking (`-ss start -t length` before `-i`); there is no intermediate
+  split file.
+- Video only (-an), like process_videos.
+
+Usage:
+    python chunked_encode.py input.mp4 output.webm --segment-seconds 20 --crf 25
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from video_jobs import probe_duration
+
+
+def vp9_args(crf=25, deadline="best", cpu_used=0, threads=1, vf=None):
+    """Encoder settings shared by every segment (match process_videos' VP9 path)."""
+    args = ["-vf", vf] if vf else []
+    return args + [
+        "-c:v",
+        "libvpx-vp9",
+        "-b:v",
+        "0",  # CRF-based, no target bitrate
+        "-crf",
+        str(crf),
+        "-pix_fmt",
+        "yuv420p",
+        "-deadline",
+        deadline,
+        "-cpu-used",
+        str(cpu_used),
+        "-row-mt",
+        "1",
+        "-threads",
+        str(threads),
+        "-an",
+    ]
+
+
+def keyframe_times(input_path) -> List[float]:
+    """Timestamps of video keyframes, from packet flags (no decoding)."""
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,flags",
+            "-of",
+            "csv=p=0",
+            str(input_path),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                times.append(float(pts))
+            except ValueError:
+                continue
+    return sorted(times)
+
+
+def scene_cut_times(input_path, threshold=0.3) -> List[float]:
+    """Timestamps where the scene score exceeds threshold (decodes the clip)."""
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-i",
+            str(input_path),
+            "-an",
+            "-vf",
+            f"select='gt(scene,{threshold})',showinfo",
+            "-f",
+            "null",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [float(m) for m in re.findall(r"pts_time:([0-9.]+)", result.stderr)]
+
+
+def plan_segments(
+    duration: float,
+    cuts: Sequence[float],
+    segment_seconds: float,
+    min_seconds: float = 2.0,
+) -> List[Tuple[float, float]]:
+    """(start, end) segments of roughly segment_seconds, cut at the given times.
+
+    A boundary is placed at the first cut at least segment_seconds after the
+    previous boundary. A tail shorter than min_seconds is merged backwards.
+    Without cuts (or with too few), the clip is split evenly.
+    """
+    if segment_seconds <= 0 or duration <= segment_seconds:
+        return [(0.0, duration)]
+
+    bounds = [0.0]
+    for cut in sorted(cuts):
+        if cut - bounds[-1] >= segment_seconds and duration - cut >= min_seconds:
+            bounds.append(cut)
+    if len(bounds) == 1:
+        count = max(1, round(duration / segment_seconds))
+        bounds = [duration * i / count for i in range(count)]
+    bounds.append(duration)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _segment_commands(
+    input_path, segment_path, start, length, codec_args, two_pass, passlog
+) -> List[List[str]]:
+    seek = ["-ss", f"{start:.6f}", "-t", f"{length:.6f}", "-i", str(input_path)]
+    base = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *seek, *codec_args]
+    if not two_pass:
+        return [[*base, segment_path]]
+    return [
+        [*base, "-pass", "1", "-passlogfile", passlog, "-f", "null", "-"],
+        [*base, "-pass", "2", "-passlogfile", passlog, segment_path],
+    ]
+
+
+def concat_segments(segment_paths: Sequence[str], output_path, work_dir) -> None:
+    """Join segments without re-encoding (concat demuxer, stream copy)."""
+    list_file = os.path.join(work_dir, "segments.txt")
+    with open(list_file, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            list_file,
+            "-c",
+            "copy",
+            str(output_path),
+        ],
+        check=True,
+    )
+
+
+def chunked_encode(
+    input_path,
+    output_path,
+    *,
+    segment_seconds: float = 20.0,
+    split: str = "keyframes",
+    scene_threshold: float = 0.3,
+    jobs: Optional[int] = None,
+    codec_args: Optional[Sequence[str]] = None,
+    two_pass: bool = True,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+) -> Dict:
+    """
+    Encode input_path to output_path in parallel segments.
+    :param segment_seconds: Target segment length (0 = one segment, i.e. a normal encode)
+    :param split: "keyframes" (source keyframes), "scenes" (scene detection) or "even"
+    :param scene_threshold: Scene score for split="scenes" (0-1, lower = more cuts)
+    :param jobs: Concurrent segment encodes (None = CPU cores)
+    :param codec_args: Encoder args incl. -vf (default: vp9_args())
+    :param two_pass: Two-pass per segment (pass logs are per segment)
+    :param start: Encode from this source time (seconds)
+    :param duration: Encode this many seconds (None = to the end)
+    :return: {"segments", "seconds", "bytes"}
+    """
+    started = time.perf_counter()
+    total = probe_duration(str(input_path))
+    if not total:
+        raise RuntimeError(f"Could not read duration of {input_path}")
+    duration = min(duration or total, total - start)
+    if split == "scenes":
+        cuts = scene_cut_times(input_path, scene_threshold)
+    elif split == "keyframes":
+        cuts = keyframe_times(input_path)
+    else:
+        cuts = []
+    # Plan on the trimmed window, then map back to source time
+    window_cuts = [c - start for c in cuts if start < c < start + duration]
+    segments = [
+        (start + a, start + b) for a, b in plan_segments(duration, window_cuts, segment_seconds)
+    ]
+    codec_args = list(codec_args) if codec_args is not None else vp9_args()
+    ext = os.path.splitext(str(output_path))[1] or ".webm"
+
+    work_dir = tempfile.mkdtemp(
+        prefix="chunks_", dir=os.path.dirname(os.path.abspath(output_path))
+    )
+    try:
+        segment_paths = [
+            os.path.join(work_dir, f"seg_{i:04d}{ext}") for i in range(len(segments))
+        ]
+
+        def encode(i: int) -> None:
+            seg_start, seg_end = segments[i]
+            passlog = os.path.join(work_dir, f"seg_{i:04d}_passlog")
+            for cmd in _segment_commands(
+                input_path,
+                segment_paths[i],
+                seg_start,
+                seg_end - seg_start,
+                codec_args,
+                two_pass,
+                passlog,
+            ):
+                subprocess.run(cmd, check=True)
+
+        workers = min(len(segments), jobs or os.cpu_count() or 1)
+        print(f"Encoding {len(segments)} segment(s) of {input_path}, {workers} at a time")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(encode, range(len(segments))))  # Re-raises the first failure
+
+        if len(segment_paths) == 1:
+            shutil.move(segment_paths[0], output_path)
+        else:
+            concat_segments(segment_paths, output_path, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "segments": len(segments),
+        "seconds": round(time.perf_counter() - started, 2),
+        "bytes": os.path.getsize(output_path),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Chunked parallel VP9 encode")
+    ap.add_argument("input")
+    ap.add_argument("output")
+    ap.add_argument("--segment-seconds", type=float, default=20.0)
+    ap.add_argument("--split", choices=["keyframes", "scenes", "even"], default="keyframes")
+    ap.add_argument("--scene-threshold", type=float, default=0.3)
+    ap.add_argument("--jobs", type=int, default=None, help="Concurrent segments (default: CPU cores)")
+    ap.add_argument("--threads", type=int, default=1, help="Encoder threads per segment")
+    ap.add_argument("--crf", type=int, default=25)
+    ap.add_argument("--deadline", default="best")
+    ap.add_argument("--cpu-used", type=int, default=0)
+    ap.add_argument("--vf", default=None, help="Filter chain, e.g. scale=1080:-2,fps=30")
+    ap.add_argument("--single-pass", action="store_true")
+    args = ap.parse_args()
+
+    stats = chunked_encode(
+        args.input,
+        args.output,
+        segment_seconds=args.segment_seconds,
+        split=args.split,
+        scene_threshold=args.scene_threshold,
+        jobs=args.jobs,
+        codec_args=vp9_args(args.crf, args.deadline, args.cpu_used, args.threads, args.vf),
+        two_pass=not args.single_pass,
+    )
+    print(
+        f"{args.input} -> {args.output}: {stats['segments']} segments, "
+        f"{stats['bytes'] / 1_000_000:.2f} MB in {stats['seconds']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Target-quality CRF search.
+
+Instead of one hard-coded CRF for every clip, find the highest CRF (smallest
+file) whose output still meets a quality target:
+
+1. Take a few short sample windows spread over the clip (or over the
+   start/duration part of it that will actually be encoded).
+2. For each window, write a lossless reference (FFV1) of the source *after*
+   the output filters (scale, fps, mpdecimate...), so probe encodes and the
+   reference line up frame for frame.
+3. Binary-search CRF: encode every window at the candidate CRF, score it
+   against its reference with libvmaf (when ffmpeg has it), ssim or psnr,
+   and keep the highest CRF whose mean score meets the target.
+
+Results (and every probe score) are cached in .crf_cache.json next to the
+source, keyed by path, size, mtime and the search settings, so reruns don't
+repeat the search.
+
+Usage:
+    python crf_search.py clip.mp4 --codec vp9 --vf "scale=1080:-2,fps=30"
+    python crf_search.py clip.mp4 --metric ssim --target 0.98
+    python crf_search.py long.mp4 --start 3600 --duration 10   # tune for a cut
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence
+
+from video_jobs import probe_duration
+
+DEFAULT_TARGETS = {"vmaf": 93.0, "ssim": 0.975, "psnr": 40.0}
+CACHE_NAME = ".crf_cache.json"
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def has_libvmaf() -> bool:
+    """True if this ffmpeg build has the libvmaf filter."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-filters"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return re.search(r"\blibvmaf\b", result.stdout) is not None
+
+
+def resolve_metric(metric: str = "auto", target: Optional[float] = None):
+    """(metric, target): "auto" = vmaf when available, else ssim."""
+    if metric == "auto":
+        if target is not None:
+            raise ValueError("Pass an explicit metric with a custom target (scales differ)")
+        metric = "vmaf" if has_libvmaf() else "ssim"
+    if metric not in DEFAULT_TARGETS:
+        raise ValueError(f"Unknown metric: {metric}")
+    if metric == "vmaf" and not has_libvmaf():
+        raise RuntimeError("ffmpeg was built without libvmaf; use metric='ssim' or 'psnr'")
+    return metric, DEFAULT_TARGETS[metric] if target is None else target
+
+
+def vp9_crf_args(crf, deadline="good", cpu_used=2, threads=0):
+    """VP9 CRF encoder args for probes (faster than `best`, so slightly conservative)."""
+    return [
+        "-c:v",
+        "libvpx-vp9",
+        "-b:v",
+        "0",
+        "-crf",
+        str(crf),
+        "-pix_fmt",
+        "yuv420p",
+        "-deadline",
+        deadline,
+        "-cpu-used",
+        str(cpu_used),
+        "-row-mt",
+        "1",
+        "-threads",
+        str(threads),
+        "-an",
+    ]
+
+
+def x264_crf_args(crf, preset="veryfast", threads=0):
+    """H.264 CRF encoder args (use the final preset: it changes quality per CRF)."""
+    return [
+        "-c:v",
+        "libx264",
+        "-crf",
+        str(crf),
+        "-preset",
+        preset,
+        "-threads",
+        str(threads),
+        "-pix_fmt",
+        "yuv420p",
+        "-an",
+    ]
+
+
+def sample_starts(duration: float, samples: int, seconds: float) -> List[float]:
+    """Start times of `samples` windows spread evenly over the clip."""
+    if duration <= seconds * samples:
+        return [0.0]
+    step = (duration - seconds) / max(1, samples - 1) if samples > 1 else 0
+    return [round(i * step, 3) for i in range(samples)]
+
+
+def _run(cmd: Sequence[str]) -> str:
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return result.stderr
+
+
+def make_reference(source, start, seconds, vf, path):
+    """Lossless (FFV1) copy of one window after the output filters."""
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-ss", f"{start}", "-t", f"{seconds}", "-i", str(source)]
+    if vf:
+        cmd += ["-vf", vf]
+    _run(cmd + ["-an", "-c:v", "ffv1", "-pix_fmt", "yuv420p", path])
+
+
+def score(distorted, reference, metric) -> float:
+    """Quality of distorted vs reference (vmaf 0-100, ssim 0-1, psnr dB)."""
+    graph = {
+        "vmaf": "libvmaf",
+        "ssim": "ssim",
+        "psnr": "psnr",
+    }[metric]
+    stderr = _run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-i",
+            distorted,
+            "-i",
+            reference,
+            "-lavfi",
+            f"[0:v]setpts=PTS-STARTPTS[d];[1:v]setpts=PTS-STARTPTS[r];[d][r]{graph}",
+            "-f",
+            "null",
+            "-",
+        ]
+    )
+    pattern = {
+        "vmaf": r"VMAF score[:=]\s*([0-9.]+)",
+        "ssim": r"All:([0-9.]+)",
+        "psnr": r"average:([0-9.]+|inf)",
+    }[metric]
+    match = re.search(pattern, stderr)
+    if not match:
+        raise RuntimeError(f"No {metric} score in ffmpeg output")
+    return float("inf") if match.group(1) == "inf" else float(match.group(1))
+
+
+def _cache_key(source, settings: Dict) -> str:
+    st = os.stat(source)
+    fingerprint = json.dumps(settings, sort_keys=True)
+    digest = hashlib.sha1(fingerprint.encode()).hexdigest()[:12]
+    return f"{os.path.abspath(source)}|{st.st_size}|{st.st_mtime_ns}|{digest}"
+
+
+def _load_cache(path) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache_entry(path, key, entry):
+    with _cache_lock:
+        cache = _load_cache(path)
+        cache[key] = entry
+        tmp = f"{path}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, path)
+
+
+def find_crf(
+    source,
+    crf_args: Callable[[int], List[str]],
+    *,
+    vf: Optional[str] = None,
+    metric: str = "auto",
+    target: Optional[float] = None,
+    crf_min: int = 15,
+    crf_max: int = 50,
+    samples: int = 3,
+    sample_seconds: float = 4.0,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    cache_path: Optional[str] = None,
+) -> int:
+    """
+    Highest CRF in [crf_min, crf_max] whose sampled encodes meet the target.
+    :param source: Input video
+    :param crf_args: crf → encoder args (codec, rate control, pix_fmt; no -vf, no output)
+    :param vf: Output filter chain (applied to the references; probes encode those)
+    :param metric: "auto" (vmaf if available, else ssim), "vmaf", "ssim" or "psnr"
+    :param target: Minimum mean score (default DEFAULT_TARGETS[metric])
+    :param samples: Sample windows per clip
+    :param sample_seconds: Length of each window
+    :param start: Seconds into the source where the encoded part begins (a trim)
+    :param duration: Length of the encoded part (None = to the end)
+    :param cache_path: Cache file (default .crf_cache.json next to the source)
+    :return: CRF (crf_min if even that misses the target)
+    """
+    metric, target = resolve_metric(metric, target)
+    cache_path = cache_path or os.path.join(os.path.dirname(os.path.abspath(source)), CACHE_NAME)
+    settings = {
+        "args": crf_args(0),
+        "vf": vf,
+        "metric": metric,
+        "target": target,
+        "range": [crf_min, crf_max],
+        "samples": samples,
+        "sample_seconds": sample_seconds,
+        "window": [start, duration],
+    }
+    key = _cache_key(source, settings)
+    entry = _load_cache(cache_path).get(key, {"probes": {}})
+    if "crf" in entry:
+        print(f"CRF {entry['crf']} for {os.path.basename(source)} (cached, {metric} ≥ {target})")
+        return entry["crf"]
+
+    source_duration = probe_duration(str(source))
+    if not source_duration:
+        raise RuntimeError(f"Could not read duration of {source}")
+    # Sample only inside the part being encoded
+    window = source_duration - start
+    if duration:
+        window = min(window, duration)
+    if window <= 0:
+        raise RuntimeError(f"start {start}s is past the end of {source}")
+    sample_seconds = min(sample_seconds, window)
+    starts = [start + t for t in sample_starts(window, samples, sample_seconds)]
+    work_dir = tempfile.mkdtemp(prefix="crf_search_")
+    try:
+        references = []
+        for i, at in enumerate(starts):
+            ref = os.path.join(work_dir, f"ref_{i}.mkv")
+            make_reference(source, at, sample_seconds, vf, ref)
+            references.append(ref)
+
+        def probe(crf: int) -> float:
+            if str(crf) in entry["probes"]:
+                return entry["probes"][str(crf)]
+            scores = []
+            for i, ref in enumerate(references):
+                out = os.path.join(work_dir, f"probe_{i}_{crf}.mkv")
+                _run(["ffmpeg", "-y", "-hide_banner", "-i", ref, *crf_args(crf), out])
+                scores.append(score(out, ref, metric))
+                os.remove(out)
+            value = sum(scores) / len(scores)
+            entry["probes"][str(crf)] = value
+            _save_cache_entry(cache_path, key, entry)  # Partial progress survives interrupts
+            print(f"  {os.path.basename(source)} CRF {crf}: {metric} {value:.4f}")
+            return value
+
+        best, lo, hi = None, crf_min, crf_max
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            if probe(mid) >= target:
+                best, lo = mid, mid + 1
+            else:
+                hi = mid - 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if best is None:
+        print(f"  {os.path.basename(source)}: no CRF ≥ {crf_min} reaches {metric} {target}")
+        best = crf_min
+    entry["crf"] = best
+    _save_cache_entry(cache_path, key, entry)
+    print(f"CRF {best} for {os.path.basename(source)} ({metric} ≥ {target})")
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Find the highest CRF that meets a quality target")
+    ap.add_argument("input")
+    ap.add_argument("--codec", choices=["vp9", "x264"], default="vp9")
+    ap.add_argument("--metric", choices=["auto", "vmaf", "ssim", "psnr"], default="auto")
+    ap.add_argument("--target", type=float, default=None)
+    ap.add_argument("--vf", default=None)
+    ap.add_argument("--crf-min", type=int, default=15)
+    ap.add_argument("--crf-max", type=int, default=50)
+    ap.add_argument("--samples", type=int, default=3)
+    ap.add_argument("--sample-seconds", type=float, default=4.0)
+    ap.add_argument("--start", type=float, default=0.0, help="Trim start (seconds)")
+    ap.add_argument("--duration", type=float, default=None, help="Trim length (seconds)")
+    args = ap.parse_args()
+
+    crf_args = vp9_crf_args if args.codec == "vp9" else x264_crf_args
+    find_crf(
+        args.input,
+        crf_args,
+        vf=args.vf,
+        metric=args.metric,
+        target=args.target,
+        crf_min=args.crf_min,
+        crf_max=args.crf_max,
+        samples=args.samples,
+        sample_seconds=args.sample_seconds,
+        start=args.start,
+        duration=args.duration,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,56 @@
 import subprocess
 import os
 import shutil
-from typing import Dict, Any
+import hashlib
+import json
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Any, List, Optional
+
+IMAGE_EXTENSIONS = (
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".webp",
+    ".bmp",
+    ".gif",
+    ".avif",
+    ".svg",
+    ".heic",
+    ".ico",
+)
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".flv")
+SUMMARY_NAME = "_summary.json"
+VARIANTS_NAME = "variants.json"
+MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+}
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 1
+
+# Config keys that change each format's output (the manifest fingerprint)
+COMMON_CONFIG_KEYS = (
+    "target_width",
+    "max_colors",
+    "preserve_transparency",
+    "background_color",
+    "backend",
+)
+FORMAT_CONFIG_KEYS = {
+    "png": ("png_compression_level", "use_pngquant", "pngquant_quality"),
+    "jpg": ("jpeg_quality",),
+    "jpeg": ("jpeg_quality",),
+    "webp": ("webp_quality", "webp_lossless"),
+    "gif": ("gif_colors",),
+    "avif": ("avif_quality",),
+    "svg": ("convert_svg_to_png",),
+}
 
 
 class ImageCompressor:
@@ -361,10 +410,44 @@ class ImageCompressor:
             print(f"Error extracting video frame: {e}")
             return False
 
-    def process_image(self, input_path: str, output_format: str) -> bool:
-        """Process a single image file."""
+    @staticmethod
+    def _temp_path(output_path: str) -> str:
+        """Hidden temp name in the output dir, same extension (tools pick the format from it)."""
+        folder, name = os.path.split(output_path)
+        base, ext = os.path.splitext(name)
+        return os.path.join(folder, f".{base}.tmp-{os.getpid()}{ext}")
+
+    def _write_atomic(self, write, output_path: str) -> Optional[str]:
+        """
+        Run write(temp_path) and rename the result into place, so an
+        interrupted run never leaves a truncated output behind.
+        :return: Final path (an SVG converted to PNG ends in .png), None on failure
+        """
+        tmp = self._temp_path(output_path)
+        produced = [(tmp, output_path)]
+        if output_path.endswith(".svg"):
+            # compress_svg may convert to PNG next to the requested path
+            produced.append((tmp[:-4] + ".png", output_path[:-4] + ".png"))
+        try:
+            if write(tmp):
+                for written, final in produced:
+                    if os.path.exists(written):
+                        os.replace(written, final)
+                        return final
+            return None
+        finally:
+            for written, _ in produced:
+                if os.path.exists(written):
+                    os.remove(written)
+
+    def process_image(
+        self, input_path: str, output_format: str, output_path: Optional[str] = None
+    ) -> Optional[str]:
+        """Process a single image file; returns the output path on success."""
         base_name = os.path.splitext(os.path.basename(input_path))[0]
-        output_path = os.path.join(self.output_dir, f"{base_name}.{output_format}")
+        output_path = output_path or os.path.join(
+            self.output_dir, f"{base_name}.{output_format}"
+        )
 
         # Route to appropriate compression function
         format_handlers = {
@@ -378,71 +461,484 @@ class ImageCompressor:
         }
 
         handler = format_handlers.get(output_format.lower())
+        if self.config.get("backend") == "pillow":
+            # In-process encode (no magick spawn/decode); magick for what Pillow can't do
+            import pillow_backend
+
+            if pillow_backend.supports(input_path, output_format):
+                handler = lambda inp, out: pillow_backend.compress(  # noqa: E731
+                    inp, out, output_format, self.config
+                )
         if handler:
-            success = handler(input_path, output_path)
-            if success:
+            written = self._write_atomic(lambda tmp: handler(input_path, tmp), output_path)
+            if written:
                 # Print file size comparison
                 original_size = os.path.getsize(input_path)
-                compressed_size = os.path.getsize(output_path)
+                compressed_size = os.path.getsize(written)
                 reduction = (1 - compressed_size / original_size) * 100
                 print(
-                    f"Compressed: {os.path.basename(input_path)} -> {os.path.basename(output_path)}"
+                    f"Compressed: {os.path.basename(input_path)} -> {os.path.basename(written)}"
+                    f"  ({original_size:,} -> {compressed_size:,} bytes, {reduction:.1f}% reduction)"
                 )
-                print(
-                    f"  Size: {original_size:,} -> {compressed_size:,} bytes ({reduction:.1f}% reduction)"
-                )
-            return success
+            return written
         else:
             print(f"Unsupported output format: {output_format}")
-            return False
+            return None
+
+    def variants_mode(self) -> bool:
+        return bool(self.config.get("variant_widths") and self.config.get("variant_formats"))
+
+    def collect_tasks(self) -> List[Dict[str, Any]]:
+        """
+        One task per output file: images, and each extracted video frame.
+        In variants mode, one task per image covers all its widths and formats.
+        """
+        output_format = self.config["output_format"]
+        tasks = []
+        for filename in sorted(os.listdir(self.image_input_dir)):
+            file_path = os.path.join(self.image_input_dir, filename)
 
-    def process_all(self):
-        """Process all images and videos in the input directory."""
-        image_extensions = (
-            ".png",
-            ".jpg",
-            ".jpeg",
-            ".webp",
-            ".bmp",
-            ".gif",
-            ".avif",
-            ".svg",
-            ".heic",
-            ".ico",
-        )
-        video_extensions = (".mp4", ".mov", ".avi", ".mkv", ".flv")
+            if filename.lower().endswith(IMAGE_EXTENSIONS) and self.variants_mode():
+                tasks.append(
+                    {
+                        "kind": "variants",
+                        "formats": list(self.config["variant_formats"]),
+                        "widths": sorted(self.config["variant_widths"], reverse=True),
+                        "limit": "variants",
+                        "input": file_path,
+                        # Variant paths are <stem>-<width>w.<format>
+                        "output": os.path.join(self.output_dir, os.path.splitext(filename)[0]),
+                    }
+                )
+
+            elif filename.lower().endswith(IMAGE_EXTENSIONS):
+                tasks.append(
+                    {
+                        "kind": "image",
+                        "format": output_format,
+                        "limit": output_format.lower(),
+                        "input": file_path,
+                        "output": os.path.join(
+                            self.output_dir,
+                            f"{os.path.splitext(filename)[0]}.{output_format}",
+                        ),
+                    }
+                )
+
+            elif filename.lower().endswith(VIDEO_EXTENSIONS):
+                base_name = os.path.splitext(filename)[0]
+                for i in range(self.config.get("frames_to_extract", 1)):
+                    tasks.append(
+                        {
+                            "kind": "frame",
+                            "format": output_format,
+                            "limit": "video",
+                            "input": file_path,
+                            "output": os.path.join(
+                                self.output_dir,
+                                f"{base_name}-frame-{i+1}.{output_format}",
+                            ),
+                            "frame": i * self.config.get("frame_interval", 25),
+                        }
+                    )
+        return tasks
+
+    def make_variants(self, task: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Every width x format of one image. With Pillow: one decode, widths
+        resized largest first (each from the previous), encodes on
+        config["variant_threads"] threads. Otherwise (no Pillow, SVG,
+        animations) one magick run per variant.
+        :return: [{"format", "width", "height", "path", "bytes"}]
+        """
+        input_path, formats, widths = task["input"], task["formats"], task["widths"]
+
+        def path_for(fmt: str, width: int) -> str:
+            return f"{task['output']}-{width}w.{fmt}"
+
+        try:
+            import pillow_backend
+        except ImportError:
+            pillow_backend = None
+        if pillow_backend and all(pillow_backend.supports(input_path, f) for f in formats):
+            _, files = pillow_backend.encode_variants(
+                input_path,
+                formats,
+                widths,
+                path_for,
+                self.config,
+                threads=self.config.get("variant_threads", 4),
+                write=self._write_atomic,
+            )
+            for f in files:
+                print(f"Variant: {os.path.basename(f['path'])} ({f['bytes']:,} bytes)")
+            return files
+
+        files = []
+        for width in widths:
+            compressor = ImageCompressor({**self.config, "target_width": width})
+            for fmt in formats:
+                written = compressor.process_image(input_path, fmt, path_for(fmt, width))
+                if not written:
+                    raise OSError(f"Failed to write {path_for(fmt, width)}")
+                size = (None, None)
+                if pillow_backend:
+                    try:
+                        with pillow_backend.Image.open(written) as img:
+                            size = img.size
+                    except (OSError, ValueError):
+                        pass
+                files.append(
+                    {
+                        "format": fmt,
+                        "width": size[0],
+                        "height": size[1],
+                        "path": written,
+                        "bytes": os.path.getsize(written),
+                    }
+                )
+        return files
+
+    def run_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one task (in a worker process) and time it."""
+        started = time.perf_counter()
+        written = None
+        files = None
+        error = None
+        try:
+            if task["kind"] == "variants":
+                files = self.make_variants(task)
+                written = files[0]["path"] if files else None
+            elif task["kind"] == "frame":
+                written = self._write_atomic(
+                    lambda tmp: self.extract_video_frame(task["input"], tmp, task["frame"]),
+                    task["output"],
+                )
+            else:
+                written = self.process_image(task["input"], task["format"], task["output"])
+        except (OSError, subprocess.CalledProcessError) as e:  # e.g. magick missing
+            error = str(e)
+            print(f"Error processing {os.path.basename(task['input'])}: {e}")
+        return {
+            "input": task["input"],
+            "output": written,
+            "ok": written is not None,
+            "skipped": False,
+            "error": error,
+            "input_bytes": os.path.getsize(task["input"]),
+            "output_bytes": (
+                sum(f["bytes"] for f in files) + task.get("kept_bytes", 0)
+                if files
+                else os.path.getsize(written) if written else None
+            ),
+            "files": files,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
 
-        # Setup output directory
-        if os.path.exists(self.output_dir):
-            shutil.rmtree(self.output_dir)
-        os.makedirs(self.output_dir)
+    def run_tasks(self, tasks: List[Dict[str, Any]], on_result=None) -> List[Dict[str, Any]]:
+        """
+        Run tasks in a process pool. config["format_limits"] caps how many
+        tasks of one kind run at once (e.g. AVIF encodes and ffmpeg are
+        multi-threaded themselves); config["max_workers"] caps the pool.
+        on_result(task, result) is called as each task finishes.
+        """
+        max_workers = self.config.get("max_workers") or os.cpu_count() or 1
+        limits = self.config.get("format_limits", {})
+        pending = deque(tasks)
+        running = {}
+        in_flight = Counter()
+        results = []
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                deferred = []
+                while pending and len(running) < max_workers:
+                    task = pending.popleft()
+                    key = task["limit"]
+                    if in_flight[key] >= max(1, limits.get(key, max_workers)):
+                        deferred.append(task)  # Its kind is at the limit; keep order
+                        continue
+                    running[pool.submit(self.run_task, task)] = task
+                    in_flight[key] += 1
+                pending.extendleft(reversed(deferred))
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    in_flight[task["limit"]] -= 1
+                    results.append(future.result())
+                    if on_result:
+                        on_result(task, results[-1])
+        return results
+
+    def config_fingerprint(self, task: Dict[str, Any]) -> str:
+        """Hash of the config keys that affect this task's output format."""
+        output_format = task["format"].lower()
+        keys = COMMON_CONFIG_KEYS + FORMAT_CONFIG_KEYS.get(output_format, ())
+        settings = {key: self.config.get(key) for key in keys}
+        settings.update(format=output_format, kind=task["kind"], frame=task.get("frame"))
+        if task["kind"] == "variants":
+            settings.update(target_width=None, widths=task["widths"])
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def file_hash(path: str, sources: Dict[str, Dict[str, Any]]) -> str:
+        """SHA-256 of a file, reused from the manifest while size and mtime match."""
+        st = os.stat(path)
+        cached = sources.get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["sha256"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        sources[path] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest.hexdigest(),
+        }
+        return sources[path]["sha256"]
 
+    def load_manifest(self) -> Dict[str, Any]:
+        """{"sources": {input: hash info}, "outputs": {output name: entry}}"""
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except (OSError, json.JSONDecodeError):
+            pass
+        return {"version": MANIFEST_VERSION, "sources": {}, "outputs": {}}
+
+    def save_manifest(self, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        tmp = f"{path}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, path)
+
+    def split_unchanged(self, tasks: List[Dict[str, Any]], manifest: Dict[str, Any]):
+        """
+        (tasks to run, results for skipped tasks). A task is skipped when the
+        manifest has its output for the same source hash and config
+        fingerprint, and the file on disk still has the recorded size.
+        """
+        todo, skipped = [], []
+        for task in tasks:
+            if task["kind"] == "variants":
+                self._split_variant_formats(task, manifest, todo, skipped)
+                continue
+            task["key"] = (
+                f"{self.file_hash(task['input'], manifest['sources'])}:"
+                f"{self.config_fingerprint(task)}"
+            )
+            entry = manifest["outputs"].get(os.path.basename(task["output"]))
+            written = os.path.join(self.output_dir, entry["path"]) if entry else None
+            if (
+                self.config.get("incremental", True)
+                and entry
+                and entry["key"] == task["key"]
+                and os.path.exists(written)
+                and os.path.getsize(written) == entry["bytes"]
+            ):
+                skipped.append(
+                    {
+                        "input": task["input"],
+                        "output": written,
+                        "ok": True,
+                        "skipped": True,
+                        "error": None,
+                        "input_bytes": os.path.getsize(task["input"]),
+                        "output_bytes": entry["bytes"],
+                        "files": None,
+                        "seconds": 0.0,
+                    }
+                )
+            else:
+                todo.append(task)
+        return todo, skipped
+
+    @staticmethod
+    def variant_entry_name(task: Dict[str, Any], fmt: str) -> str:
+        return f"{os.path.basename(task['output'])}.variants.{fmt}"
+
+    def _split_variant_formats(self, task, manifest, todo, skipped) -> None:
+        """Variants task: keep only the formats whose key or files changed."""
+        source_hash = self.file_hash(task["input"], manifest["sources"])
+        task["keys"] = {}
+        changed = []
+        for fmt in task["formats"]:
+            key = f"{source_hash}:{self.config_fingerprint({**task, 'format': fmt})}"
+            task["keys"][fmt] = key
+            entry = manifest["outputs"].get(self.variant_entry_name(task, fmt))
+            if not (
+                self.config.get("incremental", True)
+                and entry
+                and entry["key"] == key
+                and all(
+                    os.path.exists(os.path.join(self.output_dir, f["path"]))
+                    and os.path.getsize(os.path.join(self.output_dir, f["path"])) == f["bytes"]
+                    for f in entry["files"]
+                )
+            ):
+                changed.append(fmt)
+        if changed:
+            # Summary bytes still count the formats kept from earlier runs
+            kept = sum(
+                f["bytes"]
+                for fmt in task["formats"]
+                if fmt not in changed
+                for f in manifest["outputs"][self.variant_entry_name(task, fmt)]["files"]
+            )
+            todo.append({**task, "formats": changed, "kept_bytes": kept})
+        else:
+            skipped.append(
+                {
+                    "input": task["input"],
+                    "output": task["output"],
+                    "ok": True,
+                    "skipped": True,
+                    "error": None,
+                    "input_bytes": os.path.getsize(task["input"]),
+                    "output_bytes": sum(
+                        f["bytes"]
+                        for fmt in task["formats"]
+                        for f in manifest["outputs"][self.variant_entry_name(task, fmt)]["files"]
+                    ),
+                    "files": None,
+                    "seconds": 0.0,
+                }
+            )
+
+    def write_variants_map(self, tasks: List[Dict[str, Any]], manifest: Dict[str, Any]):
+        """
+        variants.json: per source, one <source> entry per format (type +
+        srcset, formats in config order) and the <img> fallback (largest
+        variant of the last format).
+        """
+        variants = {}
+        for task in tasks:
+            if task["kind"] != "variants":
+                continue
+            sources = []
+            for fmt in task["formats"]:
+                entry = manifest["outputs"].get(self.variant_entry_name(task, fmt))
+                if not entry:
+                    continue  # Failed this run
+                files = sorted(entry["files"], key=lambda f: f["width"] or 0, reverse=True)
+                sources.append(
+                    {
+                        "format": fmt,
+                        "type": MIME_TYPES.get(fmt.lower(), f"image/{fmt}"),
+                        "srcset": ", ".join(f"{f['path']} {f['width']}w" for f in files),
+                        "files": files,
+                    }
+                )
+            if sources:
+                largest = sources[-1]["files"][0]
+                variants[os.path.basename(task["input"])] = {
+                    "sources": sources,
+                    "img": {
+                        "src": largest["path"],
+                        "width": largest["width"],
+                        "height": largest["height"],
+                    },
+                }
+
+        path = os.path.join(self.output_dir, VARIANTS_NAME)
+        tmp = f"{path}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(variants, f, indent=2)
+        os.replace(tmp, path)
+        print(f"Wrote {len(variants)} <picture> entries to {path}")
+        return variants
+
+    def write_summary(self, results: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+        """Print totals and the slowest files; save everything to _summary.json."""
+        ok = [r for r in results if r["ok"]]
+        before = sum(r["input_bytes"] for r in ok)
+        after = sum(r["output_bytes"] for r in ok)
+        summary = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "files": len(results),
+            "failed": len(results) - len(ok),
+            "skipped": sum(1 for r in results if r.get("skipped")),
+            "input_bytes": before,
+            "output_bytes": after,
+            "bytes_saved": before - after,
+            "seconds": round(seconds, 2),
+            "results": sorted(results, key=lambda r: r["input"]),
+        }
+        saved = (1 - after / before) * 100 if before else 0.0
         print(
-            f"Processing images. Output format: {self.config['output_format'].upper()}"
+            f"\nDone: {len(ok)}/{len(results)} files in {seconds:.1f}s "
+            f"({summary['skipped']} unchanged), "
+            f"{before:,} -> {after:,} bytes ({saved:.1f}% saved)"
         )
+        for r in sorted(results, key=lambda r: r["seconds"], reverse=True)[:5]:
+            print(f"  {r['seconds']:7.2f}s  {os.path.basename(r['input'])}")
+
+        path = os.path.join(self.output_dir, SUMMARY_NAME)
+        tmp = f"{path}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp, path)
+        return summary
+
+    def process_all(self):
+        """Process all images and videos in the input directory."""
+        # Setup output directory (existing outputs are replaced file by file)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        if self.variants_mode():
+            print(
+                f"Processing images. Variants: {', '.join(self.config['variant_formats'])} "
+                f"at widths {', '.join(map(str, self.config['variant_widths']))}"
+            )
+        else:
+            print(
+                f"Processing images. Output format: {self.config['output_format'].upper()}"
+            )
         print(f"Output directory: {self.output_dir}")
+        background = self.config.get("background_color", "white")
         print(
-            f"Transparency: {'Preserved' if self.config.get('preserve_transparency', True) else f'Removed (background: {self.config.get('background_color', 'white')})'}"
+            f"Transparency: {'Preserved' if self.config.get('preserve_transparency', True) else f'Removed (background: {background})'}"
         )
 
-        for filename in os.listdir(self.image_input_dir):
-            file_path = os.path.join(self.image_input_dir, filename)
-
-            if filename.lower().endswith(image_extensions):
-                self.process_image(file_path, self.config["output_format"])
+        started = time.perf_counter()
+        # Unchanged sources with unchanged settings keep their outputs
+        manifest = self.load_manifest()
+        all_tasks = self.collect_tasks()
+        tasks, results = self.split_unchanged(all_tasks, manifest)
+
+        def record(task, result):
+            if result["ok"] and task["kind"] == "variants":
+                for fmt in task["formats"]:
+                    manifest["outputs"][self.variant_entry_name(task, fmt)] = {
+                        "key": task["keys"][fmt],
+                        "source": os.path.basename(task["input"]),
+                        "files": [
+                            {**f, "path": os.path.basename(f["path"])}
+                            for f in result["files"]
+                            if f["format"] == fmt
+                        ],
+                    }
+            elif result["ok"]:
+                manifest["outputs"][os.path.basename(task["output"])] = {
+                    "key": task["key"],
+                    "source": os.path.basename(task["input"]),
+                    "path": os.path.basename(result["output"]),
+                    "bytes": result["output_bytes"],
+                }
 
-            elif filename.lower().endswith(video_extensions):
-                base_name = os.path.splitext(filename)[0]
-                for i in range(self.config.get("frames_to_extract", 1)):
-                    output_path = os.path.join(
-                        self.output_dir,
-                        f"{base_name}-frame-{i+1}.{self.config['output_format']}",
-                    )
-                    self.extract_video_frame(
-                        file_path,
-                        output_path,
-                        i * self.config.get("frame_interval", 25),
-                    )
+        try:
+            results += self.run_tasks(tasks, on_result=record)
+        finally:
+            self.save_manifest(manifest)  # Also after an interrupt: finished files count
+        if self.variants_mode():
+            self.write_variants_map(all_tasks, manifest)
+        return self.write_summary(results, time.perf_counter() - started)
 
 
 def main():
@@ -472,6 +968,18 @@ def main():
         # Video frame extraction
         "frames_to_extract": 1,
         "frame_interval": 25,  # frames
+        # Encoder: "magick" (one process per file) or "pillow" (in-process, see pillow_backend.py)
+        "backend": "magick",
+        # Concurrency
+        "max_workers": None,  # None = CPU cores
+        "format_limits": {"avif": 2, "gif": 2, "video": 2},  # Max at once per kind
+        # Skip sources whose content and format settings are unchanged (.manifest.json)
+        "incremental": True,
+        # Responsive variants: every width x format per image plus variants.json
+        # for <picture> markup (None = single target_width/output_format)
+        "variant_widths": None,  # e.g. [1600, 1200, 800, 400]
+        "variant_formats": None,  # e.g. ["avif", "webp", "jpg"] (last = <img> fallback)
+        "variant_threads": 4,  # Parallel encodes per image
     }
 
     compressor = ImageCompressor(config)
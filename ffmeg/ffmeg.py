@@ -1,8 +1,290 @@
-import subprocess
 import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from crf_search import find_crf, vp9_crf_args, x264_crf_args
+from video_jobs import JobQueue, default_max_jobs, run_queue
 
 # Directory of the current script
 current_dir = os.path.dirname(os.path.abspath(__file__))
+CHUNKED_ENCODE = os.path.join(current_dir, "chunked_encode.py")
+
+
+def poster_filter(scale_filter):
+    """First frame, scaled like the video."""
+    return f"select=eq(n\\,0),{scale_filter}" if scale_filter else "select=eq(n\\,0)"
+
+
+def video_filter_args(filter_chain, poster=None, keep_audio=False):
+    """
+    Filter/map args for an encode. With poster=(output_image, scale_filter,
+    image_quality), the filtered video is split and frame 0 is written as a
+    second output of the same ffmpeg run (no extra decode of the result).
+    :return: (args before the video output, args appended after it)
+    """
+    if not poster:
+        return ["-vf", filter_chain], []
+    output_image, scale_filter, image_quality = poster
+    head = f"[0:v]{filter_chain}," if filter_chain else "[0:v]"
+    graph = f"{head}split=2[v][p];[p]{poster_filter(scale_filter)}[poster]"
+    before = ["-filter_complex", graph, "-map", "[v]"]
+    if keep_audio:
+        before += ["-map", "0:a?"]  # Explicit -map drops the default audio pick
+    after = ["-map", "[poster]", "-q:v", str(image_quality), "-frames:v", "1", output_image]
+    return before, after
+
+
+def h264_command(
+    input_video, output_video, filter_chain, crf, preset, threads=0, poster=None
+):
+    """Single-pass H.264 encode (MP4 output and the fallback path)."""
+    filter_args, poster_args = video_filter_args(filter_chain, poster, keep_audio=True)
+    return [
+        "ffmpeg",
+        "-y",  # Existing outputs were already skipped by process_videos
+        "-i",
+        input_video,
+        *filter_args,
+        "-c:v",
+        "libx264",
+        "-crf",
+        str(crf),
+        "-preset",
+        preset,
+        "-threads",
+        str(threads),
+        "-movflags",
+        "+faststart",
+        "-pix_fmt",
+        "yuv420p",
+        output_video,
+        *poster_args,
+    ]
+
+
+def vp9_pass_commands(
+    input_video, output_video, filter_chain, crf, passlogfile, threads=0, poster=None
+):
+    """Two-pass VP9 commands: (first pass → stats only, second pass → output).
+    With poster, the second pass also writes the poster image."""
+    filter_args, poster_args = video_filter_args(filter_chain, poster)
+    # -- First Pass --
+    # We use -f null /dev/null to discard output but gather stats
+    pass1_cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        input_video,
+        "-vf",
+        filter_chain,
+        "-c:v",
+        "libvpx-vp9",
+        "-b:v",
+        "0",  # CRF-based, no target bitrate
+        "-crf",
+        str(crf),
+        "-pix_fmt",
+        "yuv420p",
+        "-deadline",
+        "best",
+        "-cpu-used",
+        "0",
+        "-row-mt",
+        "1",
+        "-threads",
+        str(threads),
+        "-lag-in-frames",
+        "40",
+        "-pass",
+        "1",
+        "-passlogfile",
+        passlogfile,
+        "-an",  # No audio in first pass
+        "-f",
+        "null",  # Output goes nowhere
+        "-",
+    ]
+
+    # -- Second Pass --
+    pass2_cmd = [
+        # Command-line utility: ffmpeg
+        "ffmpeg",
+        # Existing outputs were already skipped by process_videos
+        "-y",
+        # Specify the input video file path
+        "-i",
+        input_video,
+        # Apply the scale filter to resize video (maintains aspect ratio, even dimensions)
+        # (and split off frame 0 for the poster output, if requested)
+        *filter_args,
+        # Specify the VP9 video codec
+        "-c:v",
+        "libvpx-vp9",
+        # Set the target bitrate to 0 for CRF-based (variable) bitrate
+        "-b:v",
+        "0",
+        # Use CRF mode to control quality (0–63 range, lower = better quality)
+        "-crf",
+        str(crf),
+        # Set pixel format to 8-bit 4:2:0 for broad compatibility
+        "-pix_fmt",
+        "yuv420p",
+        # Use the slowest preset for best compression
+        "-deadline",
+        "best",
+        # CPU efficiency level (0 = slowest but highest compression)
+        "-cpu-used",
+        "0",
+        # Row-based multithreading; threads per encode come from the job scheduler
+        "-row-mt",
+        "1",
+        "-threads",
+        str(threads),
+        # Indicate this is the second pass of two-pass encoding
+        "-pass",
+        "2",
+        # Specify the pass log file to use (generated in the first pass)
+        "-passlogfile",
+        passlogfile,
+        # Disable audio (video-only output)
+        "-an",
+        output_video,
+        # Optional second output: the poster image
+        *poster_args,
+    ]
+    return pass1_cmd, pass2_cmd
+
+
+def poster_command(output_video, output_image, scale_filter, image_quality):
+    """Grab the first frame of the encoded video as the poster image."""
+    return [
+        "ffmpeg",
+        "-y",
+        "-i",
+        output_video,
+        "-vf",
+        poster_filter(scale_filter),
+        "-q:v",
+        str(image_quality),
+        "-vframes",
+        "1",
+        output_image,
+    ]
+
+
+def build_video_steps(
+    input_video,
+    output_video,
+    output_image,
+    video_format,
+    filter_chain,
+    scale_filter,
+    crf,
+    preset,
+    image_quality,
+    passlogfile,
+    threads=0,
+    chunk_seconds=None,
+    inline_poster=True,
+):
+    """
+    ffmpeg steps for one video, in order, plus temp files to delete afterwards.
+    With chunk_seconds, the VP9 encode runs as chunked_encode.py: ~N s segments
+    encoded in parallel (one thread each, `threads` at a time) and concatenated.
+    With inline_poster, the poster is a second output of the final encode
+    instead of a separate run that decodes the new video again (not for
+    chunked encodes, whose output only exists after the concat).
+    The VP9 first pass declares its stats file in "produces", so a retried job
+    whose first pass already finished resumes at the second pass.
+    :return: ([{"label": str, "cmd": [argv], "produces": [paths]}], [cleanup paths])
+    """
+    steps, cleanup = [], []
+    poster = (output_image, scale_filter, image_quality) if inline_poster else None
+
+    # Decide on encoding approach based on format
+    if video_format.lower() == "mp4":
+        # ------------------------ MP4: Single-pass H.264 ------------------------
+        steps.append(
+            {
+                "label": f"MP4/H.264 single-pass, CRF={crf}, preset={preset}",
+                "cmd": h264_command(
+                    input_video, output_video, filter_chain, crf, preset, threads, poster
+                ),
+            }
+        )
+    elif video_format.lower() == "webm" and chunk_seconds:
+        poster = None
+        # ------------------------ WebM: Chunked two-pass VP9 ------------------------
+        chunked_cmd = [
+            sys.executable,
+            CHUNKED_ENCODE,
+            input_video,
+            output_video,
+            "--segment-seconds",
+            str(chunk_seconds),
+            "--jobs",
+            str(max(1, threads)),
+            "--threads",
+            "1",
+            "--crf",
+            str(crf),
+            "--deadline",
+            "best",
+            "--cpu-used",
+            "0",
+        ]
+        if filter_chain:
+            chunked_cmd += ["--vf", filter_chain]
+        steps.append(
+            {
+                "label": f"WebM/VP9 chunked two-pass, CRF={crf}, {chunk_seconds}s segments",
+                "cmd": chunked_cmd,
+            }
+        )
+    elif video_format.lower() == "webm":
+        # ------------------------ WebM: Two-pass VP9 ------------------------
+        # We'll store pass log files with a unique name (base_name_log)
+        pass1_cmd, pass2_cmd = vp9_pass_commands(
+            input_video, output_video, filter_chain, crf, passlogfile, threads, poster
+        )
+        steps.append(
+            {
+                "label": "WebM/VP9 1st pass",
+                "cmd": pass1_cmd,
+                "produces": [f"{passlogfile}-0.log"],
+            }
+        )
+        steps.append(
+            {
+                "label": f"WebM/VP9 2nd pass, CRF={crf}, two-pass, best deadline",
+                "cmd": pass2_cmd,
+            }
+        )
+        # Clean up FFmpeg-generated pass log files
+        cleanup += [f"{passlogfile}{suffix}" for suffix in ("-0.log", "-0.log.mbtree")]
+    else:
+        # ------------------------ Fallback: MP4 Single-pass ------------------------
+        steps.append(
+            {
+                "label": f"Fallback H.264, CRF={crf}, preset={preset}",
+                "cmd": h264_command(
+                    input_video, output_video, filter_chain, crf, preset, threads, poster
+                ),
+            }
+        )
+
+    # --- Poster Extraction ---
+    if poster:
+        return steps, cleanup  # Written by the final encode above
+    # Use the newly created video for the poster image (1st frame)
+    steps.append(
+        {
+            "label": "Poster",
+            "cmd": poster_command(output_video, output_image, scale_filter, image_quality),
+        }
+    )
+    return steps, cleanup
 
 
 def process_videos(
@@ -15,19 +297,36 @@ def process_videos(
     image_quality=20,
     overwrite=False,
     fps=30,
+    max_jobs=None,
+    threads_per_job=4,
+    chunk_seconds=None,
+    quality_metric="auto",
+    quality_target=None,
+    inline_poster=True,
 ):
     """
     Process and optimize videos in the current directory, then extract a poster image.
     Uses two-pass encoding for WebM (VP9), single-pass for MP4 (H.264).
+    Videos are encoded concurrently through a resumable job queue
+    (.ffmeg_jobs.json); ffmpeg output goes to ffmeg_logs/<video>.log.
     :param video_format: Output video format ("mp4" or "webm")
     :param image_format: Output image format ("jpg", "png", "webp", etc.)
     :param video_extensions: Tuple of video extensions to process
     :param target_width: Target width for output videos (height is computed)
-    :param crf: 4-51, 18 nearly lossless, 28 sweet spot lower = better quality
+    :param crf: 4-51, 18 nearly lossless, 28 sweet spot lower = better quality;
+        "auto" = per-video search for the highest CRF that meets quality_target
     :param preset: Preset for H.264 encoding (e.g., "veryslow")
     :param image_quality: Quality for poster image (0-100)
     :param overwrite: Overwrite existing files (True) or skip (False)
     :param fps: Target frames per second (optional)
+    :param max_jobs: Concurrent encodes and CRF searches (None = CPU cores // threads_per_job)
+    :param threads_per_job: Encoder threads per video
+    :param chunk_seconds: WebM only: split each video into ~N s segments encoded in
+        parallel (threads_per_job segments at a time) and concatenated losslessly
+    :param quality_metric: crf="auto": "auto" (VMAF if available, else SSIM), "vmaf", "ssim", "psnr"
+    :param quality_target: crf="auto": minimum score (None = crf_search.DEFAULT_TARGETS)
+    :param inline_poster: Write the poster from the final encode's ffmpeg run
+        (False = separate run on the encoded video, as before)
     """
 
     # Scale filter: Keep width at target_width, compute height so aspect is preserved
@@ -39,10 +338,14 @@ def process_videos(
     else:
         filter_chain = scale_filter
 
-    for filename in os.listdir(current_dir):
+    max_jobs = max_jobs or default_max_jobs(threads_per_job)
+    videos = []
+    for filename in sorted(os.listdir(current_dir)):
         if filename.lower().endswith(video_extensions):
             input_video = os.path.join(current_dir, filename)
             base_name, _ = os.path.splitext(filename)
+            if base_name.endswith("-mobile"):
+                continue  # Our own output from an earlier run
 
             output_video = os.path.join(
                 current_dir, f"{base_name}-mobile.{video_format}"
@@ -59,222 +362,85 @@ def process_videos(
             ):
                 print(f"Skipping {filename} - output files exist.")
                 continue
+            videos.append((filename, input_video, output_video, output_image, base_name))
 
-            # Decide on encoding approach based on format
-            if video_format.lower() == "mp4":
-                # ------------------------ MP4: Single-pass H.264 ------------------------
-                video_cmd = [
-                    "ffmpeg",
-                    "-i",
-                    input_video,
-                    "-vf",
-                    filter_chain,
-                    "-c:v",
-                    "libx264",
-                    "-crf",
-                    str(crf),
-                    "-preset",
-                    preset,
-                    "-movflags",
-                    "+faststart",
-                    "-pix_fmt",
-                    "yuv420p",
-                ]
-
-                if overwrite:
-                    video_cmd += ["-y"]  # Overwrite
-                else:
-                    video_cmd += ["-n"]  # No overwrite
-
-                video_cmd.append(output_video)
-
-                # Run single-pass H.264 encode
-                try:
-                    subprocess.run(video_cmd, check=True)
-                    print(
-                        f"[MP4/H.264 single-pass] {filename} -> {output_video} "
-                        f"(CRF={crf}, preset={preset})"
-                    )
-                except subprocess.CalledProcessError as e:
-                    print(f"Error processing MP4 video {filename}: {e}")
-                    continue
-
-            elif video_format.lower() == "webm":
-                # ------------------------ WebM: Two-pass VP9 ------------------------
-                # We'll store pass log files with a unique name (base_name_log)
-                passlogfile = os.path.join(current_dir, f"{base_name}_passlog")
-
-                # -- First Pass --
-                # We use -f null /dev/null to discard output but gather stats
-                pass1_cmd = [
-                    "ffmpeg",
-                    "-i",
-                    input_video,
-                    "-vf",
-                    filter_chain,
-                    "-c:v",
-                    "libvpx-vp9",
-                    "-b:v",
-                    "0",  # CRF-based, no target bitrate
-                    "-crf",
-                    str(crf),
-                    "-pix_fmt",
-                    "yuv420p",
-                    "-deadline",
-                    "best",
-                    "-cpu-used",
-                    "0",
-                    "-lag-in-frames",
-                    "40",
-                    "-pass",
-                    "1",
-                    "-passlogfile",
-                    passlogfile,
-                    "-an",  # No audio in first pass
-                    "-f",
-                    "null",  # Output goes nowhere
-                    "-",
-                ]
-
-                # Overwrite logic
-                if overwrite:
-                    pass1_cmd.insert(1, "-y")
-                else:
-                    pass1_cmd.insert(1, "-n")
-
-                # First pass run
-                try:
-                    subprocess.run(pass1_cmd, check=True)
-                    print(f"[WebM/VP9 1st pass] {filename}")
-                except subprocess.CalledProcessError as e:
-                    print(f"Error in 1st pass for {filename}: {e}")
-                    continue
-
-                # -- Second Pass --
-                pass2_cmd = [
-                    # Command-line utility: ffmpeg
-                    "ffmpeg",
-                    # Specify the input video file path
-                    "-i",
-                    input_video,
-                    # Apply the scale filter to resize video (maintains aspect ratio, even dimensions)
-                    "-vf",
-                    filter_chain,
-                    # Specify the VP9 video codec
-                    "-c:v",
-                    "libvpx-vp9",
-                    # Set the target bitrate to 0 for CRF-based (variable) bitrate
-                    "-b:v",
-                    "0",
-                    # Use CRF mode to control quality (0–63 range, lower = better quality)
-                    "-crf",
-                    str(crf),
-                    # Set pixel format to 8-bit 4:2:0 for broad compatibility
-                    "-pix_fmt",
-                    "yuv420p",
-                    # Use the slowest preset for best compression
-                    "-deadline",
-                    "best",
-                    # CPU efficiency level (0 = slowest but highest compression)
-                    "-cpu-used",
-                    "0",
-                    # Indicate this is the second pass of two-pass encoding
-                    "-pass",
-                    "2",
-                    # Specify the pass log file to use (generated in the first pass)
-                    "-passlogfile",
-                    passlogfile,
-                    # Disable audio (video-only output)
-                    "-an",
-                ]
-
-                if overwrite:
-                    pass2_cmd += ["-y"]
-                else:
-                    pass2_cmd += ["-n"]
-
-                pass2_cmd.append(output_video)
-
-                # Second pass run
-                try:
-                    subprocess.run(pass2_cmd, check=True)
-                    print(
-                        f"[WebM/VP9 2nd pass] {filename} -> {output_video} "
-                        f"(CRF={crf}, two-pass, best deadline)"
-                    )
-                except subprocess.CalledProcessError as e:
-                    print(f"Error in 2nd pass for {filename}: {e}")
-                    continue
-
-                finally:
-                    # Clean up passlog files if they exist
-                    # Clean up FFmpeg-generated pass log files
-                    for suffix in ("-0.log", "-0.log.mbtree"):
-                        lf = f"{passlogfile}{suffix}"
-                        if os.path.exists(lf):
-                            os.remove(lf)
-
-            else:
-                # ------------------------ Fallback: MP4 Single-pass ------------------------
-                video_cmd = [
-                    "ffmpeg",
-                    "-i",
-                    input_video,
-                    "-vf",
-                    filter_chain,
-                    "-c:v",
-                    "libx264",
-                    "-crf",
-                    str(crf),
-                    "-preset",
-                    preset,
-                    "-movflags",
-                    "+faststart",
-                    "-pix_fmt",
-                    "yuv420p",
-                ]
-
-                if overwrite:
-                    video_cmd += ["-y"]
-                else:
-                    video_cmd += ["-n"]
-
-                video_cmd.append(output_video)
-                try:
-                    subprocess.run(video_cmd, check=True)
-                    print(
-                        f"[Fallback H.264] {filename} -> {output_video} "
-                        f"(CRF={crf}, preset={preset})"
-                    )
-                except subprocess.CalledProcessError as e:
-                    print(f"Error in fallback for {filename}: {e}")
-                    continue
-
-            # --- Poster Extraction ---
-            # Use the newly created video for the poster image (1st frame)
-            image_cmd = [
-                "ffmpeg",
-                "-i",
-                output_video,
-                "-vf",
-                f"select=eq(n\\,0),{scale_filter}",
-                "-q:v",
-                str(image_quality),
-                "-vframes",
-                "1",
-            ]
-            if overwrite:
-                image_cmd += ["-y"]
-            else:
-                image_cmd += ["-n"]
-
-            image_cmd.append(output_image)
+    crfs = {filename: crf for filename, *_ in videos}
+    if crf == "auto" and videos:
+        # Searches are sample encodes too: run them max_jobs at a time, each
+        # with threads_per_job threads, like the encodes themselves.
+        # Cached per source in .crf_cache.json, so reruns skip the search
+        if video_format.lower() == "webm":
+            crf_range = (15, 50)
+
+            def crf_args(c):
+                return vp9_crf_args(c, threads=threads_per_job)
+
+        else:
+            crf_range = (16, 35)
 
+            def crf_args(c):
+                return x264_crf_args(c, preset, threads=threads_per_job)
+
+        def search(video):
+            filename, input_video = video[0], video[1]
             try:
-                subprocess.run(image_cmd, check=True)
-                print(f"Extracted poster: {filename} -> {output_image}")
-            except subprocess.CalledProcessError as e:
-                print(f"Error extracting poster from {filename}: {e}")
+                return filename, find_crf(
+                    input_video,
+                    crf_args,
+                    vf=filter_chain,
+                    metric=quality_metric,
+                    target=quality_target,
+                    crf_min=crf_range[0],
+                    crf_max=crf_range[1],
+                )
+            except (RuntimeError, subprocess.CalledProcessError) as e:
+                print(f"CRF search failed for {filename}, skipping: {e}")
+                return filename, None
+
+        with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+            crfs = dict(pool.map(search, videos))
+
+    queue = JobQueue(os.path.join(current_dir, ".ffmeg_jobs.json"))
+    queued = []
+    for filename, input_video, output_video, output_image, base_name in videos:
+        if crfs[filename] is None:
+            continue
+        steps, cleanup = build_video_steps(
+            input_video,
+            output_video,
+            output_image,
+            video_format,
+            filter_chain,
+            scale_filter,
+            crfs[filename],
+            preset,
+            image_quality,
+            passlogfile=os.path.join(current_dir, f"{base_name}_passlog"),
+            threads=threads_per_job,
+            chunk_seconds=chunk_seconds,
+            inline_poster=inline_poster,
+        )
+        queue.add(
+            filename,
+            steps,
+            source=input_video,
+            outputs=[output_video, output_image],
+            cleanup=cleanup,
+        )
+        queued.append(filename)
+
+    if not queued:
+        return
+    counts = run_queue(
+        queue,
+        max_jobs,
+        os.path.join(current_dir, "ffmeg_logs"),
+        job_ids=queued,
+    )
+    print(
+        f"Done: {counts['done']} encoded, {counts['failed']} failed, "
+        f"{counts['skipped']} already finished"
+    )
 
 
 if __name__ == "__main__":
@@ -287,4 +453,5 @@ if __name__ == "__main__":
         image_quality=20,
         overwrite=False,
         fps=60,  # Set default output fps to 30
+        threads_per_job=4,  # Concurrent encodes = CPU cores // 4
     )
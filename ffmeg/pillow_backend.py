@@ -0,0 +1,250 @@
+"""
+In-process Pillow encoder for ImageCompressor (ffmeg-image-new.py).
+
+The ImageMagick path spawns one `magick` per output, and every one of them
+decodes the source again. For thousands of small web assets the spawn and
+the decode cost more than the encode. Here a source is decoded once, and
+every requested format and width is encoded from that decoded image in the
+same process.
+
+Settings mirror the magick commands (same config keys): shrink-only resize
+to target width, metadata stripped, transparency kept or flattened onto
+background_color, progressive 4:2:0 JPEG, WebP method 6, PNG compress level,
+GIF palette with Floyd-Steinberg dithering. pngquant is not run.
+
+Optional plugins:
+- AVIF: Pillow built with libavif, or pillow-avif-plugin, or an older
+  pillow-heif that still registers an AVIF opener.
+- HEIC input: pillow-heif.
+
+Sources Pillow can't handle the same way (SVG, animated GIF/WebP) return
+False from supports(), and the caller falls back to magick.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageColor, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+except ImportError:
+    pass
+
+try:
+    import pillow_heif
+
+    pillow_heif.register_heif_opener()
+    Image.init()
+    if "AVIF" not in Image.SAVE and hasattr(pillow_heif, "register_avif_opener"):
+        pillow_heif.register_avif_opener()  # pillow-heif < 0.22
+except ImportError:
+    pillow_heif = None
+
+ALPHA_FORMATS = ("png", "webp", "gif", "avif")
+PIL_FORMATS = {
+    "jpg": "JPEG",
+    "jpeg": "JPEG",
+    "png": "PNG",
+    "webp": "WEBP",
+    "gif": "GIF",
+    "avif": "AVIF",
+}
+
+
+def can_encode(output_format: str) -> bool:
+    """True if this Pillow build can write the format."""
+    pil_format = PIL_FORMATS.get(output_format.lower())
+    Image.init()  # Image.SAVE is filled lazily
+    return pil_format is not None and pil_format in Image.SAVE
+
+
+def supports(input_path: str, output_format: str) -> bool:
+    """True if the Pillow path can produce this output (else use magick)."""
+    if input_path.lower().endswith(".svg") or not can_encode(output_format):
+        return False
+    try:
+        with Image.open(input_path) as img:
+            return getattr(img, "n_frames", 1) == 1  # Animations stay with magick
+    except (OSError, ValueError):
+        return False
+
+
+def decode(input_path: str) -> Image.Image:
+    """Decode once: EXIF orientation applied, RGB/RGBA."""
+    with Image.open(input_path) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        return img.convert("RGBA" if has_alpha else "RGB")
+
+
+def flatten(img: Image.Image, background: str) -> Image.Image:
+    """Composite alpha onto a solid background (like -alpha remove)."""
+    if img.mode != "RGBA":
+        return img
+    base = Image.new("RGB", img.size, ImageColor.getrgb(background))
+    base.paste(img, mask=img.getchannel("A"))
+    return base
+
+
+def prepare(img: Image.Image, output_format: str, config: Dict[str, Any]) -> Image.Image:
+    """Apply the transparency rules of ImageCompressor._handle_transparency."""
+    background = config.get("background_color") or "white"
+    keep_alpha = config.get("preserve_transparency", True) and output_format in ALPHA_FORMATS
+    return img if keep_alpha else flatten(img, background)
+
+
+def shrink(img: Image.Image, width: int) -> Image.Image:
+    """Resize to width if wider (like magick -resize {width}x>)."""
+    if not width or img.width <= width:
+        return img
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def save(img: Image.Image, output_path: str, output_format: str, config: Dict[str, Any]) -> None:
+    """Encode one output with the format's config settings."""
+    output_format = output_format.lower()
+    img = prepare(img, output_format, config)
+    max_colors = config.get("max_colors")
+
+    if output_format in ("jpg", "jpeg"):
+        if max_colors:
+            img = img.quantize(max_colors).convert("RGB")
+        img.save(
+            output_path,
+            "JPEG",
+            quality=config.get("jpeg_quality", 85),
+            optimize=True,
+            progressive=True,
+            subsampling="4:2:0",
+        )
+    elif output_format == "png":
+        if max_colors:
+            img = img.quantize(max_colors)
+        img.save(
+            output_path,
+            "PNG",
+            optimize=True,
+            compress_level=config.get("png_compression_level", 9),
+        )
+    elif output_format == "webp":
+        img.save(
+            output_path,
+            "WEBP",
+            quality=config.get("webp_quality", 80),
+            lossless=config.get("webp_lossless", False),
+            method=6,
+            alpha_quality=100,
+        )
+    elif output_format == "gif":
+        img.quantize(
+            config.get("gif_colors", 128), dither=Image.Dither.FLOYDSTEINBERG
+        ).save(output_path, "GIF", optimize=True)
+    elif output_format == "avif":
+        img.save(output_path, "AVIF", quality=config.get("avif_quality", 50), speed=0)
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def encode_all(
+    input_path: str,
+    outputs: Sequence[Tuple[str, int, str]],
+    config: Dict[str, Any],
+) -> List[str]:
+    """
+    Decode input_path once and write every (format, width, path) output.
+    :return: Paths written, in order
+    """
+    img = decode(input_path)
+    resized: Dict[int, Image.Image] = {}
+    written = []
+    for output_format, width, output_path in outputs:
+        if width not in resized:
+            resized[width] = shrink(img, width)
+        save(resized[width], output_path, output_format, config)
+        written.append(output_path)
+    return written
+
+
+def resize_chain(img: Image.Image, widths: Sequence[int]) -> List[Tuple[int, Image.Image]]:
+    """
+    [(width, image)] largest first, each step resized from the previous one
+    (cheaper than resizing every width from the full-size decode). Widths at
+    or above the source width collapse into one full-size variant; nothing is
+    upscaled.
+    """
+    steps: List[Tuple[int, Image.Image]] = []
+    current = img
+    for width in sorted(set(widths), reverse=True):
+        if width >= img.width:
+            if not steps:
+                steps.append((img.width, img))
+            continue
+        current = shrink(current, width)
+        steps.append((width, current))
+    return steps
+
+
+def encode_variants(
+    input_path: str,
+    formats: Sequence[str],
+    widths: Sequence[int],
+    output_path_for: Callable[[str, int], str],
+    config: Dict[str, Any],
+    threads: int = 4,
+    write: Optional[Callable] = None,
+) -> Tuple[Tuple[int, int], List[Dict[str, Any]]]:
+    """
+    Decode once, resize down the width chain, encode every format x width.
+    Encodes run on a thread pool (Pillow's encoders release the GIL). Each job
+    saves its own copy of the resized image: Image.save keeps the format's
+    options on the image (encoderinfo), so concurrent saves of one shared
+    image would pick up each other's quality settings.
+    :param output_path_for: (format, width) → output path
+    :param write: write(save_fn, path) → final path or None (e.g. an atomic
+        temp+rename wrapper); default saves straight to path
+    :return: ((source width, height), [{"format", "width", "height", "path", "bytes"}])
+    """
+    img = decode(input_path)
+    jobs = [
+        (fmt, width, resized)
+        for width, resized in resize_chain(img, widths)
+        for fmt in formats
+    ]
+
+    def encode(job):
+        fmt, width, resized = job
+        path = output_path_for(fmt, width)
+
+        own = resized.copy()
+
+        def save_to(target):
+            save(own, target, fmt, config)
+            return True
+
+        final = write(save_to, path) if write else (save_to(path) and path)
+        if not final:
+            raise OSError(f"Failed to write {path}")
+        return {
+            "format": fmt,
+            "width": resized.width,
+            "height": resized.height,
+            "path": final,
+            "bytes": os.path.getsize(final),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(jobs)))) as pool:
+        files = list(pool.map(encode, jobs))
+    return img.size, files
+
+
+def compress(input_path: str, output_path: str, output_format: str, config: Dict[str, Any]) -> bool:
+    """Drop-in for ImageCompressor.compress_*: one output at config target_width."""
+    try:
+        encode_all(input_path, [(output_format, config["target_width"], output_path)], config)
+        return True
+    except (OSError, ValueError) as e:
+        print(f"Error compressing {os.path.basename(input_path)} with Pillow: {e}")
+        return False
@@ -0,0 +1,315 @@
+"""
+Shared ffprobe metadata cache for the ffmeg tools.
+
+One packet pass per file gives everything the scripts ask about:
+dimensions, duration, bitrates and per-second byte histograms for every
+stream. The parsed record (not the raw packet dump) is cached in
+.probe_cache.json next to the file, keyed by path, size and mtime, so
+repeated calls on an unchanged file don't run ffprobe at all. Set
+FFMEG_PROBE_CACHE_DIR (or CACHE_DIR, or pass cache_dir) to keep one cache in
+another directory, e.g. for read-only media folders. The cache is
+best-effort: if it can't be written, the record is still returned.
+
+The packet dump is never buffered: a header probe (format + streams, no
+packet reads) gives the duration, each stream gets a fixed array of
+per-second byte totals, and ffprobe's stdout is folded into those arrays
+line by line, so memory stays constant however long the file is.
+
+Usage:
+    python probe.py clip.mp4 other.webm      # print a summary of each file
+    python probe.py /mnt/ro/*.mp4 --cache-dir ~/.cache/ffmeg
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+CACHE_NAME = ".probe_cache.json"
+CACHE_DIR: Optional[str] = os.environ.get("FFMEG_PROBE_CACHE_DIR") or None
+RECORD_VERSION = 2
+_cache_lock = threading.Lock()
+_unwritable: set = set()
+
+
+def _cache_path(path: str, cache_dir: Optional[str] = None) -> str:
+    directory = cache_dir or CACHE_DIR or os.path.dirname(os.path.abspath(path))
+    return os.path.join(os.path.expanduser(directory), CACHE_NAME)
+
+
+def _cache_key(path: str) -> str:
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def _load_cache(cache_path: str) -> Dict:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_record(cache_path: str, key: str, record: Dict) -> None:
+    """Best-effort: an unwritable cache only costs a re-probe next time."""
+    with _cache_lock:
+        cache = _load_cache(cache_path)
+        # Drop records of older versions of the same file
+        prefix = key.split("|", 1)[0] + "|"
+        cache = {k: v for k, v in cache.items() if not k.startswith(prefix)}
+        cache[key] = record
+        tmp = f"{cache_path}.{os.getpid()}.part"  # Other processes may share the cache
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp, cache_path)
+        except OSError as e:
+            if cache_path not in _unwritable:
+                _unwritable.add(cache_path)
+                print(f"Warning: can't write probe cache {cache_path} ({e}); not caching")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _number(value, cast=float):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_header(path: str) -> Dict:
+    """Format and streams only (container headers, no packet reads)."""
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_format",
+            "-show_streams",
+            "-of",
+            "json",
+            str(path),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def _parse_packet_line(line: str) -> Optional[Tuple[int, float, int]]:
+    """`stream_index=0|pts_time=1.23|dts_time=1.20|size=456` → (index, time, size)."""
+    fields = dict(part.partition("=")[::2] for part in line.strip().split("|"))
+    index = _number(fields.get("stream_index"), int)
+    size = _number(fields.get("size"), int)
+    t = _number(fields.get("pts_time"))
+    if t is None:
+        t = _number(fields.get("dts_time"))
+    if index is None or size is None or t is None or t < 0:
+        return None
+    return index, t, size
+
+
+def iter_packets(path: str) -> Iterator[Tuple[int, float, int]]:
+    """(stream index, seconds, bytes) per packet, read from ffprobe as it runs."""
+    with tempfile.TemporaryFile() as stderr:
+        cmd = [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "packet=stream_index,pts_time,dts_time,size",
+            "-of",
+            "compact=p=0",
+            str(path),
+        ]
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=stderr,  # A file, so a chatty stderr can't block the stdout pipe
+            stdin=subprocess.DEVNULL,
+            text=True,
+            bufsize=1 << 16,
+        )
+        try:
+            for line in proc.stdout:
+                packet = _parse_packet_line(line)
+                if packet:
+                    yield packet
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()  # Consumer stopped early
+            returncode = proc.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(
+                returncode, cmd, stderr=stderr.read().decode(errors="replace")
+            )
+
+
+def accumulate(
+    packets: Iterable[Tuple[int, float, int]], stream_indexes: Iterable[int], length: int
+) -> Tuple[Dict[int, array], Dict[int, int]]:
+    """
+    Fold packets into fixed per-second byte arrays (constant memory).
+    :param packets: (stream index, seconds, bytes)
+    :param stream_indexes: Streams to keep (others are ignored)
+    :param length: Seconds per array; later packets count towards the last second
+    :return: ({index: array of bytes per second}, {index: total bytes})
+    """
+    length = max(1, length)
+    histograms = {index: array("Q", bytes(8 * length)) for index in stream_indexes}
+    totals = dict.fromkeys(histograms, 0)
+    last = length - 1
+    for index, t, size in packets:
+        histogram = histograms.get(index)
+        if histogram is None:
+            continue
+        histogram[min(int(t), last)] += size
+        totals[index] += size
+    return histograms, totals
+
+
+def parse_probe(header: Dict, histograms: Dict[int, array], totals: Dict[int, int]) -> Dict:
+    """Header + packet histograms → a cacheable record."""
+    fmt = header.get("format", {})
+    duration = _number(fmt.get("duration")) or 0.0
+    streams = []
+    for stream in header.get("streams", []):
+        index = stream.get("index")
+        bit_rate = _number(stream.get("bit_rate"), int)
+        if bit_rate is None and duration and totals.get(index):
+            bit_rate = int(totals[index] * 8 / duration)  # e.g. WebM has no stream bit_rate
+        streams.append(
+            {
+                "index": index,
+                "codec_type": stream.get("codec_type"),
+                "codec_name": stream.get("codec_name"),
+                "width": stream.get("width"),
+                "height": stream.get("height"),
+                "avg_frame_rate": stream.get("avg_frame_rate"),
+                "bit_rate": bit_rate,
+                "bytes_per_second": list(histograms.get(index, ())),
+            }
+        )
+    return {
+        "version": RECORD_VERSION,
+        "duration": duration,
+        "size": _number(fmt.get("size"), int),
+        "bit_rate": _number(fmt.get("bit_rate"), int),
+        "format_name": fmt.get("format_name"),
+        "streams": streams,
+    }
+
+
+def run_ffprobe(path: str) -> Dict:
+    """Header probe plus one streamed packet pass → record."""
+    header = probe_header(path)
+    duration = _number(header.get("format", {}).get("duration")) or 0.0
+    indexes = [s["index"] for s in header.get("streams", []) if "index" in s]
+    histograms, totals = accumulate(iter_packets(path), indexes, int(duration) + 1)
+    return parse_probe(header, histograms, totals)
+
+
+def probe(path, refresh: bool = False, cache_dir: Optional[str] = None) -> Dict:
+    """
+    Cached probe record for a file (runs ffprobe only on a cache miss).
+    :param path: Media file
+    :param refresh: Ignore the cache and probe again
+    :param cache_dir: Directory of the cache file (default CACHE_DIR, else next to the file)
+    :return: {"duration", "size", "bit_rate", "format_name", "streams": [...]}
+    """
+    path = str(path)
+    cache_path = _cache_path(path, cache_dir)
+    key = _cache_key(path)
+    if not refresh:
+        record = _load_cache(cache_path).get(key)
+        if record and record.get("version") == RECORD_VERSION:
+            return record
+    record = run_ffprobe(path)
+    _save_record(cache_path, key, record)
+    return record
+
+
+def probe_many(
+    paths: Iterable, max_workers: Optional[int] = None, cache_dir: Optional[str] = None
+) -> Dict[str, Dict]:
+    """Probe several files concurrently; {path: record} (failures are skipped)."""
+    paths = [str(p) for p in paths]
+
+    def safe_probe(path):
+        try:
+            return probe(path, cache_dir=cache_dir)
+        except (OSError, subprocess.CalledProcessError, json.JSONDecodeError) as e:
+            print(f"Error probing {path}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as pool:
+        records = pool.map(safe_probe, paths)
+    return {path: record for path, record in zip(paths, records) if record}
+
+
+def stream(record: Dict, codec_type: str = "video") -> Optional[Dict]:
+    """First stream of a type (like -select_streams v:0)."""
+    for s in record["streams"]:
+        if s["codec_type"] == codec_type:
+            return s
+    return None
+
+
+def dimensions(path) -> Tuple[int, int]:
+    """(width, height) of the first video stream."""
+    video = stream(probe(path))
+    if not video or not video.get("width"):
+        raise KeyError("no video stream")
+    return int(video["width"]), int(video["height"])
+
+
+def duration(path) -> float:
+    """Container duration in seconds."""
+    return probe(path)["duration"]
+
+
+def bitrate(path, codec_type: str = "video") -> Optional[int]:
+    """Bits per second of the first stream of a type."""
+    s = stream(probe(path), codec_type)
+    return s["bit_rate"] if s else None
+
+
+def bytes_per_second(path, codec_type: str = "video") -> List[int]:
+    """Bytes of each whole second (index = second) of the first stream of a type."""
+    s = stream(probe(path), codec_type)
+    return s["bytes_per_second"] if s else []
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Probe media files (cached)")
+    ap.add_argument("inputs", nargs="+")
+    ap.add_argument("--refresh", action="store_true", help="Ignore .probe_cache.json")
+    ap.add_argument("--cache-dir", default=None, help="Keep the cache here, not next to the files")
+    args = ap.parse_args()
+
+    if args.refresh:
+        records = {p: probe(p, refresh=True, cache_dir=args.cache_dir) for p in args.inputs}
+    else:
+        records = probe_many(args.inputs, cache_dir=args.cache_dir)
+    for path, record in records.items():
+        print(f"{path}: {record['duration']:.2f}s, {record['format_name']}")
+        for s in record["streams"]:
+            size = f" {s['width']}x{s['height']}" if s.get("width") else ""
+            rate = f" {s['bit_rate'] / 1_000_000:.2f} Mbps" if s.get("bit_rate") else ""
+            print(f"  #{s['index']} {s['codec_type']} {s['codec_name']}{size}{rate}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Tests for the in-process Pillow encoder (pillow_backend.py)."""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import pillow_backend
+
+CONFIG = {
+    "max_colors": None,
+    "preserve_transparency": True,
+    "background_color": "white",
+    "png_compression_level": 6,
+    "jpeg_quality": 40,
+    "webp_quality": 90,
+    "webp_lossless": False,
+    "gif_colors": 64,
+}
+
+
+def write_source(path: Path, size=(960, 640)):
+    """Gradient plus noise, so each format's quality setting changes its bytes."""
+    w, h = size
+    x, y = np.meshgrid(np.linspace(0, 1, w), np.linspace(0, 1, h))
+    channels = [np.sin(6 * x + 4 * y + p) * 100 + 128 for p in (0.0, 2.0, 4.0)]
+    noise = np.random.default_rng(0).normal(0, 12, (h, w, 3))
+    pixels = np.clip(np.stack(channels, axis=-1) + noise, 0, 255).astype(np.uint8)
+    Image.fromarray(pixels, "RGB").save(path, quality=95)
+    return path
+
+
+def encode(source: Path, out_dir: Path, threads: int):
+    out_dir.mkdir()
+    _, files = pillow_backend.encode_variants(
+        str(source),
+        ["jpg", "webp", "png", "gif"],
+        [800, 400, 200],
+        lambda fmt, width: str(out_dir / f"out-{width}.{fmt}"),
+        CONFIG,
+        threads=threads,
+    )
+    return {Path(f["path"]).name: Path(f["path"]).read_bytes() for f in files}
+
+
+class TestEncodeVariants:
+    """Threaded variant encoding matches one-at-a-time encoding."""
+
+    @pytest.mark.parametrize("attempt", range(3))
+    def test_threaded_output_matches_sequential(self, tmp_path, attempt):
+        source = write_source(tmp_path / "source.jpg")
+        sequential = encode(source, tmp_path / "sequential", threads=1)
+        threaded = encode(source, tmp_path / "threaded", threads=12)
+
+        assert len(sequential) == 12
+        assert threaded.keys() == sequential.keys()
+        for name, data in sequential.items():
+            assert threaded[name] == data, name
+
+    def test_widths_collapse_and_never_upscale(self, tmp_path):
+        source = write_source(tmp_path / "source.jpg", size=(300, 200))
+        size, files = pillow_backend.encode_variants(
+            str(source),
+            ["jpg"],
+            [1200, 600, 150],
+            lambda fmt, width: str(tmp_path / f"out-{width}.{fmt}"),
+            CONFIG,
+        )
+        assert size == (300, 200)
+        assert [(f["width"], f["height"]) for f in files] == [(300, 200), (150, 100)]
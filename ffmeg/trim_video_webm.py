@@ -12,39 +12,33 @@ import subprocess
 import tempfile
 import json
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 
+from chunked_encode import chunked_encode
+from crf_search import find_crf
+from probe import dimensions
 
-def get_video_dimensions(input_path: str) -> Tuple[int, int]:
-    """Get video width and height using ffprobe."""
-    cmd = [
-        "ffprobe",
-        "-v",
-        "quiet",
-        "-print_format",
-        "json",
-        "-show_streams",
-        "-select_streams",
-        "v:0",
-        str(input_path),
-    ]
 
+def get_video_dimensions(input_path: str) -> Tuple[int, int]:
+    """Get video width and height (cached ffprobe record, see probe.py)."""
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
-        stream = data["streams"][0]
-        width = int(stream["width"])
-        height = int(stream["height"])
-        return width, height
+        return dimensions(input_path)
     except (
         subprocess.CalledProcessError,
         KeyError,
-        IndexError,
         json.JSONDecodeError,
     ) as e:
         raise RuntimeError(f"Failed to get video dimensions: {e}")
 
 
+def _seconds(timestamp: str) -> float:
+    """HH:MM:SS.xx (or plain seconds) → seconds."""
+    total = 0.0
+    for part in timestamp.split(":"):
+        total = total * 60 + float(part)
+    return total
+
+
 def optimize_to_webm(
     input_path: str,
     output_path: str,
@@ -58,10 +52,15 @@ def optimize_to_webm(
     remove_duplicates: bool = True,
     smart_remove_duplicates: bool = True,
     # quality
-    crf: Optional[int] = 28,  # if set ⇒ single‑pass CRF max 51 min 0
+    crf: Optional[Union[int, str]] = 28,  # if set ⇒ single‑pass CRF max 51 min 0; "auto" ⇒ search
+    quality_metric: str = "auto",  # crf="auto": vmaf (if available) | ssim | psnr
+    quality_target: Optional[float] = None,  # crf="auto": min score (None = metric default)
     target_bitrate: str = "400k",  # used only if crf is None
     preset: str = "best",  #  good|realtime|best…
     threads: int = 0,  # 0 = auto
+    # parallelism
+    segment_seconds: Optional[float] = None,  # if set ⇒ encode ~N s segments in parallel
+    segment_jobs: Optional[int] = None,  # concurrent segments (None = CPU cores)
 ):
     input_path, output_path = Path(input_path), Path(output_path)
     if not input_path.exists():
@@ -124,6 +123,34 @@ def optimize_to_webm(
     else:
         vf_param = []
 
+    # ► Target quality: highest CRF whose sampled encodes meet the target
+    if crf == "auto":
+        crf = find_crf(
+            input_path,
+            lambda c: [*codec_base, "-b:v", "0", "-crf", str(c)],
+            vf=vf_filter,
+            metric=quality_metric,
+            target=quality_target,
+            start=_seconds(start_time),
+            duration=_seconds(duration) if duration else None,
+        )
+
+    # ► Chunked: same settings per segment, joined with the concat demuxer
+    if segment_seconds:
+        rate = ["-b:v", "0", "-crf", str(crf)] if crf is not None else ["-b:v", target_bitrate]
+        stats = chunked_encode(
+            input_path,
+            output_path,
+            segment_seconds=segment_seconds,
+            jobs=segment_jobs,
+            codec_args=[*vf_param, *codec_base, *rate],
+            two_pass=crf is None,
+            start=_seconds(start_time),
+            duration=_seconds(duration) if duration else None,
+        )
+        print(f"Encoded {stats['segments']} segments in {stats['seconds']}s")
+        return
+
     # ► Single‑pass CRF -------------------------------------------------
     if crf is not None:
         cmd = [
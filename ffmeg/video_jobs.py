@@ -0,0 +1,297 @@
+"""
+Concurrent ffmpeg job runner with a persistent, resumable queue.
+
+A job is one source video: an ordered list of ffmpeg steps (e.g. VP9 pass 1,
+pass 2, poster) plus temp files to remove afterwards. Up to K jobs run at
+once; K defaults to cpu_count // threads_per_job, so each encode gets its own
+share of cores instead of one slow encode leaving most of them idle.
+
+- Queue state lives in a JSON file (written atomically after every change).
+  Jobs that were "running" when a batch was interrupted go back to
+  "pending" on the next run; finished jobs are skipped.
+- A retried job (same spec) skips its leading steps that already finished
+  and whose declared products still exist, e.g. a VP9 first pass whose
+  stats file survived a failed second pass.
+- Each job's ffmpeg stderr goes to <log_dir>/<job id>.log.
+- Progress comes from `-progress pipe:1` (key=value blocks on stdout).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+QUEUE_VERSION = 1
+
+
+def default_max_jobs(threads_per_job: int) -> int:
+    """Concurrent encodes that fit the machine: cores // threads per encode."""
+    return max(1, (os.cpu_count() or 1) // max(1, threads_per_job))
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Container duration in seconds (None if ffprobe can't tell)."""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return float(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def parse_progress(lines: Iterable[str]) -> Iterable[Dict[str, str]]:
+    """Group `-progress` output into one dict per report.
+
+    ffmpeg prints key=value lines and ends each report with
+    progress=continue (or progress=end for the last one).
+    """
+    block: Dict[str, str] = {}
+    for line in lines:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value
+        if key == "progress":
+            yield block
+            block = {}
+
+
+def progress_seconds(block: Dict[str, str]) -> Optional[float]:
+    """Output timestamp of a progress report, in seconds."""
+    # out_time_ms is (despite its name) microseconds, like out_time_us
+    for key in ("out_time_us", "out_time_ms"):
+        value = block.get(key, "")
+        if value.lstrip("-").isdigit():
+            return max(0, int(value)) / 1_000_000
+    return None
+
+
+class JobQueue:
+    """Persistent job list: {id: job dict} in a JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.jobs: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == QUEUE_VERSION:
+                    self.jobs = data["jobs"]
+            except (OSError, json.JSONDecodeError, KeyError):
+                print(f"Ignoring unreadable job queue {path}")
+        for job in self.jobs.values():
+            if job["status"] == "running":
+                job["status"] = "pending"  # Interrupted last time
+
+    def save(self):
+        tmp = f"{self.path}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": QUEUE_VERSION, "jobs": self.jobs}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def add(
+        self,
+        job_id: str,
+        steps: List[Dict],
+        source: Optional[str] = None,
+        outputs: Iterable[str] = (),
+        cleanup: Iterable[str] = (),
+    ) -> Dict:
+        """Queue a job; an identical finished job is kept as done.
+
+        Args:
+            job_id: Unique name (also the log file name)
+            steps: [{"label": str, "cmd": [ffmpeg argv], "produces": [paths]}]
+                run in order; "produces" (optional) marks a step as reusable
+                by a retry of the same job while those files exist
+            source: Input video (for progress: its duration)
+            outputs: Files the job produces (a done job whose outputs are
+                missing runs again)
+            cleanup: Temp files removed after the job succeeds (kept after a
+                failure so a retry can reuse them)
+        """
+        spec = {
+            "steps": steps,
+            "source": source,
+            "outputs": list(outputs),
+            "cleanup": list(cleanup),
+        }
+        with self.lock:
+            old = self.jobs.get(job_id)
+            same = old and all(old.get(k) == v for k, v in spec.items())
+            if (
+                same
+                and old["status"] == "done"
+                and all(os.path.exists(p) for p in spec["outputs"])
+            ):
+                return old
+            job = {
+                **spec,
+                "status": "pending",
+                "attempts": 0,
+                "completed": 0,
+                "error": None,
+                "seconds": None,
+            }
+            if old:
+                job["attempts"] = old.get("attempts", 0)
+            if same and old["status"] != "done":
+                job["completed"] = old.get("completed", 0)
+            self.jobs[job_id] = job
+            return job
+
+    def pending(self) -> List[str]:
+        return [job_id for job_id, job in self.jobs.items() if job["status"] != "done"]
+
+    def update(self, job_id: str, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+            self.save()
+
+
+def _with_progress(cmd: List[str]) -> List[str]:
+    """Insert -progress pipe:1 right after the ffmpeg executable.
+
+    Other steps (e.g. a Python helper) run as-is and report no progress.
+    """
+    if os.path.basename(cmd[0]) != "ffmpeg":
+        return cmd
+    return [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+
+
+def resume_index(job: Dict) -> int:
+    """Leading steps a retry can skip: finished last time, products still on disk."""
+    index = 0
+    while index < job.get("completed", 0):
+        produces = job["steps"][index].get("produces")
+        if not produces or not all(os.path.exists(p) for p in produces):
+            break
+        index += 1
+    return index
+
+
+def run_job(queue: JobQueue, job_id: str, log_dir: str, report) -> bool:
+    """Run one job's steps in order; returns True on success."""
+    job = queue.jobs[job_id]
+    first = resume_index(job)
+    queue.update(
+        job_id, status="running", attempts=job["attempts"] + 1, completed=first, error=None
+    )
+    duration = probe_duration(job["source"]) if job.get("source") else None
+    log_path = os.path.join(log_dir, f"{job_id}.log")
+    started = time.perf_counter()
+    ok = True
+
+    with open(log_path, "a", encoding="utf-8") as log:
+        for index, step in enumerate(job["steps"]):
+            if index < first:
+                log.write(f"\n=== {step['label']}: reused from the previous attempt\n")
+                print(f"[{step['label']}] {job_id} (reused)")
+                continue
+            log.write(f"\n=== {step['label']}: {' '.join(step['cmd'])}\n")
+            log.flush()
+            proc = subprocess.Popen(
+                _with_progress(step["cmd"]),
+                stdout=subprocess.PIPE,
+                stderr=log,
+                stdin=subprocess.DEVNULL,
+                text=True,
+            )
+            for block in parse_progress(proc.stdout):
+                seconds = progress_seconds(block)
+                if duration and seconds is not None:
+                    done = (index + min(1.0, seconds / duration)) / len(job["steps"])
+                    report(job_id, step["label"], done, block.get("speed", "").strip())
+            if proc.wait() != 0:
+                ok = False
+                queue.update(
+                    job_id,
+                    status="failed",
+                    error=f"{step['label']} exited with {proc.returncode} (see {log_path})",
+                )
+                break
+            queue.update(job_id, completed=index + 1)
+            print(f"[{step['label']}] {job_id}")
+
+    if ok:
+        for path in job["cleanup"]:
+            if os.path.exists(path):
+                os.remove(path)
+        queue.update(job_id, status="done", seconds=round(time.perf_counter() - started, 2))
+    return ok
+
+
+def run_queue(
+    queue: JobQueue,
+    max_jobs: int,
+    log_dir: str,
+    job_ids: Optional[Iterable[str]] = None,
+) -> Dict[str, int]:
+    """Run unfinished jobs with up to max_jobs concurrent ffmpeg processes.
+
+    Args:
+        queue: Job queue (saved after every status change)
+        max_jobs: Concurrent jobs
+        log_dir: Per-job ffmpeg logs
+        job_ids: Limit to these jobs (None = every job in the queue)
+
+    Returns:
+        {"done": n, "failed": n, "skipped": n}
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    queue.save()
+    selected = list(queue.jobs) if job_ids is None else list(job_ids)
+    pending = set(queue.pending())
+    todo = [job_id for job_id in selected if job_id in pending]
+    skipped = len(selected) - len(todo)
+    if skipped:
+        print(f"Skipping {skipped} finished job(s) from {queue.path}")
+    if not todo:
+        return {"done": 0, "failed": 0, "skipped": skipped}
+
+    print(f"Running {len(todo)} job(s), {max_jobs} at a time (logs: {log_dir})")
+    print_lock = threading.Lock()
+    last_report: Dict[str, float] = {}
+
+    def report(job_id: str, label: str, fraction: float, speed: str):
+        now = time.monotonic()
+        if now - last_report.get(job_id, 0) < 2 and fraction < 1:
+            return  # Throttle: one line per job every 2 s
+        last_report[job_id] = now
+        with print_lock:
+            sys.stdout.write(f"  {job_id}: {label} {fraction * 100:5.1f}% {speed}\n")
+            sys.stdout.flush()
+
+    counts = {"done": 0, "failed": 0, "skipped": skipped}
+    with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+        futures = {pool.submit(run_job, queue, job_id, log_dir, report): job_id for job_id in todo}
+        for fut in as_completed(futures):
+            job_id = futures[fut]
+            try:
+                ok = fut.result()
+            except OSError as e:  # e.g. ffmpeg not installed
+                queue.update(job_id, status="failed", error=str(e))
+                ok = False
+            counts["done" if ok else "failed"] += 1
+            if not ok:
+                print(f"Error processing {job_id}: {queue.jobs[job_id]['error']}")
+    return counts
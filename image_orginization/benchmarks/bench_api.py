@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OpenAI-facing stages against the local stub server.
+
+Runs classify_batches (via call_openai_with_retry) and call_openai_for_naming
+over a grid of settings and reports, per setting:
+- throughput (images/s)
+- per-call latency p50 / p95 / p99 (client side, including retries)
+- retry amplification (server requests / successful logical calls)
+- failed batches (out of retries; counted, not fatal to the setting)
+
+No API key or network needed; everything runs against benchmarks/openai_stub.py.
+
+Usage:
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --latency const:0.2 lognormal:0.8,0.5 \\
+        --rate-limit 0 0.1 0.3 --concurrency 1 4 --batch-size 6 12
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.openai_stub import StubConfig, StubServer
+
+# Point the SDK at the stub before any photo_organizer module builds a client
+server = StubServer(StubConfig())
+os.environ["OPENAI_BASE_URL"] = server.base_url
+os.environ["OPENAI_API_KEY"] = "stub"
+
+from PIL import Image
+
+from photo_organizer.models import Item
+from photo_organizer.ai_classification import openai_classifier, seo_namer
+from photo_organizer.ai_classification.batch_planner import BatchPlanner
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def make_thumbs(work_dir: Path, count: int, size: int) -> List[Item]:
+    """Write small solid-colour JPEG thumbnails and wrap them as Items."""
+    items = []
+    for i in range(count):
+        thumb = work_dir / f"thumb_{i:04d}.jpg"
+        Image.new("RGB", (size, size * 3 // 4), (i * 37 % 256, 90, 140)).save(
+            thumb, "JPEG", quality=70
+        )
+        items.append(
+            Item(id=f"IMG_{i:04d}.jpg", path=thumb, thumb=thumb, dt=None, gps=None, h=None)
+        )
+    return items
+
+
+def run_classify(items: List[Item], batch_size: int, concurrency: int, model: str) -> Dict:
+    """
+    classify_batches over `concurrency` shards in parallel (shared planner).
+
+    Each shard is fed one batch_size chunk at a time, so a chunk that runs out
+    of retries is counted as failed and the shard carries on with the next one.
+    """
+    planner = BatchPlanner(batch_size, model=model)
+    shards = [items[i::concurrency] for i in range(concurrency)]
+    failed: List[int] = []
+
+    def run_shard(shard: List[Item]) -> int:
+        classified = 0
+        for i in range(0, len(shard), batch_size):
+            chunk = shard[i : i + batch_size]
+            try:
+                classified += len(
+                    openai_classifier.classify_batches(
+                        chunk, batch_size=batch_size, model=model, planner=planner
+                    )
+                )
+            except Exception:
+                failed.append(len(chunk))
+        return classified
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        images = sum(pool.map(run_shard, shards))
+    wall = time.perf_counter() - started
+
+    ok_rows = [r for r in planner.report if r["status"] == "ok"]
+    return {
+        "images": images,
+        "logical_calls": len(ok_rows),
+        "failed_batches": len(failed),
+        "failed_images": sum(failed),
+        # Failed batches stay in: their time spent retrying is the tail
+        "latencies": [r["latency_s"] for r in planner.report],
+        "wall_s": wall,
+    }
+
+
+def run_naming(collage: Path, images: int, batch_size: int, concurrency: int, model: str) -> Dict:
+    """
+    call_openai_for_naming for ceil(images / batch_size) collages in parallel.
+
+    The namer falls back to placeholder names when it runs out of retries;
+    such calls count as failed (latency kept, no images named).
+    """
+    calls = math.ceil(images / batch_size)
+    latencies: List[float] = []
+    failed: List[int] = []
+    placeholders = {i: f"concrete-photo-{i}" for i in range(batch_size)}
+
+    def one_call(_):
+        started = time.perf_counter()
+        try:
+            names = seo_namer.call_openai_for_naming(collage, batch_size, model=model)
+        except Exception:
+            names = placeholders
+        latencies.append(time.perf_counter() - started)
+        if names == placeholders:
+            failed.append(batch_size)
+            return 0
+        return len(names)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        named = sum(pool.map(one_call, range(calls)))
+    wall = time.perf_counter() - started
+
+    return {
+        "images": named,
+        "logical_calls": calls - len(failed),
+        "failed_batches": len(failed),
+        "failed_images": sum(failed),
+        "latencies": latencies,
+        "wall_s": wall,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark API stages against the local stub")
+    ap.add_argument("--stages", nargs="+", default=["classify", "naming"], choices=["classify", "naming"])
+    ap.add_argument("--images", type=int, default=48, help="Images per setting")
+    ap.add_argument("--thumb-size", type=int, default=512, help="Thumbnail long side (px)")
+    ap.add_argument("--latency", nargs="+", default=["const:0.1", "lognormal:0.3,0.6"])
+    ap.add_argument("--rate-limit", nargs="+", type=float, default=[0.0, 0.2])
+    ap.add_argument("--concurrency", nargs="+", type=int, default=[1, 4])
+    ap.add_argument("--batch-size", nargs="+", type=int, default=[6, 12])
+    ap.add_argument("--tpm", type=int, default=0, help="Stub tokens-per-minute limit (0 = off)")
+    ap.add_argument("--retry-delay", type=float, default=0.2, help="Overrides RETRY_DELAY")
+    ap.add_argument("--max-retries", type=int, default=None, help="Overrides MAX_RETRIES")
+    ap.add_argument("--batch-delay", type=float, default=0.0, help="Overrides API_RATE_LIMIT_DELAY")
+    ap.add_argument("--sdk-retries", type=int, default=0, help="OpenAI SDK max_retries (SDK default is 2)")
+    ap.add_argument("--model", default="gpt-4o")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", type=Path, default=Path(__file__).parent / "results" / "bench_api.json")
+    ap.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = ap.parse_args()
+
+    # Tune retry/backoff knobs (read at call time)
+    for module in (openai_classifier, seo_namer):
+        module.RETRY_DELAY = args.retry_delay
+        module.API_RATE_LIMIT_DELAY = args.batch_delay
+        if args.max_retries is not None:
+            module.MAX_RETRIES = args.max_retries
+
+    # Same SDK retry policy for both stages so amplification is comparable
+    from openai import OpenAI
+
+    def make_client():
+        return OpenAI(max_retries=args.sdk_retries)
+
+    openai_classifier.OpenAI = make_client
+    seo_namer.client = make_client()
+
+    server.start()
+    print(f"🧪 Stub server on {server.base_url}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        items = make_thumbs(tmp_dir, args.images, args.thumb_size)
+        collage = tmp_dir / "collage.jpg"
+        Image.new("RGB", (2048, 2048), (120, 120, 120)).save(collage, "JPEG", quality=70)
+
+        grid = itertools.product(
+            args.stages, args.latency, args.rate_limit, args.concurrency, args.batch_size
+        )
+        for stage, latency, rate_limit, concurrency, batch_size in grid:
+            server.reset(StubConfig(latency, rate_limit, args.tpm, args.seed))
+            sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            error = None
+            with sink:
+                try:
+                    if stage == "classify":
+                        result = run_classify(items, batch_size, concurrency, args.model)
+                    else:
+                        result = run_naming(collage, args.images, batch_size, concurrency, args.model)
+                except Exception as e:
+                    error = str(e)
+                    result = {
+                        "images": 0,
+                        "logical_calls": 0,
+                        "failed_batches": 0,
+                        "failed_images": 0,
+                        "latencies": [],
+                        "wall_s": 0.0,
+                    }
+
+            stats = server.stats.as_dict()
+            lat = result["latencies"]
+            rows.append(
+                {
+                    "stage": stage,
+                    "latency": latency,
+                    "rate_limit": rate_limit,
+                    "concurrency": concurrency,
+                    "batch_size": batch_size,
+                    "images": result["images"],
+                    "failed_batches": result["failed_batches"],
+                    "failed_images": result["failed_images"],
+                    "wall_s": round(result["wall_s"], 3),
+                    "throughput_ips": round(result["images"] / result["wall_s"], 2) if result["wall_s"] else 0.0,
+                    "p50_s": round(percentile(lat, 50), 3),
+                    "p95_s": round(percentile(lat, 95), 3),
+                    "p99_s": round(percentile(lat, 99), 3),
+                    "server_requests": stats["requests"],
+                    "rate_limited": stats["rate_limited"],
+                    "prompt_tokens": stats["prompt_tokens"],
+                    "retry_amplification": (
+                        round(stats["requests"] / result["logical_calls"], 2)
+                        if result["logical_calls"]
+                        else None
+                    ),
+                    "error": error,
+                }
+            )
+            r = rows[-1]
+            print(
+                f"{stage:8s} lat={latency:18s} 429={rate_limit:<4} conc={concurrency:<2} "
+                f"batch={batch_size:<3} → {r['throughput_ips']:7.2f} img/s  "
+                f"p50={r['p50_s']:.2f}s p95={r['p95_s']:.2f}s p99={r['p99_s']:.2f}s  "
+                f"amp={r['retry_amplification']}"
+                + (f"  failed={r['failed_batches']}" if r["failed_batches"] else "")
+                + (f"  ❌ {error}" if error else "")
+            )
+
+    server.stop()
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": {k: str(v) for k, v in vars(args).items()}, "results": rows}, f, indent=2)
+    print(f"📝 Results → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
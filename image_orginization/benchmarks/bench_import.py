@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Track CLI startup cost with `python -X importtime`.
+
+Measures, over several fresh interpreters:
+- cumulative import time of photo_organizer.cli (median, microseconds → ms)
+- wall time of `python -m photo_organizer.cli --help`
+- which heavy third-party packages (PIL, numpy, scipy, imagehash, openai, ...)
+  get imported just by importing the CLI (should be none: stages import them
+  lazily)
+
+Each run is appended to benchmarks/results/bench_import.jsonl and compared
+with the previous one.
+
+Usage:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --runs 10 --budget-ms 150
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+project_root = Path(__file__).parent.parent
+
+MODULE = "photo_organizer.cli"
+HEAVY = ("PIL", "numpy", "scipy", "imagehash", "openai", "dotenv", "tqdm", "rapidfuzz", "slugify", "pillow_heif")
+RESULTS = Path(__file__).parent / "results" / "bench_import.jsonl"
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """-X importtime output → [(module, self_us, cumulative_us)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:") :].split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cum_us)))
+        except ValueError:
+            continue  # Header line
+    return rows
+
+
+def import_once() -> List[Tuple[str, int, int]]:
+    """Import the CLI in a fresh interpreter and return importtime rows."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(out.stderr)
+
+
+def help_once() -> float:
+    """Wall seconds for `python -m photo_organizer.cli --help`."""
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", MODULE, "--help"],
+        cwd=project_root,
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - started
+
+
+def measure(runs: int) -> Dict:
+    cumulative, help_s = [], []
+    rows: List[Tuple[str, int, int]] = []
+    for _ in range(runs):
+        rows = import_once()
+        cumulative.append(next(c for name, _, c in rows if name == MODULE))
+        help_s.append(help_once())
+
+    top_level = {name.split(".")[0] for name, _, _ in rows}
+    slowest = sorted(rows, key=lambda r: -r[1])[:10]
+    return {
+        "import_ms": round(statistics.median(cumulative) / 1000, 1),
+        "help_ms": round(statistics.median(help_s) * 1000, 1),
+        "heavy_loaded": sorted(m for m in HEAVY if m in top_level),
+        "slowest_self_ms": {name: round(self_us / 1000, 2) for name, self_us, _ in slowest},
+    }
+
+
+def load_previous(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    last = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                last = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+    return last
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Track photo_organizer.cli import time")
+    ap.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    ap.add_argument("--budget-ms", type=float, default=0, help="Exit 1 if import time exceeds this (0 = off)")
+    ap.add_argument("--out", type=Path, default=RESULTS)
+    args = ap.parse_args()
+
+    result = measure(args.runs)
+    print(f"⏱️  import {MODULE}: {result['import_ms']} ms (median of {args.runs})")
+    print(f"⏱️  {MODULE} --help: {result['help_ms']} ms wall")
+    print("   slowest modules (self):")
+    for name, ms in result["slowest_self_ms"].items():
+        print(f"     {ms:7.2f} ms  {name}")
+    if result["heavy_loaded"]:
+        print(f"⚠️  Heavy packages imported eagerly: {', '.join(result['heavy_loaded'])}")
+
+    previous = load_previous(args.out)
+    if previous:
+        for key in ("import_ms", "help_ms"):
+            old = previous.get(key)
+            if old:
+                change = (result[key] - old) / old * 100
+                print(f"📈 {key}: {old} → {result[key]} ({change:+.1f}%)")
+
+    record = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        **result,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"📝 Results appended → {args.out}")
+
+    if args.budget_ms and result["import_ms"] > args.budget_ms:
+        print(f"❌ Import time {result['import_ms']} ms exceeds budget {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
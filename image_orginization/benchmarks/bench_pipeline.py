@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+End-to-end scale benchmark on synthetic libraries (see synth_corpus.py).
+
+For each library size, times these stages separately:
+    ingest            thumbnails + EXIF + pHash
+    cluster_gps       cluster_gps_only on photos with GPS
+    fused_cluster     fused_cluster on non-GPS photos + GPS singletons
+    cluster_temporal  cluster_temporal on photos with a timestamp
+    organize          placement of the final clusters (fallback labels, no API)
+
+Each run is appended to benchmarks/results/bench_pipeline.jsonl and compared
+with the previous run, so regressions show up as a % change per stage.
+Clustering stages also report purity against the corpus ground truth (share
+of photos whose cluster's majority site is their own site).
+
+Corpora are cached under benchmarks/corpora/ and reused while the spec matches.
+When exiftool isn't installed, ingest finds no metadata; the clustering stages
+then use the ground-truth timestamps/GPS from corpus.json (reported as
+"metadata": "corpus").
+
+Usage:
+    python -m benchmarks.bench_pipeline                      # 1k + 10k
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 100000
+    python -m benchmarks.bench_pipeline --stages cluster_gps fused_cluster
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+from benchmarks.synth_corpus import CorpusSpec, generate_corpus
+
+from photo_organizer.config import (
+    DEFAULT_BRAND,
+    DEFAULT_FUSE_THRESHOLD,
+    DEFAULT_HASH_THRESHOLD,
+    DEFAULT_MAX_EDGES,
+    DEFAULT_SITE_DISTANCE_FEET,
+    DEFAULT_TIME_GAP_MINUTES,
+)
+from photo_organizer.clustering import cluster_gps_only, cluster_temporal, fused_cluster
+from photo_organizer.ingestion import ingest
+from photo_organizer.models import Item
+from photo_organizer.organization import organize
+from photo_organizer.utils.filename import name_features
+from photo_organizer.utils.profiling import peak_rss_mb
+
+STAGES = ("ingest", "cluster_gps", "fused_cluster", "cluster_temporal", "organize")
+RESULTS = Path(__file__).parent / "results" / "bench_pipeline.jsonl"
+
+
+def purity(groups: List[List[Item]], truth: Dict[str, int]) -> Optional[float]:
+    """Share of items whose cluster's majority site matches their own site."""
+    total = sum(len(g) for g in groups)
+    if not total:
+        return None
+    majority = sum(Counter(truth[it.id] for it in g).most_common(1)[0][1] for g in groups)
+    return round(majority / total, 4)
+
+
+def fill_metadata(items: List[Item], shots: Dict[str, Dict]) -> str:
+    """Use ground-truth dt/GPS when ingest recovered none (no exiftool)."""
+    if any(it.dt or it.gps for it in items):
+        return "exif"
+    for it in items:
+        shot = shots[it.id]
+        it.dt = datetime.fromisoformat(shot["dt"]) if shot["dt"] else None
+        it.gps = tuple(shot["gps"]) if shot["gps"] else None
+    return "corpus"
+
+
+def fallback_labels(groups: List[List[Item]]) -> Dict[str, Dict]:
+    """One cluster-N label per group, as the CLI does without classification."""
+    labels = {}
+    for n, group in enumerate(groups, 1):
+        for it in group:
+            labels[it.id] = {"label": f"cluster-{n}", "confidence": 0.0, "descriptor": ""}
+    return labels
+
+
+def run_size(size: int, args) -> Dict:
+    """Generate (or reuse) one corpus and time every selected stage on it."""
+    spec = CorpusSpec(count=size, seed=args.seed)
+    corpus_dir = args.corpora / f"corpus_{size}_{args.seed}"
+    started = time.perf_counter()
+    corpus = generate_corpus(corpus_dir, spec)
+    print(f"\n🧪 {size} images ({time.perf_counter() - started:.1f}s to prepare corpus)")
+
+    shots = {s["name"]: s for s in corpus["shots"]}
+    truth = {name: s["site"] for name, s in shots.items()}
+    run_dir = corpus_dir / "run"
+    shutil.rmtree(run_dir, ignore_errors=True)
+    work_dir = run_dir / "_work"
+
+    rows = []
+
+    def timed_stage(stage: str, fn, n_in: int):
+        sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        started = time.perf_counter()
+        with sink:
+            result = fn()
+        seconds = time.perf_counter() - started
+        if stage in args.stages:
+            rows.append(
+                {
+                    "size": size,
+                    "stage": stage,
+                    "items": n_in,
+                    "seconds": round(seconds, 4),
+                    "items_per_s": round(n_in / seconds, 1) if seconds else None,
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+            )
+            print(f"  {stage:<17} {seconds:9.3f}s  ({n_in} items)")
+        return result
+
+    # Ingest always runs: later stages need thumbnails and pHashes
+    items = timed_stage(
+        "ingest", lambda: ingest(Path(corpus["images_dir"]), work_dir), len(shots)
+    )
+    metadata = fill_metadata(items, shots)
+    name_map = {it.id: name_features(it.path) for it in items}
+    with_gps = [it for it in items if it.gps]
+    with_dt = [it for it in items if it.dt]
+
+    gps_groups, gps_singletons = timed_stage(
+        "cluster_gps",
+        lambda: cluster_gps_only(with_gps, max_meters=DEFAULT_SITE_DISTANCE_FEET * 0.3048),
+        len(with_gps),
+    )
+    if "cluster_gps" in args.stages:
+        rows[-1]["clusters"] = len(gps_groups)
+        rows[-1]["purity"] = purity(gps_groups, truth)
+
+    items_for_fused = [it for it in items if not it.gps] + gps_singletons
+    th_groups = []
+    if "fused_cluster" in args.stages or "organize" in args.stages:
+        th_groups = timed_stage(
+            "fused_cluster",
+            lambda: fused_cluster(
+                items_for_fused,
+                name_map,
+                fuse_threshold=DEFAULT_FUSE_THRESHOLD,
+                max_edges_per_node=DEFAULT_MAX_EDGES,
+            ),
+            len(items_for_fused),
+        )
+        if "fused_cluster" in args.stages:
+            rows[-1]["clusters"] = len(th_groups)
+            rows[-1]["purity"] = purity(th_groups, truth)
+
+    if "cluster_temporal" in args.stages:
+        temporal = timed_stage(
+            "cluster_temporal",
+            lambda: cluster_temporal(with_dt, DEFAULT_TIME_GAP_MINUTES, DEFAULT_HASH_THRESHOLD),
+            len(with_dt),
+        )
+        rows[-1]["clusters"] = len(temporal)
+        rows[-1]["purity"] = purity(temporal, truth)
+
+    if "organize" in args.stages:
+        groups = gps_groups + th_groups
+        labels = fallback_labels(groups)
+        timed_stage(
+            "organize",
+            lambda: organize(
+                groups,
+                labels,
+                run_dir / "organized_photos",
+                DEFAULT_BRAND,
+                True,
+                placement=args.placement,
+            ),
+            sum(len(g) for g in groups),
+        )
+        rows[-1]["placement"] = args.placement
+
+    for row in rows:
+        row["metadata"] = metadata
+    if not args.keep_output:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return {"size": size, "sites": len(set(truth.values())), "rows": rows}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_previous(path: Path) -> Optional[Dict]:
+    """Last run recorded in the results file (None if there isn't one)."""
+    if not path.exists():
+        return None
+    last = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                last = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn line from an interrupted run
+    return last
+
+
+def compare(current: List[Dict], previous: Optional[Dict], threshold: float) -> List[str]:
+    """Print % change per (size, stage) vs the previous run; return regressions."""
+    if not previous:
+        print("\n(no previous run to compare against)")
+        return []
+    before = {(r["size"], r["stage"]): r["seconds"] for r in previous.get("rows", [])}
+    regressions = []
+    print(f"\n📈 Change vs previous run ({previous.get('commit') or previous.get('created')}):")
+    for row in current:
+        old = before.get((row["size"], row["stage"]))
+        if not old:
+            continue
+        change = (row["seconds"] - old) / old * 100
+        flag = ""
+        if change > threshold:
+            flag = "  ⚠️  regression"
+            regressions.append(f"{row['stage']}@{row['size']}")
+        print(
+            f"  {row['stage']:<17} n={row['size']:<7} {old:9.3f}s → {row['seconds']:9.3f}s "
+            f"({change:+6.1f}%){flag}"
+        )
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic libraries")
+    ap.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    ap.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    ap.add_argument(
+        "--placement",
+        choices=["copy", "hardlink", "reflink", "symlink", "move"],
+        default="copy",
+        help="Placement mode for the organize stage",
+    )
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--corpora", type=Path, default=Path(__file__).parent / "corpora")
+    ap.add_argument("--out", type=Path, default=RESULTS)
+    ap.add_argument(
+        "--regression-threshold",
+        type=float,
+        default=20.0,
+        help="Flag stages that got slower by more than this %% vs the previous run",
+    )
+    ap.add_argument("--fail-on-regression", action="store_true", help="Exit 1 on a flagged regression")
+    ap.add_argument("--keep-output", action="store_true", help="Keep thumbnails and organized output")
+    ap.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = ap.parse_args()
+
+    previous = load_previous(args.out)
+    runs = [run_size(size, args) for size in args.sizes]
+    rows = [row for run in runs for row in run["rows"]]
+
+    record = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "sites": {run["size"]: run["sites"] for run in runs},
+        "rows": rows,
+    }
+    regressions = compare(rows, previous, args.regression_threshold)
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"📝 Results appended → {args.out}")
+
+    if regressions and args.fail_on_regression:
+        print(f"❌ Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stub server for chat completions.
+
+Speaks enough of /v1/chat/completions for the photo_organizer API stages:
+- JSON-schema responses for batch classification and uncertain matching
+- Plain-text numbered filenames for SEO naming
+- Configurable latency distribution, 429 injection and a tokens-per-minute limit
+- Token accounting (text chars/4 + vision tile rules) reported in `usage`
+
+Usage:
+    python -m benchmarks.openai_stub --port 8765 --latency lognormal:0.8,0.5 --rate-limit 0.1
+
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    export OPENAI_API_KEY=stub
+
+GET /stats returns counters; POST /reset clears them.
+"""
+
+import argparse
+import base64
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from photo_organizer.ai_classification.batch_planner import estimate_image_tokens
+
+COUNT_RE = re.compile(r"all (\d+) images")
+
+
+def parse_latency(spec: str):
+    """Parse a latency spec into a sampler returning seconds.
+
+    Formats:
+        const:S            fixed S seconds
+        uniform:A,B        uniform between A and B
+        lognormal:M,SIGMA  lognormal with median M and shape SIGMA
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "const":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        import math
+
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+@dataclass
+class StubConfig:
+    """Behaviour knobs for the stub server."""
+
+    latency: str = "const:0.05"
+    rate_limit: float = 0.0  # Probability of injecting a 429
+    tokens_per_minute: int = 0  # 0 = unlimited
+    seed: Optional[int] = None
+
+
+@dataclass
+class StubStats:
+    """Counters exposed at GET /stats."""
+
+    requests: int = 0
+    ok: int = 0
+    rate_limited: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "rate_limited": self.rate_limited,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "mean_latency_s": (
+                sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+            ),
+        }
+
+
+def count_prompt_tokens(messages: List[Dict]) -> Tuple[int, List[str]]:
+    """Estimate prompt tokens and collect image ids from the messages."""
+    from PIL import Image
+
+    tokens = 0
+    ids: List[str] = []
+    for message in messages:
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        for part in parts:
+            if part.get("type") == "text":
+                text = part.get("text", "")
+                tokens += max(1, len(text) // 4)
+                if text.startswith("id="):
+                    ids.append(text[3:].strip())
+            elif part.get("type") == "image_url":
+                image_url = part.get("image_url", {})
+                url = image_url.get("url", "")
+                detail = image_url.get("detail", "high")
+                try:
+                    raw = base64.b64decode(url.split(",", 1)[1])
+                    with Image.open(io.BytesIO(raw)) as im:
+                        width, height = im.size
+                except Exception:
+                    width, height = 512, 512
+                tokens += estimate_image_tokens(width, height, detail)
+    return tokens, ids
+
+
+def build_content(body: Dict, ids: List[str], rng: random.Random) -> str:
+    """Build a plausible response body for the request type."""
+    from photo_organizer.config import LABELS
+
+    response_format = body.get("response_format") or {}
+    schema_name = (response_format.get("json_schema") or {}).get("name")
+
+    if schema_name == "batch_classify_cluster":
+        rows = [
+            {
+                "id": image_id,
+                "label": rng.choice(LABELS),
+                "confidence": round(rng.uniform(0.6, 0.99), 2),
+                "descriptor": "broom-finish",
+            }
+            for image_id in ids
+        ]
+        return json.dumps({"images": rows})
+
+    if schema_name == "uncertain_match":
+        return json.dumps({"cluster_id": -1, "confidence": 0.3, "reason": "stub"})
+
+    # SEO naming: numbered plain-text lines
+    text = json.dumps(body.get("messages", []))
+    match = COUNT_RE.search(text)
+    count = int(match.group(1)) if match else 1
+    return "\n".join(f"{i} — stub-concrete-photo-{i}" for i in range(count))
+
+
+class StubServer:
+    """Threaded HTTP server wrapping the stub handler."""
+
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.stats = StubStats()
+        self.lock = threading.Lock()
+        self.rng = random.Random(config.seed)
+        self.sample_latency = parse_latency(config.latency)
+        self.token_window: deque = deque()  # (timestamp, tokens)
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self, config: Optional[StubConfig] = None):
+        with self.lock:
+            if config is not None:
+                self.config = config
+                self.rng = random.Random(config.seed)
+                self.sample_latency = parse_latency(config.latency)
+            self.stats = StubStats()
+            self.token_window.clear()
+
+    def _over_tpm(self, tokens: int) -> bool:
+        """Sliding one-minute token window; True if this request would exceed it."""
+        if not self.config.tokens_per_minute:
+            return False
+        now = time.monotonic()
+        while self.token_window and now - self.token_window[0][0] > 60:
+            self.token_window.popleft()
+        used = sum(t for _, t in self.token_window)
+        if used + tokens > self.config.tokens_per_minute:
+            return True
+        self.token_window.append((now, tokens))
+        return False
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):  # noqa: A002 - silence access log
+                pass
+
+            def _send(self, status: int, payload: Dict, headers: Dict = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/stats"):
+                    with server.lock:
+                        self._send(200, server.stats.as_dict())
+                else:
+                    self._send(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+
+                if self.path.rstrip("/").endswith("/reset"):
+                    server.reset()
+                    self._send(200, {"ok": True})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+
+                body = json.loads(raw or b"{}")
+                prompt_tokens, ids = count_prompt_tokens(body.get("messages", []))
+
+                with server.lock:
+                    server.stats.requests += 1
+                    delay = server.sample_latency(server.rng)
+                    limited = (
+                        server.rng.random() < server.config.rate_limit
+                        or server._over_tpm(prompt_tokens)
+                    )
+                    if limited:
+                        server.stats.rate_limited += 1
+                    rng = random.Random(server.rng.random())
+
+                if limited:
+                    time.sleep(min(delay, 0.05))
+                    self._send(
+                        429,
+                        {
+                            "error": {
+                                "message": "Rate limit reached for requests (stub)",
+                                "type": "requests",
+                                "code": "rate_limit_exceeded",
+                            }
+                        },
+                        headers={"retry-after-ms": "100"},
+                    )
+                    return
+
+                time.sleep(delay)
+                content = build_content(body, ids, rng)
+                completion_tokens = max(1, len(content) // 4)
+                with server.lock:
+                    server.stats.ok += 1
+                    server.stats.prompt_tokens += prompt_tokens
+                    server.stats.completion_tokens += completion_tokens
+                    server.stats.latencies.append(delay)
+
+                self._send(
+                    200,
+                    {
+                        "id": f"chatcmpl-stub-{server.stats.requests}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": completion_tokens,
+                            "total_tokens": prompt_tokens + completion_tokens,
+                        },
+                    },
+                )
+
+        return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", default="lognormal:0.8,0.5", help="Latency spec")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="429 probability")
+    ap.add_argument("--tpm", type=int, default=0, help="Tokens per minute (0 = unlimited)")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    server = StubServer(
+        StubConfig(args.latency, args.rate_limit, args.tpm, args.seed),
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Stub OpenAI server on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic photo library for scale benchmarks.
+
+The library mimics a contractor's camera roll:
+- shooting "sites" (one job each) with a distinctive look, so pHash groups them
+- burst sequences per site: consecutive numbers, seconds apart
+- EXIF DateTimeOriginal and GPS (with per-shot jitter) on a configurable share
+- filename schemes: IMG_#### (phone), DSC_#### (DSLR), no prefix (exports)
+- exact duplicates ("IMG_0001 (1).JPG") and near duplicates (re-saved edits)
+
+Ground truth (site, burst, dt, gps, duplicate_of) goes to corpus.json next to
+the images, so benchmarks can score clustering and fill in metadata when
+exiftool isn't installed.
+
+Usage:
+    python -m benchmarks.synth_corpus --count 1000 --out /tmp/corpus_1k
+"""
+
+import argparse
+import json
+import math
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageEnhance
+from PIL.TiffImagePlugin import IFDRational
+
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+TAG_DATETIME_ORIGINAL = 0x9003
+
+SCHEMES = ("IMG", "DSC", "none")
+ORIGIN = (47.2529, -122.4443)  # Tacoma; sites spread ~40 km around it
+START = datetime(2023, 3, 1, 8, 0, 0)
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Knobs for one synthetic library (same spec + seed → same files)."""
+
+    count: int = 1000
+    burst_min: int = 1
+    burst_max: int = 12
+    bursts_per_site: int = 3
+    dt_fraction: float = 0.8  # Share of photos with DateTimeOriginal
+    gps_fraction: float = 0.6  # Share of photos with GPS
+    gps_jitter_m: float = 15.0  # Per-shot GPS noise around the site
+    exact_dup_fraction: float = 0.02
+    near_dup_fraction: float = 0.03
+    size_px: int = 160  # Long side of generated images
+    seed: int = 7
+
+
+@dataclass
+class Shot:
+    """Ground truth for one generated file."""
+
+    name: str
+    site: int
+    burst: int
+    dt: Optional[str]
+    gps: Optional[Tuple[float, float]]
+    duplicate_of: Optional[str] = None
+    duplicate_kind: Optional[str] = None
+
+
+def _rational(value: float) -> Tuple[IFDRational, ...]:
+    """Decimal degrees → EXIF (deg, min, sec) rationals."""
+    value = abs(value)
+    deg = int(value)
+    minutes = int((value - deg) * 60)
+    seconds = round(((value - deg) * 60 - minutes) * 60 * 10000)
+    return (IFDRational(deg, 1), IFDRational(minutes, 1), IFDRational(seconds, 10000))
+
+
+def build_exif(dt: Optional[datetime], gps: Optional[Tuple[float, float]]) -> Image.Exif:
+    """EXIF block with DateTimeOriginal and GPS (either may be None)."""
+    exif = Image.Exif()
+    if dt is not None:
+        stamp = dt.strftime("%Y:%m:%d %H:%M:%S")
+        exif[0x0132] = stamp  # DateTime
+        exif.get_ifd(EXIF_IFD)[TAG_DATETIME_ORIGINAL] = stamp
+    if gps is not None:
+        lat, lon = gps
+        gps_ifd = exif.get_ifd(GPS_IFD)
+        gps_ifd[1] = "N" if lat >= 0 else "S"
+        gps_ifd[2] = _rational(lat)
+        gps_ifd[3] = "E" if lon >= 0 else "W"
+        gps_ifd[4] = _rational(lon)
+    return exif
+
+
+def site_pattern(site: int, seed: int, size_px: int) -> np.ndarray:
+    """Low-frequency colour layout unique to a site (drives its pHash)."""
+    rng = np.random.default_rng(seed * 100_003 + site)
+    grid = rng.integers(0, 256, size=(6, 8, 3), dtype=np.uint8)
+    img = Image.fromarray(grid, "RGB").resize(
+        (size_px, size_px * 3 // 4), Image.Resampling.BILINEAR
+    )
+    return np.asarray(img, dtype=np.int16)
+
+
+def _render(task: Dict) -> None:
+    """Write one JPEG (runs in a worker process)."""
+    base = site_pattern(task["site"], task["seed"], task["size_px"])
+    rng = np.random.default_rng(task["shot_seed"])
+    # Small framing shift + sensor noise: same scene, slightly different shot
+    shifted = np.roll(base, int(rng.integers(-3, 4)), axis=1)
+    noisy = np.clip(shifted + rng.normal(0, 6, shifted.shape), 0, 255).astype(np.uint8)
+    img = Image.fromarray(noisy, "RGB")
+
+    dt = datetime.fromisoformat(task["dt"]) if task["dt"] else None
+    gps = tuple(task["gps"]) if task["gps"] else None
+    img.save(task["path"], "JPEG", quality=80, exif=build_exif(dt, gps))
+
+    near = task.get("near_path")
+    if near:
+        # Re-saved edit: slight brightness change, lower quality, same metadata
+        edited = ImageEnhance.Brightness(img).enhance(1.04)
+        edited.save(near, "JPEG", quality=65, exif=build_exif(dt, gps))
+
+
+def _jitter(rng: random.Random, center: Tuple[float, float], meters: float) -> Tuple[float, float]:
+    lat, lon = center
+    dlat = rng.gauss(0, meters) / 111_320
+    dlon = rng.gauss(0, meters) / (111_320 * math.cos(math.radians(lat)))
+    return (round(lat + dlat, 6), round(lon + dlon, 6))
+
+
+def plan_corpus(spec: CorpusSpec) -> Tuple[List[Shot], List[Dict]]:
+    """Decide every file's name, site and metadata without touching disk.
+
+    Returns:
+        (ground truth shots, render tasks without output paths)
+    """
+    rng = random.Random(spec.seed)
+    counters = {"IMG": 1, "DSC": 1, "none": 1}
+    shots: List[Shot] = []
+    tasks: List[Dict] = []
+
+    n_dups = int(spec.count * (spec.exact_dup_fraction + spec.near_dup_fraction))
+    originals = spec.count - n_dups
+    now = START
+    site = burst = 0
+
+    while len(shots) < originals:
+        site += 1
+        center = (
+            ORIGIN[0] + rng.uniform(-0.35, 0.35),
+            ORIGIN[1] + rng.uniform(-0.35, 0.35),
+        )
+        site_has_gps = rng.random() < spec.gps_fraction
+        site_has_dt = rng.random() < spec.dt_fraction
+
+        for _ in range(spec.bursts_per_site):
+            burst += 1
+            scheme = rng.choice(SCHEMES)
+            size = rng.randint(spec.burst_min, spec.burst_max)
+            now += timedelta(minutes=rng.randint(20, 600))
+            for _ in range(size):
+                if len(shots) >= originals:
+                    break
+                now += timedelta(seconds=rng.randint(1, 20))
+                if scheme == "none":
+                    name = f"{now:%Y%m%d_%H%M%S}_{counters[scheme]:05d}.jpg"
+                else:
+                    name = f"{scheme}_{counters[scheme]:04d}.JPG"
+                counters[scheme] += 1
+
+                dt = now.isoformat() if site_has_dt else None
+                gps = _jitter(rng, center, spec.gps_jitter_m) if site_has_gps else None
+                shots.append(Shot(name, site, burst, dt, gps))
+                tasks.append(
+                    {
+                        "name": name,
+                        "site": site,
+                        "seed": spec.seed,
+                        "size_px": spec.size_px,
+                        "shot_seed": spec.seed * 1_000_003 + len(shots),
+                        "dt": dt,
+                        "gps": gps,
+                    }
+                )
+
+    # Duplicates of random originals
+    exact_n = int(spec.count * spec.exact_dup_fraction)
+    picks = rng.sample(range(len(shots)), min(n_dups, len(shots)))
+    for i, idx in enumerate(picks):
+        orig = shots[idx]
+        stem, ext = orig.name.rsplit(".", 1)
+        kind = "exact" if i < exact_n else "near"
+        name = f"{stem} (1).{ext}" if kind == "exact" else f"{stem}_edit.{ext}"
+        shots.append(Shot(name, orig.site, orig.burst, orig.dt, orig.gps, orig.name, kind))
+        if kind == "near":
+            tasks[idx]["near_name"] = name
+    return shots, tasks
+
+
+def generate_corpus(
+    out_dir: Path, spec: CorpusSpec, max_workers: Optional[int] = None
+) -> Dict:
+    """Write the images and corpus.json (reuses an existing identical corpus).
+
+    Args:
+        out_dir: Library folder to create
+        spec: Corpus settings
+        max_workers: Render processes (None = CPU count)
+
+    Returns:
+        The corpus.json contents
+    """
+    manifest = out_dir / "corpus.json"
+    if manifest.exists():
+        with open(manifest, encoding="utf-8") as f:
+            existing = json.load(f)
+        if existing.get("spec") == asdict(spec):
+            return existing
+        shutil.rmtree(out_dir)
+
+    images_dir = out_dir / "images"
+    images_dir.mkdir(parents=True, exist_ok=True)
+    shots, tasks = plan_corpus(spec)
+    for t in tasks:
+        t["path"] = str(images_dir / t["name"])
+        if "near_name" in t:
+            t["near_path"] = str(images_dir / t["near_name"])
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(_render, tasks, chunksize=64))
+    for s in shots:
+        if s.duplicate_kind == "exact":
+            shutil.copyfile(images_dir / s.duplicate_of, images_dir / s.name)
+
+    data = {
+        "spec": asdict(spec),
+        "images_dir": str(images_dir),
+        "generated_s": round(time.perf_counter() - started, 2),
+        "shots": [asdict(s) for s in shots],
+    }
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return data
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a synthetic photo library")
+    ap.add_argument("--count", type=int, default=1000)
+    ap.add_argument("--out", type=Path, required=True)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--dt-fraction", type=float, default=CorpusSpec.dt_fraction)
+    ap.add_argument("--gps-fraction", type=float, default=CorpusSpec.gps_fraction)
+    ap.add_argument("--gps-jitter-m", type=float, default=CorpusSpec.gps_jitter_m)
+    ap.add_argument("--burst-max", type=int, default=CorpusSpec.burst_max)
+    ap.add_argument("--exact-dups", type=float, default=CorpusSpec.exact_dup_fraction)
+    ap.add_argument("--near-dups", type=float, default=CorpusSpec.near_dup_fraction)
+    ap.add_argument("--size-px", type=int, default=CorpusSpec.size_px)
+    args = ap.parse_args()
+
+    spec = CorpusSpec(
+        count=args.count,
+        burst_max=args.burst_max,
+        dt_fraction=args.dt_fraction,
+        gps_fraction=args.gps_fraction,
+        gps_jitter_m=args.gps_jitter_m,
+        exact_dup_fraction=args.exact_dups,
+        near_dup_fraction=args.near_dups,
+        size_px=args.size_px,
+        seed=args.seed,
+    )
+    data = generate_corpus(args.out, spec)
+    sites = len({s["site"] for s in data["shots"]})
+    print(
+        f"🧪 {len(data['shots'])} images from {sites} sites → {data['images_dir']} "
+        f"({data['generated_s']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
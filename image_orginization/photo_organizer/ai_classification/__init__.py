@@ -1,19 +1,33 @@
-"""Photo classification using AI models."""
-
-from .openai_classifier import (
-    classify_batches,
-    classify_cluster_examples,
-    classify_singleton,
-    match_uncertain_items_with_collage,
-    separate_confident_uncertain_clusters,
-    apply_matches_to_groups,
-)
-
-__all__ = [
-    "classify_batches",
-    "classify_cluster_examples",
-    "classify_singleton",
-    "match_uncertain_items_with_collage",
-    "separate_confident_uncertain_clusters",
-    "apply_matches_to_groups",
-]
+"""Photo classification using AI models.
+
+Submodules load on first attribute access (PEP 562); the OpenAI SDK itself is
+only imported when a client is first needed.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "classify_batches": "openai_classifier",
+    "classify_cluster_examples": "openai_classifier",
+    "classify_singleton": "openai_classifier",
+    "match_uncertain_items_with_collage": "openai_classifier",
+    "separate_confident_uncertain_clusters": "openai_classifier",
+    "apply_matches_to_groups": "openai_classifier",
+    "BatchPlanner": "batch_planner",
+    "estimate_image_tokens": "batch_planner",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
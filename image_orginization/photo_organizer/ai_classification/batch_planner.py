@@ -0,0 +1,225 @@
+"""Token- and cost-aware batch planning for classification requests.
+
+Estimates vision tokens per image from thumbnail dimensions (OpenAI tile rules),
+packs examples up to a target prompt-token budget, shrinks batches after rate
+limits or timeouts, and records per-batch token, latency and cost figures.
+"""
+
+import json
+import math
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from ..config import (
+    MAX_IMAGES_PER_BATCH,
+    MODEL_PRICING,
+    OUTPUT_TOKENS_PER_IMAGE,
+    PROMPT_OVERHEAD_TOKENS,
+)
+from ..models import Item
+
+# Vision token accounting (gpt-4o / gpt-4.1 family)
+BASE_IMAGE_TOKENS = 85
+TOKENS_PER_TILE = 170
+TILE_PX = 512
+MAX_SIDE_PX = 2048
+SHORT_SIDE_PX = 768
+TEXT_TOKENS_PER_IMAGE = 6  # "id=<filename>" text part
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """Estimate prompt tokens for one image using OpenAI's tile rules.
+
+    Args:
+        width, height: Image dimensions in pixels
+        detail: "low" (flat 85 tokens) or "high"/"auto" (tiled)
+
+    Returns:
+        Estimated token count
+    """
+    if detail == "low" or width <= 0 or height <= 0:
+        return BASE_IMAGE_TOKENS
+
+    # 1) Fit within 2048x2048
+    scale = min(1.0, MAX_SIDE_PX / max(width, height))
+    w, h = width * scale, height * scale
+
+    # 2) Scale so the shortest side is at most 768px
+    scale = min(1.0, SHORT_SIDE_PX / min(w, h))
+    w, h = w * scale, h * scale
+
+    tiles = math.ceil(w / TILE_PX) * math.ceil(h / TILE_PX)
+    return BASE_IMAGE_TOKENS + TOKENS_PER_TILE * tiles
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int
+) -> Optional[float]:
+    """Estimate USD cost of a request, or None if the model has no known pricing."""
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return None
+    input_price, output_price = pricing
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class BatchPlanner:
+    """Packs items into batches and adapts batch size to API pressure.
+
+    Two modes:
+        - token_budget > 0: pack images until the estimated prompt tokens reach
+          the budget (capped at max_images)
+        - token_budget == 0: fixed image count (batch_size), same as before
+
+    Both modes halve the current limit after a rate limit or timeout and grow it
+    back towards the target after a run of successful batches.
+    """
+
+    GROW_AFTER_SUCCESSES = 3
+    GROW_FACTOR = 1.25
+
+    def __init__(
+        self,
+        batch_size: int,
+        token_budget: int = 0,
+        model: str = "",
+        max_images: int = MAX_IMAGES_PER_BATCH,
+        detail: str = "high",
+    ):
+        self.model = model
+        self.detail = detail
+        self.token_budget = token_budget
+        self.target_images = max(1, max_images if token_budget > 0 else batch_size)
+        self.max_images = self.target_images
+        self.max_tokens = token_budget if token_budget > 0 else None
+        self.report: List[Dict] = []
+        self._successes = 0
+        self._token_cache: Dict[Path, int] = {}
+        self._lock = threading.Lock()
+
+    def image_tokens(self, item: Item) -> int:
+        """Estimated prompt tokens for one item's thumbnail (cached per path)."""
+        thumb = Path(item.thumb)
+        if thumb not in self._token_cache:
+            try:
+                with Image.open(thumb) as im:
+                    width, height = im.size
+            except Exception:
+                width, height = TILE_PX, TILE_PX
+            self._token_cache[thumb] = (
+                estimate_image_tokens(width, height, self.detail)
+                + TEXT_TOKENS_PER_IMAGE
+            )
+        return self._token_cache[thumb]
+
+    def next_batch(self, queue: Deque[Item]) -> Tuple[List[Item], int]:
+        """Pop the next batch from the queue under the current limits.
+
+        Returns:
+            Tuple of (batch items, estimated prompt tokens)
+        """
+        batch: List[Item] = []
+        tokens = PROMPT_OVERHEAD_TOKENS
+        with self._lock:
+            max_images, max_tokens = self.max_images, self.max_tokens
+        while queue and len(batch) < max_images:
+            cost = self.image_tokens(queue[0])
+            if batch and max_tokens is not None and tokens + cost > max_tokens:
+                break
+            batch.append(queue.popleft())
+            tokens += cost
+        return batch, tokens
+
+    def plan(self, items: List[Item]) -> List[List[Item]]:
+        """Split items into batches under the current limits (no adaptation)."""
+        queue = deque(items)
+        batches = []
+        while queue:
+            batches.append(self.next_batch(queue)[0])
+        return batches
+
+    def record_pressure(self, error: Exception = None):
+        """Shrink limits after a rate limit or timeout."""
+        with self._lock:
+            self._successes = 0
+            if self.max_tokens is not None:
+                floor = PROMPT_OVERHEAD_TOKENS + BASE_IMAGE_TOKENS
+                self.max_tokens = max(floor, self.max_tokens // 2)
+            self.max_images = max(1, self.max_images // 2)
+            print(
+                f"📉 Shrinking batches to ≤{self.max_images} images"
+                + (f" / ≤{self.max_tokens} tokens" if self.max_tokens else "")
+            )
+
+    def record_success(self):
+        """Grow limits back towards the target after consecutive successes."""
+        with self._lock:
+            self._successes += 1
+            if self._successes < self.GROW_AFTER_SUCCESSES:
+                return
+            self._successes = 0
+            self.max_images = min(
+                self.target_images, math.ceil(self.max_images * self.GROW_FACTOR)
+            )
+            if self.max_tokens is not None:
+                self.max_tokens = min(
+                    self.token_budget, math.ceil(self.max_tokens * self.GROW_FACTOR)
+                )
+
+    def record_batch(
+        self,
+        images: int,
+        estimated_tokens: int,
+        latency_s: float,
+        usage=None,
+        retries: int = 0,
+        status: str = "ok",
+    ):
+        """Append one batch row to the run report."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if prompt_tokens is None:
+            prompt_tokens = estimated_tokens
+            completion_tokens = OUTPUT_TOKENS_PER_IMAGE * images
+        with self._lock:
+            self.report.append(
+                {
+                    "batch": len(self.report) + 1,
+                    "images": images,
+                    "estimated_tokens": estimated_tokens,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "latency_s": round(latency_s, 3),
+                    "retries": retries,
+                    "cost_usd": estimate_cost(
+                        self.model, prompt_tokens, completion_tokens or 0
+                    ),
+                    "status": status,
+                }
+            )
+
+    def summary(self) -> Dict:
+        """Totals over all recorded batches."""
+        ok = [r for r in self.report if r["status"] == "ok"]
+        costs = [r["cost_usd"] for r in ok if r["cost_usd"] is not None]
+        return {
+            "model": self.model,
+            "token_budget": self.token_budget,
+            "batches": len(ok),
+            "failed_batches": len(self.report) - len(ok),
+            "images": sum(r["images"] for r in ok),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in ok),
+            "completion_tokens": sum(r["completion_tokens"] or 0 for r in ok),
+            "retries": sum(r["retries"] for r in self.report),
+            "latency_s": round(sum(r["latency_s"] for r in self.report), 3),
+            "cost_usd": round(sum(costs), 6) if costs else None,
+        }
+
+    def write_report(self, path: Path):
+        """Write summary + per-batch rows as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "batches": self.report}, f, indent=2)
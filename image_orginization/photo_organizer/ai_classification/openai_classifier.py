@@ -3,8 +3,9 @@
 import json
 import tempfile
 import time
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 
 from ..models import Item
 from ..config import (
@@ -16,31 +17,43 @@ from ..config import (
     RETRY_DELAY,
 )
 from ..utils.loading_spinner import Spinner
+from ..utils.profiling import PROFILER, timed
 
 from .utils import (
     parse_json_response,
     create_image_message,
+    load_openai,
 )
 from .schemas import get_classification_schema
+from .batch_planner import BatchPlanner
 from .messages import (
     build_classification_messages,
 )
 
-# Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    project_root = Path(__file__).parent.parent.parent
-    load_dotenv(project_root / ".env", override=True)
-except ImportError:  # pragma: no cover
-    pass  # python-dotenv not installed, continue without it
-
-# Optional import of OpenAI client only if classify is requested
-try:
-    from openai import OpenAI, RateLimitError  # type: ignore
-except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
-    RateLimitError = None  # type: ignore
+# OpenAI SDK is imported on first use (see _load_openai); tests patch OpenAI
+_UNLOADED = object()
+OpenAI = _UNLOADED  # type: ignore
+RateLimitError = None  # type: ignore
+
+
+def _load_openai():
+    """Resolve the OpenAI client class (None if the SDK isn't installed)."""
+    global OpenAI, RateLimitError
+    if OpenAI is _UNLOADED:
+        OpenAI, RateLimitError = load_openai()
+    return OpenAI
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """True for rate limit (429) and timeout errors."""
+    if RateLimitError and isinstance(e, RateLimitError):
+        return True
+    text = str(e).lower()
+    return (
+        "rate_limit" in text
+        or "timed out" in text
+        or "timeout" in type(e).__name__.lower()
+    )
 
 
 def call_openai_with_retry(
@@ -48,18 +61,20 @@ def call_openai_with_retry(
     model: str,
     messages: List[Dict],
     schema: Dict,
-    max_retries: int = MAX_RETRIES,
-    retry_delay: float = RETRY_DELAY,
+    max_retries: Optional[int] = None,
+    retry_delay: Optional[float] = None,
+    on_retry: Optional[Callable[[Exception], None]] = None,
 ) -> Dict:
-    """Call OpenAI API with automatic retry on rate limit errors.
+    """Call OpenAI API with automatic retry on rate limit and timeout errors.
 
     Args:
         client: OpenAI client instance
         model: OpenAI model name
         messages: List of messages to send
         schema: JSON schema for structured output
-        max_retries: Maximum number of retry attempts
-        retry_delay: Seconds to wait before retrying
+        max_retries: Maximum number of retry attempts (default: MAX_RETRIES)
+        retry_delay: Seconds to wait before retrying (default: RETRY_DELAY)
+        on_retry: Optional callback invoked with each rate limit/timeout error
 
     Returns:
         API response
@@ -67,12 +82,17 @@ def call_openai_with_retry(
     Raises:
         Exception: If all retries fail
     """
+    if max_retries is None:
+        max_retries = MAX_RETRIES
+    if retry_delay is None:
+        retry_delay = RETRY_DELAY
     last_error = None
     spinner = Spinner("🤖 Waiting for AI response")
 
     for attempt in range(max_retries):
         try:
             spinner.start()
+            PROFILER.count("api_calls")
             resp = client.chat.completions.create(
                 model=model,
                 response_format={"type": "json_schema", "json_schema": schema},
@@ -84,21 +104,20 @@ def call_openai_with_retry(
         except Exception as e:
             spinner.stop()
 
-            # Check if it's a rate limit error (handle both old and new SDK versions)
-            is_rate_limit = (
-                RateLimitError and isinstance(e, RateLimitError)
-            ) or "rate_limit" in str(e).lower()
-
-            if is_rate_limit:
+            # Rate limit or timeout (handle both old and new SDK versions)
+            if is_retryable_error(e):
                 last_error = e
+                PROFILER.count("api_retries")
+                if on_retry:
+                    on_retry(e)
                 if attempt < max_retries - 1:
                     wait_time = retry_delay * (attempt + 1)  # Exponential backoff
                     print(
-                        f"⚠️  Rate limit hit. Waiting {wait_time:.1f}s before retry {attempt + 2}/{max_retries}..."
+                        f"⚠️  Rate limit/timeout. Waiting {wait_time:.1f}s before retry {attempt + 2}/{max_retries}..."
                     )
                     time.sleep(wait_time)
                 else:
-                    print(f"❌ Rate limit error after {max_retries} attempts")
+                    print(f"❌ Rate limit/timeout error after {max_retries} attempts")
                     raise
             else:
                 # Non-rate-limit error, raise immediately
@@ -110,26 +129,33 @@ def call_openai_with_retry(
     raise last_error or Exception("API call failed")
 
 
+@timed()
 def classify_batches(
     items: List[Item],
     batch_size: int,
     model: str,
     messages: List[Dict] = None,
     schema: Dict = None,
+    planner: Optional[BatchPlanner] = None,
 ) -> Dict[str, Dict]:
     """Classify images in batches using OpenAI Vision API with structured outputs.
 
+    Batches come from a BatchPlanner: fixed batch_size by default, or packed to a
+    token budget. After a rate limit or timeout the planner shrinks later batches,
+    and a batch that exhausts its retries is split and re-queued.
+
     Args:
         items: List of items to classify
         batch_size: Number of images per API batch
         model: OpenAI model to use (e.g., 'gpt-4o')
         messages: Optional custom messages for the API call
         schema: Optional custom JSON schema for response format
+        planner: Optional BatchPlanner (collects the per-batch run report)
 
     Returns:
         Dictionary mapping item IDs to classification results
     """
-    if OpenAI is None:
+    if _load_openai() is None:
         print("[warn] openai package not installed, skipping classification")
         return {
             i.id: {"label": "unknown", "confidence": 0.0, "descriptor": ""}
@@ -138,12 +164,14 @@ def classify_batches(
 
     client = OpenAI()
     out: Dict[str, Dict] = {}
+    if planner is None:
+        planner = BatchPlanner(batch_size, model=model)
 
     # Use custom schema if provided, otherwise use default classification schema
     if schema is None:
         schema = get_classification_schema(LABELS)
 
-    def do_batch(batch: List[Item]):
+    def do_batch(batch: List[Item], estimated_tokens: int):
         """Process a single batch of images."""
         # Build base messages
         if messages is not None:
@@ -159,10 +187,40 @@ def classify_batches(
         for it in batch:
             batch_messages.append(create_image_message(it.id, it.thumb))
 
+        retries = []
+
+        def on_retry(e: Exception):
+            retries.append(e)
+            planner.record_pressure(e)
+
         # Call OpenAI API with retry logic
-        resp = call_openai_with_retry(
-            client=client, model=model, messages=batch_messages, schema=schema
+        started = time.perf_counter()
+        try:
+            resp = call_openai_with_retry(
+                client=client,
+                model=model,
+                messages=batch_messages,
+                schema=schema,
+                on_retry=on_retry,
+            )
+        except Exception:
+            planner.record_batch(
+                len(batch),
+                estimated_tokens,
+                time.perf_counter() - started,
+                retries=len(retries),
+                status="failed",
+            )
+            raise
+        planner.record_batch(
+            len(batch),
+            estimated_tokens,
+            time.perf_counter() - started,
+            usage=getattr(resp, "usage", None),
+            retries=len(retries),
         )
+        if not retries:
+            planner.record_success()
 
         # Parse response
         data = parse_json_response(resp.choices[0].message.content)
@@ -174,13 +232,27 @@ def classify_batches(
             }
 
     # Process all items in batches with rate limiting
-    total_batches = (len(items) + batch_size - 1) // batch_size
-    for batch_num, i in enumerate(range(0, len(items), batch_size), start=1):
-        print(f"Processing batch {batch_num}/{total_batches}...")
-        do_batch(items[i : i + batch_size])
+    queue = deque(items)
+    batch_num = 0
+    while queue:
+        batch, estimated_tokens = planner.next_batch(queue)
+        batch_num += 1
+        print(
+            f"Processing batch {batch_num} ({len(batch)} images, ~{estimated_tokens} tokens, "
+            f"{len(queue)} remaining)..."
+        )
+        try:
+            do_batch(batch, estimated_tokens)
+        except Exception as e:
+            # Out of retries under pressure: split and re-queue at the front
+            if len(batch) > 1 and is_retryable_error(e):
+                print(f"↩️  Re-queueing {len(batch)} images in smaller batches")
+                queue.extendleft(reversed(batch))
+            else:
+                raise
 
         # Rate limit delay between batches (skip after last batch)
-        if i + batch_size < len(items) and API_RATE_LIMIT_DELAY > 0:
+        if queue and API_RATE_LIMIT_DELAY > 0:
             print(f"⏳ Waiting {API_RATE_LIMIT_DELAY}s before next batch...")
             time.sleep(API_RATE_LIMIT_DELAY)
 
@@ -200,7 +272,7 @@ def classify_singleton(item: Item, model: str = DEFAULT_MODEL) -> Dict:
     Returns:
         Classification result: {"label": str, "confidence": float, "descriptor": str}
     """
-    if OpenAI is None:
+    if _load_openai() is None:
         return {"label": "unknown", "confidence": 0.0, "descriptor": ""}
 
     # Use classify_batches with batch_size=1
@@ -254,10 +326,12 @@ def get_best_example(group: List[Item]) -> Item:
         return candidates[0]
 
 
+@timed()
 def classify_cluster_examples(
     groups: List[List[Item]],
     batch_size: int,
     model: str,
+    planner: Optional[BatchPlanner] = None,
 ) -> Dict[str, Dict]:
     """Classify only cluster example images, then propagate labels to all images.
 
@@ -272,6 +346,7 @@ def classify_cluster_examples(
         groups: List of clusters (each cluster is a list of Items)
         batch_size: Number of images per API batch
         model: OpenAI model to use (e.g., 'gpt-4o')
+        planner: Optional BatchPlanner (token budget + run report)
 
     Returns:
         Dictionary mapping ALL item IDs to classification results
@@ -282,7 +357,7 @@ def classify_cluster_examples(
         >>> labels = classify_cluster_examples(groups, batch_size=12, model='gpt-4o')
         >>> # Returns labels for img1-img6, where img1/img2/img3 have same label
     """
-    if OpenAI is None:
+    if _load_openai() is None:
         print("[warn] openai package not installed, skipping classification")
         all_items = [item for group in groups for item in group]
         return {
@@ -303,7 +378,7 @@ def classify_cluster_examples(
     print(f"   (instead of classifying all {sum(len(g) for g in groups)} images)")
 
     # Classify only the examples
-    example_labels = classify_batches(examples, batch_size, model)
+    example_labels = classify_batches(examples, batch_size, model, planner=planner)
 
     # Propagate labels to all images in each cluster
     all_labels: Dict[str, Dict] = {}
@@ -324,6 +399,7 @@ def classify_cluster_examples(
 # ===============================================================
 
 
+@timed()
 def match_uncertain_items_with_collage(
     uncertain_items: List[Tuple[int, List[Item]]],
     confident_clusters: List[Tuple[int, List[Item]]],
@@ -358,8 +434,6 @@ def match_uncertain_items_with_collage(
 
         Result: {91: 5, 23: -1}  # singleton merges, hash_only stays separate
     """
-    from openai import OpenAI
-
     from ..config import API_RATE_LIMIT_DELAY
     from .collage import create_cluster_collage
     from .schemas import get_uncertain_match_schema
@@ -374,6 +448,10 @@ def match_uncertain_items_with_collage(
         print("No confident clusters to match against.")
         return {cid: -1 for cid, _ in uncertain_items}
 
+    if _load_openai() is None:
+        print("[warn] openai package not installed, skipping matching")
+        return {cid: -1 for cid, _ in uncertain_items}
+
     client = OpenAI()
     assignments = {}
 
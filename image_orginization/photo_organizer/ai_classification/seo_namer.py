@@ -13,14 +13,20 @@ from PIL import Image
 
 from ..config import LABELS, API_RATE_LIMIT_DELAY, MAX_RETRIES, RETRY_DELAY
 from ..models import Item
+from ..utils.profiling import PROFILER, timed
+from .utils import load_openai
 
-try:
-    from openai import OpenAI
+client = None  # Built on first use by _get_client()
 
-    client = OpenAI()
-except ImportError:
-    OpenAI = None
-    client = None
+
+def _get_client():
+    """Shared OpenAI client, constructed on first call (None without the SDK)."""
+    global client
+    if client is None:
+        OpenAI, _ = load_openai()
+        if OpenAI is not None:
+            client = OpenAI()
+    return client
 
 
 def create_seo_naming_prompt(target_keywords: List[str]) -> List[Dict]:
@@ -107,6 +113,7 @@ def encode_image_to_base64(image_path: Path) -> str:
         return base64.b64encode(f.read()).decode("utf-8")
 
 
+@timed()
 def call_openai_for_naming(
     collage_path: Path,
     num_images: int,
@@ -122,7 +129,7 @@ def call_openai_for_naming(
     Returns:
         Dict mapping image index (0-based) to filename (without extension)
     """
-    if OpenAI is None or client is None:
+    if _get_client() is None:
         print("[warn] openai package not installed, returning placeholder names")
         return {i: f"concrete-photo-{i}" for i in range(num_images)}
 
@@ -154,6 +161,7 @@ def call_openai_for_naming(
     for attempt in range(MAX_RETRIES):
         try:
             print(f"🤖 Calling OpenAI API for {num_images} filenames...")
+            PROFILER.count("api_calls")
 
             response = client.chat.completions.create(
                 model=model,
@@ -180,6 +188,7 @@ def call_openai_for_naming(
         except Exception as e:
             print(f"❌ API call failed (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
             if attempt < MAX_RETRIES - 1:
+                PROFILER.count("api_retries")
                 print(f"   Retrying in {RETRY_DELAY}s...")
                 time.sleep(RETRY_DELAY)
             else:
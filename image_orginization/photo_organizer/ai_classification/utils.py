@@ -3,7 +3,38 @@
 import base64
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+
+_openai_sdk: Optional[Tuple[Any, Any]] = None
+
+
+def load_openai() -> Tuple[Any, Any]:
+    """Import the OpenAI SDK and load .env on first use.
+
+    Deferred so importing the pipeline (or running --help) doesn't pay for
+    the SDK and dotenv.
+
+    Returns:
+        (OpenAI, RateLimitError), both None if the openai package is missing
+    """
+    global _openai_sdk
+    if _openai_sdk is None:
+        # Load environment variables from .env file
+        try:
+            from dotenv import load_dotenv
+
+            project_root = Path(__file__).parent.parent.parent
+            load_dotenv(project_root / ".env", override=True)
+        except ImportError:  # pragma: no cover
+            pass  # python-dotenv not installed, continue without it
+
+        try:
+            from openai import OpenAI, RateLimitError  # type: ignore
+
+            _openai_sdk = (OpenAI, RateLimitError)
+        except Exception:  # pragma: no cover
+            _openai_sdk = (None, None)
+    return _openai_sdk
 
 
 def b64(path: Path) -> str:
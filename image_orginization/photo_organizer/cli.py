@@ -27,7 +27,7 @@ import json
 import shlex
 import sys
 from pathlib import Path
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, List
 
 from .config import (
     IMAGE_DIR,
@@ -40,25 +40,34 @@ from .config import (
     DEFAULT_MAX_EDGES,
     DEFAULT_MODEL,
     DEFAULT_BATCH_SIZE,
+    DEFAULT_BATCH_TOKEN_BUDGET,
     DEFAULT_ROTATE_CITIES,
     DEFAULT_DRY_RUN,
+    DEFAULT_PIPELINE,
+    DEFAULT_DEDUPE,
+    DEDUPE_PHASH_DISTANCE,
+    DEFAULT_PLACEMENT,
+    DEFAULT_VERIFY_COPIES,
+    PLACEMENT_MAX_WORKERS,
+    DEFAULT_TRANSCODE_HEIC,
+    TRANSCODE_QUALITY,
+    TRANSCODE_MAX_PX,
+    TRANSCODE_KEEP_EXIF,
+    WATCH_INTERVAL_SECONDS,
+    DEFAULT_SHARD_BY,
     DEFAULT_MODE_NAME_ONLY,
     DEFAULT_AI_CLASSIFY,
     DEFAULT_ASSIGN_SINGLETONS,
     USE_SEMANTIC_KEYWORDS,
+    ENABLE_UNIFIED_MATCHING,
 )
-from .ingestion import ingest
-from .ai_classification import (
-    classify_cluster_examples,
-    match_uncertain_items_with_collage,
-    separate_confident_uncertain_clusters,
-    apply_matches_to_groups,
-)
-from .clustering import cluster_gps_only, fused_cluster, cluster_phash_only
-from .organization import organize
-from .utils.filename import name_features
+from .scheduler import StageScheduler
+from .utils.profiling import PROFILER
 from .utils.stats import print_clustering_stats
 
+if TYPE_CHECKING:
+    from .models import Item
+
 
 def get_thumb_path(original_filename: str, work_dir: Path) -> str:
     """Construct full absolute path to thumbnail file.
@@ -75,6 +84,9 @@ def get_thumb_path(original_filename: str, work_dir: Path) -> str:
     return str(thumb_path.resolve())
 
 
+PROFILE_STAGES = ("shards", "ingest", "dedupe", "cluster_gps", "fused_cluster", "classify", "organize")
+
+
 def main():
     """Main CLI entry point."""
     ap = argparse.ArgumentParser(
@@ -87,7 +99,13 @@ def main():
         help="GPS-only site merge radius; images within this distance form one project, regardless of time",
     )
 
-    ap.add_argument("run", nargs="?", help="Execute full pipeline")
+    ap.add_argument(
+        "command",
+        nargs="?",
+        choices=["run", "watch"],
+        default="run",
+        help="run: execute the full pipeline once; watch: keep organizing new files as they arrive",
+    )
     ap.add_argument("--input", required=True, help="Input folder with images")
     ap.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Output folder")
     ap.add_argument("--brand", default=DEFAULT_BRAND, help="Optional brand slug")
@@ -134,6 +152,12 @@ def main():
         default=DEFAULT_BATCH_SIZE,
         help="Images per API batch",
     )
+    ap.add_argument(
+        "--batch-token-budget",
+        type=int,
+        default=DEFAULT_BATCH_TOKEN_BUDGET,
+        help="Pack classification batches up to this many prompt tokens (0 = fixed --batch-size)",
+    )
     ap.add_argument(
         "--rotate-cities",
         action="store_true",
@@ -173,12 +197,123 @@ def main():
         dest="dry_run",
         help="Actually move files (not just simulate)",
     )
+    ap.add_argument(
+        "--no-pipeline",
+        action="store_false",
+        dest="pipeline",
+        default=DEFAULT_PIPELINE,
+        help="Don't classify GPS clusters in the background while fused clustering runs",
+    )
+    ap.add_argument(
+        "--no-dedupe",
+        action="store_false",
+        dest="dedupe",
+        default=DEFAULT_DEDUPE,
+        help="Cluster and classify every copy instead of one representative per duplicate group",
+    )
+    ap.add_argument(
+        "--placement",
+        choices=["copy", "hardlink", "reflink", "symlink", "move"],
+        default=DEFAULT_PLACEMENT,
+        help="How organized files are created (falls back to copy when the filesystem can't)",
+    )
+    ap.add_argument(
+        "--verify-copies",
+        action="store_true",
+        default=DEFAULT_VERIFY_COPIES,
+        help="Hash each file while copying and re-read the copy to verify it",
+    )
+    ap.add_argument(
+        "--placement-workers",
+        type=int,
+        default=PLACEMENT_MAX_WORKERS,
+        help="Parallel copy threads for organization (0 = auto)",
+    )
+    ap.add_argument(
+        "--transcode-heic",
+        choices=["off", "jpeg", "webp", "avif"],
+        default=DEFAULT_TRANSCODE_HEIC,
+        help="Re-encode HEIC/HEIF originals in the organized output (off = copy HEIC bytes)",
+    )
+    ap.add_argument(
+        "--transcode-quality",
+        type=int,
+        default=TRANSCODE_QUALITY,
+        help="Encoder quality for transcoded outputs (1-100)",
+    )
+    ap.add_argument(
+        "--transcode-max-px",
+        type=int,
+        default=TRANSCODE_MAX_PX,
+        help="Resize transcoded outputs so the longest side is at most N px (0 = keep size)",
+    )
+    ap.add_argument(
+        "--strip-exif",
+        action="store_false",
+        dest="keep_exif",
+        default=TRANSCODE_KEEP_EXIF,
+        help="Drop EXIF (incl. GPS) from transcoded outputs",
+    )
+    ap.add_argument(
+        "--profile",
+        choices=PROFILE_STAGES,
+        default=None,
+        metavar="STAGE",
+        help=f"Deep-profile one stage (pyinstrument if installed, else cProfile): {', '.join(PROFILE_STAGES)}",
+    )
+    ap.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_INTERVAL_SECONDS,
+        help="watch: seconds between input scans",
+    )
+    ap.add_argument(
+        "--once",
+        action="store_true",
+        help="watch: process what is in the input folder now, then exit",
+    )
+    ap.add_argument(
+        "--shards",
+        type=int,
+        default=0,
+        help="Split ingest + clustering into N shards run in parallel processes, then merge (0 = off)",
+    )
+    ap.add_argument(
+        "--shard-by",
+        choices=["dir", "date"],
+        default=DEFAULT_SHARD_BY,
+        help="Partition by top-level folder or by file date range",
+    )
+    ap.add_argument(
+        "--shard-index",
+        type=int,
+        default=None,
+        help="Run only shard I of --shards N and exit (multi-machine runs over a shared output folder)",
+    )
     ap.add_argument(
         "--phash-only",
         action="store_true",
         help="TEST MODE: Cluster using only pHash (visual similarity), ignore filename/time",
     )
     args = ap.parse_args()
+    if args.shard_index is not None and not args.shards:
+        ap.error("--shard-index requires --shards N")
+
+    # Pipeline stages import PIL, numpy, tqdm, rapidfuzz and the OpenAI SDK:
+    # load them after argument parsing so --help and bad arguments return fast
+    from .ingestion import ingest
+    from .ai_classification import (
+        BatchPlanner,
+        classify_cluster_examples,
+        match_uncertain_items_with_collage,
+        separate_confident_uncertain_clusters,
+        apply_matches_to_groups,
+    )
+    from .clustering import cluster_gps_only, fused_cluster, cluster_phash_only
+    from .dedupe import collapse_duplicates, expand_duplicates
+    from .organization import organize
+    from .transcode import TranscodeOptions
+    from .utils.filename import name_features
 
     input_dir = Path(args.input).expanduser()
     out_dir = Path(args.output).expanduser()
@@ -193,11 +328,85 @@ def main():
     work_dir.mkdir(parents=True, exist_ok=True)
     organized_dir.mkdir(parents=True, exist_ok=True)
 
-    # 1) Ingest
-    print("=" * 60)
-    print("STEP 1: INGESTION")
-    print("=" * 60)
-    items = ingest(input_dir, work_dir)
+    if args.command == "watch":
+        if args.name_only:
+            ap.error("watch does not support --name-only")
+        from .watch import Watcher, WatchOptions
+
+        options = WatchOptions(
+            site_meters=args.site_distance_feet * 0.3048,
+            time_gap_min=args.time_gap_min,
+            hash_threshold=args.hash_threshold,
+            brand=args.brand,
+            rotate_cities=args.rotate_cities,
+            use_semantic_keywords=args.use_semantic_keywords,
+            classify=args.classify,
+            batch_size=args.batch_size,
+            model=args.model,
+            place=not args.dry_run,
+            placement=args.placement,
+            verify=args.verify_copies,
+            placement_workers=args.placement_workers,
+            transcode=TranscodeOptions(
+                args.transcode_heic,
+                args.transcode_quality,
+                args.transcode_max_px,
+                args.keep_exif,
+            ),
+            interval=args.watch_interval,
+        )
+        Watcher(input_dir, out_dir, options).run(once=args.once)
+        return
+
+    # Simple classification mode can overlap GPS-cluster API calls with fused clustering
+    simple_classify = (
+        args.classify
+        and not args.name_only
+        and not (args.assign_singletons and ENABLE_UNIFIED_MATCHING)
+    )
+    planner = BatchPlanner(
+        args.batch_size, token_budget=args.batch_token_budget, model=args.model
+    )
+    scheduler = StageScheduler()
+    PROFILER.reset()
+    PROFILER.profile_stage = args.profile
+    PROFILER.profile_dir = work_dir
+
+    site_meters = args.site_distance_feet * 0.3048
+    sharded = None
+    if args.shards:
+        from .sharding import ShardOptions, run_sharded
+
+        print("=" * 60)
+        print("STEP 1: SHARDED INGESTION + CLUSTERING")
+        print("=" * 60)
+        PROFILER.begin("shards")
+        sharded = run_sharded(
+            input_dir,
+            work_dir,
+            args.shards,
+            ShardOptions(
+                site_meters=site_meters,
+                time_gap_min=args.time_gap_min,
+                hash_threshold=args.hash_threshold,
+                dedupe=args.dedupe,
+                phash_only=args.phash_only,
+            ),
+            by=args.shard_by,
+            shard_index=args.shard_index,
+        )
+        PROFILER.end("shards")
+        if sharded is None:
+            return  # Single shard done; rerun without --shard-index to merge
+        items = sharded.items
+    else:
+        # 1) Ingest
+        print("=" * 60)
+        print("STEP 1: INGESTION")
+        print("=" * 60)
+        PROFILER.begin("ingest")
+        items = ingest(input_dir, work_dir)
+        PROFILER.end("ingest")
 
     name_map: Dict[str, any] = {it.id: name_features(it.path) for it in items}
 
@@ -229,6 +438,25 @@ def main():
     with open(work_dir / "ingest.json", "w", encoding="utf-8") as f:
         json.dump(ingest_json, f, indent=2)
 
+    # Collapse exact/near duplicates: one representative is clustered and classified
+    duplicates: Dict[str, List["Item"]] = {}
+    if args.dedupe:
+        if sharded:
+            # Each shard already collapsed its own duplicates
+            items, duplicates, duplicate_records = (
+                sharded.representatives,
+                sharded.duplicates,
+                sharded.duplicate_records,
+            )
+        else:
+            PROFILER.begin("dedupe")
+            items, duplicates, duplicate_records = collapse_duplicates(
+                items, phash_distance=DEDUPE_PHASH_DISTANCE
+            )
+            PROFILER.end("dedupe")
+        with open(work_dir / "duplicates.json", "w", encoding="utf-8") as f:
+            json.dump(duplicate_records, f, indent=2)
+
     # 2) Clustering
     print("\n" + "=" * 60)
     print("STEP 2: CLUSTERING")
@@ -242,248 +470,305 @@ def main():
 
     # GPS-only clustering: returns (multi_photo_clusters, singletons)
     # Singletons get re-clustered using full hierarchical strategy
-    site_meters = args.site_distance_feet * 0.3048
-    gps_groups, gps_singletons = cluster_gps_only(with_gps, max_meters=site_meters)
-
-    if gps_singletons:
-        print(
-            f"📍 Found {len(gps_singletons)} GPS singletons → re-clustering via hierarchical strategy"
-        )
-
-    # Combine GPS singletons with non-GPS photos for fused clustering
-    items_for_fused = without_gps + gps_singletons
-
-    # For items without GPS (+ GPS singletons), choose clustering strategy
-    if args.phash_only:
-        # TEST MODE: Use only pHash for clustering (visual similarity)
-        print(f"Using pHash-only clustering (threshold: {args.hash_threshold})")
-        th_groups = cluster_phash_only(
-            items_for_fused, hash_threshold=args.hash_threshold
-        )
+    if sharded:
+        gps_groups, gps_singletons = sharded.gps_groups, []
     else:
-        # NORMAL MODE: Full hierarchical fused clustering
-        # Strategy 1: time+filename+hash (if datetime available)
-        # Strategy 2: filename+hash (if strong filename match)
-        # Strategy 3: hash only (fallback)
-        th_groups = fused_cluster(
-            items_for_fused,
-            name_map,
-            fuse_threshold=DEFAULT_FUSE_THRESHOLD,
-            max_edges_per_node=DEFAULT_MAX_EDGES,
-        )
+        PROFILER.begin("cluster_gps")
+        gps_groups, gps_singletons = cluster_gps_only(with_gps, max_meters=site_meters)
+        PROFILER.end("cluster_gps")
+
+    # Background stages must be shut down even if classification fails
+    completed = False
+    try:
+        # GPS cluster labels don't depend on fused clustering: start classifying now
+        if simple_classify and args.pipeline and gps_groups:
+            scheduler.submit(
+                "classify_gps",
+                classify_cluster_examples,
+                gps_groups,
+                args.batch_size,
+                args.model,
+                planner,
+            )
 
-    # Save fused clustering explanation
-    explain = []
-    for gi, g in enumerate(th_groups, 1):
-        rows = []
-        for it in g:
-            nf = name_map[it.id]
-            rows.append(
-                {
-                    "id": it.id,
-                    "prefix": nf.prefix,
-                    "num": nf.num,
-                    "dt": it.dt.isoformat() if it.dt else None,
-                }
+        if gps_singletons:
+            print(
+                f"📍 Found {len(gps_singletons)} GPS singletons → re-clustering via hierarchical strategy"
             )
-        explain.append({"cluster": gi, "count": len(g), "items": rows})
-    with open(work_dir / "fused_explain_no_gps.json", "w", encoding="utf-8") as f:
-        json.dump(explain, f, indent=2)
-
-    # Combine
-    groups = gps_groups + th_groups
-
-    # Tag each item with its clustering strategy for later separation
-    for group in gps_groups:
-        for item in group:
-            item.strategy = "gps_location"
-
-    for group in th_groups:
-        # Determine strategy based on cluster characteristics
-        has_datetime_count = sum(1 for item in group if item.dt is not None)
-
-        # Check filename similarity within cluster
-        from .utils.filename import filename_score
-
-        if len(group) >= 2:
-            # Sample pairs to check filename similarity
-            name_feat_a = name_map[group[0].id]
-            name_feat_b = name_map[group[1].id]
-            filename_sim = filename_score(name_feat_a, name_feat_b)
-        else:
-            filename_sim = 0.0
 
-        # Determine strategy based on available signals
-        if has_datetime_count >= len(group) / 2:
-            strategy = "time+filename+hash"
-        elif filename_sim > 0.7:  # FILENAME_STRONG_THRESHOLD
-            strategy = "filename+hash"
+        # Combine GPS singletons with non-GPS photos for fused clustering
+        items_for_fused = without_gps + gps_singletons
+
+        # For items without GPS (+ GPS singletons), choose clustering strategy
+        if sharded:
+            th_groups = sharded.fused_groups
         else:
-            strategy = "hash_only"
+            PROFILER.begin("fused_cluster")
+            if args.phash_only:
+                # TEST MODE: Use only pHash for clustering (visual similarity)
+                print(f"Using pHash-only clustering (threshold: {args.hash_threshold})")
+                th_groups = cluster_phash_only(
+                    items_for_fused, hash_threshold=args.hash_threshold
+                )
+            else:
+                # NORMAL MODE: Full hierarchical fused clustering
+                # Strategy 1: time+filename+hash (if datetime available)
+                # Strategy 2: filename+hash (if strong filename match)
+                # Strategy 3: hash only (fallback)
+                th_groups = fused_cluster(
+                    items_for_fused,
+                    name_map,
+                    fuse_threshold=DEFAULT_FUSE_THRESHOLD,
+                    max_edges_per_node=DEFAULT_MAX_EDGES,
+                    time_gap_minutes=args.time_gap_min,
+                )
+            PROFILER.end("fused_cluster")
+
+        # Save fused clustering explanation
+        explain = []
+        for gi, g in enumerate(th_groups, 1):
+            rows = []
+            for it in g:
+                nf = name_map[it.id]
+                rows.append(
+                    {
+                        "id": it.id,
+                        "prefix": nf.prefix,
+                        "num": nf.num,
+                        "dt": it.dt.isoformat() if it.dt else None,
+                    }
+                )
+                if it.id in duplicates:
+                    rows[-1]["duplicates"] = [d.id for d in duplicates[it.id]]
+            explain.append({"cluster": gi, "count": len(g), "items": rows})
+        with open(work_dir / "fused_explain_no_gps.json", "w", encoding="utf-8") as f:
+            json.dump(explain, f, indent=2)
 
-        for item in group:
-            item.strategy = strategy
+        # Combine
+        groups = gps_groups + th_groups
 
-    # NOTE: Singleton assignment moved to after classification (unified matching flow)
-    # Cluster summary will be written after classification when groups are finalized
+        # Tag each item with its clustering strategy for later separation
+        for group in gps_groups:
+            for item in group:
+                item.strategy = "gps_location"
 
-    # 3) Classification (OPTIMIZED: classify only cluster examples)
-    print("\n" + "=" * 60)
-    print("STEP 3: CLASSIFICATION")
-    print("=" * 60)
+        for group in th_groups:
+            # Determine strategy based on cluster characteristics
+            has_datetime_count = sum(1 for item in group if item.dt is not None)
 
-    labels: Dict[str, Dict] = {}
+            # Check filename similarity within cluster
+            from .utils.filename import filename_score
 
-    # NAME-ONLY MODE: Simple collage-based naming
-    if args.name_only:
-        print("🎨 Using NAME-ONLY mode (collage-based naming, no sorting/matching)")
-        from .name_only import name_only_mode
+            if len(group) >= 2:
+                # Sample pairs to check filename similarity
+                name_feat_a = name_map[group[0].id]
+                name_feat_b = name_map[group[1].id]
+                filename_sim = filename_score(name_feat_a, name_feat_b)
+            else:
+                filename_sim = 0.0
+
+            # Determine strategy based on available signals
+            if has_datetime_count >= len(group) / 2:
+                strategy = "time+filename+hash"
+            elif filename_sim > 0.7:  # FILENAME_STRONG_THRESHOLD
+                strategy = "filename+hash"
+            else:
+                strategy = "hash_only"
 
-        # Create collages in the name-only output directory
-        name_only_work_dir = organized_dir / "_collages"
+            for item in group:
+                item.strategy = strategy
 
-        labels = name_only_mode(
-            groups=groups,
-            output_dir=name_only_work_dir,
-            model=args.model,
-            max_images_per_collage=50,
-        )
+        # NOTE: Singleton assignment moved to after classification (unified matching flow)
+        # Cluster summary will be written after classification when groups are finalized
 
-    elif args.classify:
-        from .config import (
-            ENABLE_UNIFIED_MATCHING,
-            CONFIDENT_STRATEGIES,
-            UNCERTAIN_STRATEGIES,
-        )
+        # 3) Classification (OPTIMIZED: classify only cluster examples)
+        print("\n" + "=" * 60)
+        print("STEP 3: CLASSIFICATION")
+        print("=" * 60)
+
+        labels: Dict[str, Dict] = {}
+        PROFILER.begin("classify")
+
+        # NAME-ONLY MODE: Simple collage-based naming
+        if args.name_only:
+            print("🎨 Using NAME-ONLY mode (collage-based naming, no sorting/matching)")
+            from .name_only import name_only_mode
 
-        if args.assign_singletons and ENABLE_UNIFIED_MATCHING:
-            # UNIFIED MATCHING: Simplified 3-phase approach
-            print("🔄 Using unified matching (singletons + hash_only clusters)")
+            # Create collages in the name-only output directory
+            name_only_work_dir = organized_dir / "_collages"
 
-            # Convert groups to (cluster_id, items) format
-            indexed_groups = [(idx, g) for idx, g in enumerate(groups)]
+            labels = name_only_mode(
+                groups=groups,
+                output_dir=name_only_work_dir,
+                model=args.model,
+                max_images_per_collage=50,
+            )
 
-            # Phase 1: Separate confident vs uncertain clusters
-            print("\n📊 Phase 1: Separating confident vs uncertain clusters...")
-            confident_clusters, uncertain_items = separate_confident_uncertain_clusters(
-                indexed_groups,
+        elif args.classify:
+            from .config import (
                 CONFIDENT_STRATEGIES,
                 UNCERTAIN_STRATEGIES,
             )
 
-            print(f"  ✅ Confident clusters: {len(confident_clusters)}")
-            print(f"  ⚠️  Uncertain items: {len(uncertain_items)}")
+            if not simple_classify:
+                # UNIFIED MATCHING: Simplified 3-phase approach
+                print("🔄 Using unified matching (singletons + hash_only clusters)")
 
-            # Phase 2: Classify confident clusters FIRST
-            print("\n🎯 Phase 2: Classifying confident clusters...")
-            confident_labels = {}
-            if confident_clusters:
-                # Extract just the items (not the cluster_id) for classification
-                confident_groups_only = [items for _, items in confident_clusters]
+                # Convert groups to (cluster_id, items) format
+                indexed_groups = [(idx, g) for idx, g in enumerate(groups)]
 
-                print(
-                    f"  🖼️  Classifying {len(confident_groups_only)} confident clusters..."
-                )
-                confident_labels = classify_cluster_examples(
-                    confident_groups_only, args.batch_size, args.model
-                )
-                labels.update(confident_labels)
-
-                # Map cluster_id -> label for uncertain matching
-                cluster_id_to_label = {}
-                for cluster_id, items in confident_clusters:
-                    # Get label for first item in cluster (all items get same label)
-                    first_item_label = confident_labels.get(items[0].id, {})
-                    cluster_id_to_label[cluster_id] = first_item_label
-
-            # Phase 3: Match uncertain items against confident clusters
-            print("\n🔗 Phase 3: Matching uncertain items...")
-            if uncertain_items and confident_clusters:
-                assignments = match_uncertain_items_with_collage(
-                    uncertain_items,
-                    confident_clusters,
-                    cluster_id_to_label,
-                    model=args.model,
+                # Phase 1: Separate confident vs uncertain clusters
+                print("\n📊 Phase 1: Separating confident vs uncertain clusters...")
+                confident_clusters, uncertain_items = separate_confident_uncertain_clusters(
+                    indexed_groups,
+                    CONFIDENT_STRATEGIES,
+                    UNCERTAIN_STRATEGIES,
                 )
 
-                # Apply matches to groups
-                groups_updated = apply_matches_to_groups(indexed_groups, assignments)
-
-                # Extract just the items (remove cluster_ids)
-                groups = [items for _, items in groups_updated]
+                print(f"  ✅ Confident clusters: {len(confident_clusters)}")
+                print(f"  ⚠️  Uncertain items: {len(uncertain_items)}")
+
+                # Phase 2: Classify confident clusters FIRST
+                print("\n🎯 Phase 2: Classifying confident clusters...")
+                confident_labels = {}
+                if confident_clusters:
+                    # Extract just the items (not the cluster_id) for classification
+                    confident_groups_only = [items for _, items in confident_clusters]
+
+                    print(
+                        f"  🖼️  Classifying {len(confident_groups_only)} confident clusters..."
+                    )
+                    confident_labels = classify_cluster_examples(
+                        confident_groups_only, args.batch_size, args.model, planner
+                    )
+                    labels.update(confident_labels)
+
+                    # Map cluster_id -> label for uncertain matching
+                    cluster_id_to_label = {}
+                    for cluster_id, items in confident_clusters:
+                        # Get label for first item in cluster (all items get same label)
+                        first_item_label = confident_labels.get(items[0].id, {})
+                        cluster_id_to_label[cluster_id] = first_item_label
+
+                # Phase 3: Match uncertain items against confident clusters
+                print("\n🔗 Phase 3: Matching uncertain items...")
+                if uncertain_items and confident_clusters:
+                    assignments = match_uncertain_items_with_collage(
+                        uncertain_items,
+                        confident_clusters,
+                        cluster_id_to_label,
+                        model=args.model,
+                    )
+
+                    # Apply matches to groups
+                    groups_updated = apply_matches_to_groups(indexed_groups, assignments)
+
+                    # Extract just the items (remove cluster_ids)
+                    groups = [items for _, items in groups_updated]
+
+                    matched = sum(1 for cid in assignments.values() if cid != -1)
+                    print(
+                        f"  ✅ Matched {matched}/{len(uncertain_items)} uncertain items to confident clusters"
+                    )
+                else:
+                    # Just extract items from indexed groups
+                    groups = [items for _, items in indexed_groups]
+
+                # Phase 4: Classify any remaining unclassified clusters
+                print("\n🔍 Phase 4: Classifying remaining clusters...")
+                remaining_groups = [g for g in groups if g[0].id not in labels]
+                if remaining_groups:
+                    print(f"  🖼️  Classifying {len(remaining_groups)} remaining clusters...")
+                    remaining_labels = classify_cluster_examples(
+                        remaining_groups, args.batch_size, args.model, planner
+                    )
+                    labels.update(remaining_labels)
+
+                total_images = sum(len(g) for g in groups)
+                savings_pct = (
+                    ((total_images - len(groups)) / total_images * 100)
+                    if total_images
+                    else 0
+                )
+                print(f"\n💰 Total Cost Savings: {savings_pct:.0f}% fewer API requests!")
 
-                matched = sum(1 for cid in assignments.values() if cid != -1)
+            else:
+                # SIMPLE MODE: No unified matching, just classify and name existing clusters as-is
                 print(
-                    f"  ✅ Matched {matched}/{len(uncertain_items)} uncertain items to confident clusters"
+                    f"\n📝 Simple mode: Classifying {len(groups)} existing clusters (no re-clustering)..."
                 )
-            else:
-                # Just extract items from indexed groups
-                groups = [items for _, items in indexed_groups]
-
-            # Phase 4: Classify any remaining unclassified clusters
-            print("\n🔍 Phase 4: Classifying remaining clusters...")
-            remaining_groups = [g for g in groups if g[0].id not in labels]
-            if remaining_groups:
-                print(f"  🖼️  Classifying {len(remaining_groups)} remaining clusters...")
-                remaining_labels = classify_cluster_examples(
-                    remaining_groups, args.batch_size, args.model
+                if scheduler.has("classify_gps"):
+                    # GPS clusters are already in flight; classify the rest, then join
+                    labels = classify_cluster_examples(
+                        th_groups, args.batch_size, args.model, planner
+                    )
+                    labels.update(scheduler.result("classify_gps"))
+                else:
+                    labels = classify_cluster_examples(
+                        groups, args.batch_size, args.model, planner
+                    )
+
+                total_images = sum(len(g) for g in groups)
+                savings_pct = (
+                    ((total_images - len(groups)) / total_images * 100)
+                    if total_images
+                    else 0
                 )
-                labels.update(remaining_labels)
+                print(f"💰 Cost Savings: {savings_pct:.0f}% fewer API requests!")
 
-            total_images = sum(len(g) for g in groups)
-            savings_pct = (
-                ((total_images - len(groups)) / total_images * 100)
-                if total_images
-                else 0
-            )
-            print(f"\n💰 Total Cost Savings: {savings_pct:.0f}% fewer API requests!")
+            with open(work_dir / "labels.json", "w", encoding="utf-8") as f:
+                json.dump(labels, f, indent=2)
 
-        else:
-            # SIMPLE MODE: No unified matching, just classify and name existing clusters as-is
+            planner.write_report(work_dir / "batch_report.json")
+            report = planner.summary()
+            cost = f"${report['cost_usd']:.4f}" if report["cost_usd"] is not None else "n/a"
             print(
-                f"\n📝 Simple mode: Classifying {len(groups)} existing clusters (no re-clustering)..."
+                f"📊 Batches: {report['batches']}  Tokens: {report['prompt_tokens']}+"
+                f"{report['completion_tokens']}  Retries: {report['retries']}  Cost: {cost}"
             )
-            labels = classify_cluster_examples(groups, args.batch_size, args.model)
+        else:
+            print("Classification disabled, using fallback cluster-based labels...")
+            # Generate unique labels for each cluster based on strategy
+            cluster_num = 1
+            for group in groups:
+                if not group:
+                    continue
+
+                # Determine cluster label based on strategy
+                first_item = group[0]
+                strategy = getattr(first_item, "strategy", "unknown")
+
+                # Generate a descriptive label for the cluster
+                if strategy == "gps_location":
+                    label = f"cluster-gps-{cluster_num}"
+                elif strategy == "time+filename+hash":
+                    label = f"cluster-time-{cluster_num}"
+                elif strategy == "filename+hash":
+                    label = f"cluster-filename-{cluster_num}"
+                else:
+                    label = f"cluster-{cluster_num}"
 
-            total_images = sum(len(g) for g in groups)
-            savings_pct = (
-                ((total_images - len(groups)) / total_images * 100)
-                if total_images
-                else 0
-            )
-            print(f"💰 Cost Savings: {savings_pct:.0f}% fewer API requests!")
+                # Assign this label to all items in the cluster
+                for item in group:
+                    labels[item.id] = {"label": label, "confidence": 0.0, "descriptor": ""}
 
-        with open(work_dir / "labels.json", "w", encoding="utf-8") as f:
-            json.dump(labels, f, indent=2)
-    else:
-        print("Classification disabled, using fallback cluster-based labels...")
-        # Generate unique labels for each cluster based on strategy
-        cluster_num = 1
-        for group in groups:
-            if not group:
-                continue
-
-            # Determine cluster label based on strategy
-            first_item = group[0]
-            strategy = getattr(first_item, "strategy", "unknown")
-
-            # Generate a descriptive label for the cluster
-            if strategy == "gps_location":
-                label = f"cluster-gps-{cluster_num}"
-            elif strategy == "time+filename+hash":
-                label = f"cluster-time-{cluster_num}"
-            elif strategy == "filename+hash":
-                label = f"cluster-filename-{cluster_num}"
-            else:
-                label = f"cluster-{cluster_num}"
+                cluster_num += 1
 
-            # Assign this label to all items in the cluster
-            for item in group:
-                labels[item.id] = {"label": label, "confidence": 0.0, "descriptor": ""}
+            print(f"  Generated {cluster_num - 1} unique cluster labels")
+            with open(work_dir / "labels.json", "w", encoding="utf-8") as f:
+                json.dump(labels, f, indent=2)
 
-            cluster_num += 1
+        completed = True
+    finally:
+        # On errors, cancel instead of waiting for in-flight API calls
+        scheduler.shutdown(wait=completed)
+    PROFILER.end("classify")
+    for name, seconds in scheduler.timings.items():
+        PROFILER.record(f"background:{name}", seconds)
 
-        print(f"  Generated {cluster_num - 1} unique cluster labels")
+    # Put collapsed duplicates back next to their representatives
+    if duplicates:
+        groups = expand_duplicates(groups, duplicates, labels)
         with open(work_dir / "labels.json", "w", encoding="utf-8") as f:
             json.dump(labels, f, indent=2)
 
@@ -549,6 +834,14 @@ def main():
     print("=" * 60)
 
     if not args.dry_run:
+        PROFILER.begin("organize")
+        transcode = TranscodeOptions(
+            args.transcode_heic,
+            args.transcode_quality,
+            args.transcode_max_px,
+            args.keep_exif,
+        )
+
         # Use different organization function for name-only mode
         if args.name_only:
             from .organization_name_only import organize_name_only
@@ -559,6 +852,10 @@ def main():
                 organized_dir,
                 args.brand,
                 args.rotate_cities,
+                placement=args.placement,
+                verify=args.verify_copies,
+                max_workers=args.placement_workers,
+                transcode=transcode,
             )
         else:
             organize(
@@ -568,7 +865,12 @@ def main():
                 args.brand,
                 args.rotate_cities,
                 args.use_semantic_keywords,
+                placement=args.placement,
+                verify=args.verify_copies,
+                max_workers=args.placement_workers,
+                transcode=transcode,
             )
+        PROFILER.end("organize")
     else:
         print("Dry run complete. See _work folder for JSON outputs.")
 
@@ -579,6 +881,10 @@ def main():
     # Print clustering statistics at the end (using final counts after singleton assignment)
     print_clustering_stats(summary, final_gps_count, final_non_gps_count)
 
+    PROFILER.write(work_dir / "profile.json")
+    PROFILER.print_summary()
+    print(f"⏱️  Profile report → {work_dir / 'profile.json'}")
+
 
 if __name__ == "__main__":
     # Inline defaults so you can press Run without typing CLI args
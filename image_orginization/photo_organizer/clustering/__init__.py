@@ -1,21 +1,31 @@
-"""Clustering algorithms for grouping similar photos."""
-
-from .gps import cluster_gps_only
-from .fused import fused_cluster
-from .temporal import (
-    cluster_temporal,
-    cluster_phash_only,
-    phash_median,
-    phash_score,
-    time_score,
-)
-
-__all__ = [
-    "cluster_gps_only",
-    "fused_cluster",
-    "cluster_temporal",
-    "cluster_phash_only",
-    "phash_median",
-    "phash_score",
-    "time_score",
-]
+"""Clustering algorithms for grouping similar photos.
+
+Submodules load on first attribute access (PEP 562).
+"""
+
+import importlib
+
+_EXPORTS = {
+    "cluster_gps_only": "gps",
+    "fused_cluster": "fused",
+    "cluster_temporal": "temporal",
+    "cluster_phash_only": "temporal",
+    "phash_median": "temporal",
+    "phash_score": "temporal",
+    "time_score": "temporal",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -11,9 +11,11 @@ Expected EXIF Data Structures (from utils.exif):
       → None if hash unavailable
 """
 
+from bisect import bisect_left, bisect_right
 from collections import defaultdict, deque
 from typing import List, Dict
 from ..config import (
+    DEFAULT_TIME_GAP_MINUTES,
     WEIGHT_TIME_WITH_DATETIME,
     WEIGHT_FILENAME_WITH_DATETIME,
     WEIGHT_HASH_WITH_DATETIME,
@@ -23,6 +25,7 @@ from ..config import (
 )
 from ..models import Item, NameFeat
 from ..utils.filename import filename_score
+from ..utils.profiling import timed
 from .temporal import phash_score, time_score
 
 
@@ -73,21 +76,26 @@ def fuse_score(
     return hash_similarity
 
 
+@timed()
 def fused_cluster(
     items: List[Item],
     name_features_map: Dict[str, NameFeat],
     fuse_threshold: float = 0.75,
     max_edges_per_node: int = 40,
+    time_gap_minutes: int = DEFAULT_TIME_GAP_MINUTES,
 ) -> List[List[Item]]:
     """Build similarity graph using fused score and return connected components.
 
-    To keep it fast on hundreds of images, only connect each node to its top-K neighbors.
+    To keep it fast on hundreds of images, only score candidate pairs and connect each
+    node to its top-K neighbors. Candidates are the union of a filename-number window
+    (per prefix bucket) and a timestamp sweep (photos within time_gap_minutes).
 
     Args:
         items: List of items to cluster
         name_features_map: Dictionary mapping item IDs to NameFeat objects
         fuse_threshold: Minimum similarity score to connect items (default: 0.75)
         max_edges_per_node: Maximum connections per item (default: 20)
+        time_gap_minutes: Time window of the timestamp sweep (default: DEFAULT_TIME_GAP_MINUTES)
 
     Returns:
         List of clusters (connected components)
@@ -95,15 +103,15 @@ def fused_cluster(
     if not items:
         return []
 
-    # Index by simple buckets to prune comparisons: same prefix bucket
-    prefix_buckets = defaultdict(list)
-    for item in items:
-        prefix_buckets[name_features_map[item.id].prefix].append(item)
+    # Sliding window: check ±window_size neighbors in sorted order
+    # Sequential files cluster immediately, no need to check all photos
+    window_size = max_edges_per_node * 2  # e.g., 32*2 = 64 neighbors each direction
 
-    adjacency_graph: Dict[str, List[str]] = defaultdict(list)
+    # Candidate pairs from two generators, unioned per item (insertion-ordered)
+    candidates: Dict[str, Dict[str, Item]] = defaultdict(dict)
 
-    def consider_items_in_bucket(items_in_bucket: List[Item]):
-        """Compute pairwise scores using pre-sorted sliding window (OPTIMIZED).
+    def add_filename_candidates(items_in_bucket: List[Item]):
+        """Pair each photo with its neighbors by filename number (OPTIMIZED).
 
         Performance improvement:
         - OLD: O(n² log n) - sort n times for n photos
@@ -111,9 +119,6 @@ def fused_cluster(
 
         For 300 photos: 90,000 ops → 2,400 ops (37x faster!)
         """
-        if not items_in_bucket:
-            return
-
         # OPTIMIZATION: Pre-sort bucket ONCE by filename number
         # Sequential filenames (IMG_55, IMG_56, IMG_57) will be adjacent
         sorted_items = sorted(
@@ -124,38 +129,49 @@ def fused_cluster(
                 else float("inf")
             ),
         )
-
-        # Sliding window: check ±window_size neighbors in sorted list
-        # Sequential files cluster immediately, no need to check all photos
-        window_size = max_edges_per_node * 2  # e.g., 32*2 = 64 neighbors each direction
-
         for i, current_item in enumerate(sorted_items):
-            # Only check nearby photos in sorted list
             start_idx = max(0, i - window_size)
             end_idx = min(len(sorted_items), i + window_size + 1)
-            candidate_items = sorted_items[start_idx:end_idx]
-
-            scored_candidates = []
-            for candidate_item in candidate_items:
-                if current_item.id == candidate_item.id:
-                    continue
-
-                similarity_score = fuse_score(
-                    current_item, candidate_item, name_features_map
-                )
-                scored_candidates.append((similarity_score, candidate_item))
-
-            scored_candidates.sort(reverse=True, key=lambda scored_pair: scored_pair[0])
-            for similarity_score, candidate_item in scored_candidates[
-                :max_edges_per_node
-            ]:
-                if similarity_score >= fuse_threshold:
-                    adjacency_graph[current_item.id].append(candidate_item.id)
-                    adjacency_graph[candidate_item.id].append(current_item.id)
+            for candidate_item in sorted_items[start_idx:end_idx]:
+                if candidate_item.id != current_item.id:
+                    candidates[current_item.id][candidate_item.id] = candidate_item
+
+    def add_time_candidates(dated_items: List[Item]):
+        """Pair each photo with photos taken within time_gap_minutes.
 
+        Sweep in timestamp order across ALL prefixes, so a phone shot and a
+        DSLR shot from the same minute get compared even though their names
+        never share a bucket. Capped at ±window_size neighbors: O(n·w).
+        """
+        sorted_items = sorted(dated_items, key=lambda x: x.dt)
+        times = [it.dt.timestamp() for it in sorted_items]
+        gap_seconds = time_gap_minutes * 60
+        for i, current_item in enumerate(sorted_items):
+            start_idx = max(bisect_left(times, times[i] - gap_seconds), i - window_size)
+            end_idx = min(bisect_right(times, times[i] + gap_seconds), i + window_size + 1)
+            for candidate_item in sorted_items[start_idx:end_idx]:
+                if candidate_item.id != current_item.id:
+                    candidates[current_item.id][candidate_item.id] = candidate_item
+
+    # Index by simple buckets to prune comparisons: same prefix bucket
+    prefix_buckets = defaultdict(list)
+    for item in items:
+        prefix_buckets[name_features_map[item.id].prefix].append(item)
     for items_in_bucket in prefix_buckets.values():
-        # Light heuristic: also try a global pool for empty/short prefixes
-        consider_items_in_bucket(items_in_bucket)
+        add_filename_candidates(items_in_bucket)
+    add_time_candidates([item for item in items if item.dt is not None])
+
+    adjacency_graph: Dict[str, List[str]] = defaultdict(list)
+    for current_item in items:
+        scored_candidates = [
+            (fuse_score(current_item, candidate_item, name_features_map), candidate_item)
+            for candidate_item in candidates[current_item.id].values()
+        ]
+        scored_candidates.sort(reverse=True, key=lambda scored_pair: scored_pair[0])
+        for similarity_score, candidate_item in scored_candidates[:max_edges_per_node]:
+            if similarity_score >= fuse_threshold:
+                adjacency_graph[current_item.id].append(candidate_item.id)
+                adjacency_graph[candidate_item.id].append(current_item.id)
 
     # Connected components over adjacency graph; include isolated nodes
     item_id_to_item = {item.id: item for item in items}
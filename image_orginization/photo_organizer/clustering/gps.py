@@ -15,8 +15,10 @@ Expected EXIF Data Structures (from utils.exif):
 from typing import List
 from ..models import Item, DSU
 from ..utils.geo import meters_between
+from ..utils.profiling import timed
 
 
+@timed()
 def cluster_gps_only(items: List[Item], max_meters: float = 300):
     """Cluster items strictly by GPS location threshold, ignoring time.
 
@@ -7,6 +7,7 @@ import numpy as np
 import imagehash
 from ..models import Item
 from ..config import DEFAULT_TIME_GAP_MINUTES
+from ..utils.profiling import timed
 
 
 def phash_score(
@@ -81,6 +82,7 @@ def phash_median(hashes) -> Optional[imagehash.ImageHash]:
     return imagehash.ImageHash(median_hash_array)
 
 
+@timed()
 def cluster_temporal(
     items: List[Item], time_gap_min: int, hash_threshold: int
 ) -> List[List[Item]]:
@@ -141,6 +143,7 @@ def cluster_temporal(
     return clusters
 
 
+@timed()
 def cluster_phash_only(items: List[Item], hash_threshold: int = 6) -> List[List[Item]]:
     """Cluster photos using ONLY perceptual hash similarity (visual similarity).
 
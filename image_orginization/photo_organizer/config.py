@@ -47,6 +47,11 @@ CITIES = {
     "tacoma": (47.2529, -122.4443),
 }
 
+# Optional gazetteer (CSV with name,lat,lon header or GeoNames .txt) used instead
+# of CITIES for GPS → city lookup; CITIES still drives the no-GPS rotation
+CITY_GAZETTEER = None
+CITY_MEMO_DECIMALS = 3  # Memoise city lookups by coordinate rounded to ~110 m
+
 #
 # 🤖 AI CONFIGURATION
 #
@@ -58,6 +63,20 @@ API_RATE_LIMIT_DELAY = 1.0  # Seconds between API calls (0 = no delay)
 MAX_RETRIES = 3
 RETRY_DELAY = 5.0  # Seconds before retry after rate limit
 
+# Token-aware batch planning
+DEFAULT_BATCH_TOKEN_BUDGET = 0  # Target prompt tokens per batch (0 = fixed --batch-size)
+MAX_IMAGES_PER_BATCH = 50  # Hard cap on images per batch when packing by tokens
+PROMPT_OVERHEAD_TOKENS = 1800  # Approx. tokens for the system/user classification prompt
+OUTPUT_TOKENS_PER_IMAGE = 40  # Approx. completion tokens per classified image
+
+# USD per 1M tokens: (input, output)
+MODEL_PRICING = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
 #
 # 📸 CLUSTERING PARAMETERS
 #
@@ -387,6 +406,38 @@ SUPPORTED_EXTS = {
 
 # Execution defaults
 DEFAULT_DRY_RUN = False
+DEFAULT_PIPELINE = True  # Classify GPS clusters in the background during fused clustering
+
+# Duplicate collapsing (before clustering)
+DEFAULT_DEDUPE = True  # Cluster/classify one representative per duplicate group
+DEDUPE_PHASH_DISTANCE = 2  # Max pHash distance for near duplicates (-1 = exact only)
+
+# Content hashing (duplicate detection, copy verification)
+DEFAULT_HASH_ALGORITHM = "blake2b"  # md5 | sha1 | sha256 | blake2b | blake2s | xxh3_128 (needs xxhash)
+HASH_WORKERS = 8  # Threads for batch hashing
+
+# File placement (organize step)
+DEFAULT_PLACEMENT = "copy"  # copy | hardlink | reflink | symlink | move (falls back to copy)
+PLACEMENT_MAX_WORKERS = 0  # Copy threads (0 = auto: 4x CPU cores, max 32)
+PLACEMENT_JOURNAL = "placement_journal.jsonl"  # Append-only log in the output dir
+DEFAULT_VERIFY_COPIES = False  # Hash while copying and re-read to verify
+
+# HEIC/HEIF output transcoding (organize step)
+DEFAULT_TRANSCODE_HEIC = "jpeg"  # off | jpeg | webp | avif ("off" places original HEIC bytes)
+TRANSCODE_QUALITY = 85  # Encoder quality (1-100)
+TRANSCODE_MAX_PX = 0  # Longest side in pixels (0 = keep original size)
+TRANSCODE_KEEP_EXIF = True  # Keep EXIF (orientation is baked into pixels)
+TRANSCODE_WORKERS = 0  # Encoder processes (0 = CPU count)
+
+# Watch mode (photo_organizer.cli watch)
+WATCH_INTERVAL_SECONDS = 2.0  # Rescan period (watchdog, if installed, wakes the scan early)
+WATCH_SETTLE_SECONDS = 1.0  # A file must be unchanged this long before ingest (half-copied files)
+WATCH_FILENAME_WINDOW = 10  # Same-prefix shots within ±N numbers are assignment candidates
+WATCH_STATE = "watch_state.json"  # Cluster/index state in _work
+
+# Sharded runs (--shards N): per-shard ingest + clustering, then a merge
+DEFAULT_SHARD_BY = "dir"  # dir (top-level folders, split when large) | date (file mtime ranges)
+SHARD_DIR = "shards"  # Shard plan and per-shard results in _work
 
 # Advanced: Unified matching (only used if DEFAULT_ASSIGN_SINGLETONS = True)
 ENABLE_UNIFIED_MATCHING = False
@@ -0,0 +1,207 @@
+"""Duplicate collapsing between ingest and clustering.
+
+Libraries often hold the same photo several times (AirDrop copies, "(1)"
+exports, re-saved edits). Only one representative per duplicate group goes
+through clustering and classification; afterwards the duplicates are put back
+next to their representative and inherit its label and strategy.
+
+Two kinds of duplicates:
+    exact  byte-identical files (size → partial hash → full hash)
+    near   pHash Hamming distance ≤ DEDUPE_PHASH_DISTANCE between every pair
+           of members (no chaining), candidates found with a
+           multi-index: the 64-bit hash is split into distance+1 chunks, and
+           by pigeonhole two hashes within the distance share at least one
+           chunk exactly, so only items sharing a chunk bucket are compared
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from .config import DEDUPE_PHASH_DISTANCE, HASH_WORKERS
+from .models import DSU, Item
+from .utils.hashing import find_duplicate_files
+from .utils.profiling import timed
+
+HASH_BITS = 64
+
+
+def _phash_int(item: Item) -> int:
+    return int(str(item.h), 16)
+
+
+def _chunks(value: int, parts: int) -> List[Tuple[int, int]]:
+    """Split a 64-bit hash into `parts` (index, chunk value) keys."""
+    keys = []
+    start = 0
+    for i in range(parts):
+        width = HASH_BITS // parts + (1 if i < HASH_BITS % parts else 0)
+        keys.append((i, (value >> start) & ((1 << width) - 1)))
+        start += width
+    return keys
+
+
+def _representative_key(item: Item):
+    """Prefer GPS, then timestamp, then largest file, then shortest name."""
+    try:
+        size = item.path.stat().st_size
+    except OSError:
+        size = 0
+    return (item.gps is None, item.dt is None, -size, len(item.path.name), item.id)
+
+
+def find_duplicate_groups(
+    items: List[Item],
+    phash_distance: int = DEDUPE_PHASH_DISTANCE,
+    max_workers: int = HASH_WORKERS,
+) -> List[Tuple[List[Item], str]]:
+    """Group exact and near-duplicate items.
+
+    Args:
+        items: Ingested items
+        phash_distance: Max pHash Hamming distance for near duplicates (<0 disables)
+        max_workers: Threads for content hashing
+
+    Returns:
+        List of (items in group, "exact" | "near"), groups of 2+ only
+    """
+    index = {id(it): i for i, it in enumerate(items)}
+    dsu = DSU(len(items))
+
+    # 1) Byte-identical files
+    by_path = {it.path: it for it in items}
+    for paths in find_duplicate_files(by_path.keys(), max_workers=max_workers):
+        first = index[id(by_path[paths[0]])]
+        for p in paths[1:]:
+            other = index[id(by_path[p])]
+            dsu.union(first, other)
+
+    # 2) Near-identical by pHash (multi-index buckets). Not transitive: two
+    #    groups merge only if every pair of members is within the distance
+    #    (closest pairs first), so a burst or slow pan can't chain together
+    #    frames that are far apart
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(items)):
+        groups[dsu.find(i)].append(i)
+    near_roots = set()
+    if phash_distance >= 0:
+        hashes = {i: _phash_int(it) for i, it in enumerate(items) if it.h is not None}
+        buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, value in hashes.items():
+            for key in _chunks(value, phash_distance + 1):
+                buckets[key].append(i)
+
+        def distance(a: int, b: int) -> int:
+            return bin(hashes[a] ^ hashes[b]).count("1")
+
+        pairs = set()
+        for members in buckets.values():
+            for a_pos, a in enumerate(members):
+                for b in members[a_pos + 1 :]:
+                    if distance(a, b) <= phash_distance:
+                        pairs.add((min(a, b), max(a, b)))
+
+        for a, b in sorted(pairs, key=lambda pair: (distance(*pair), pair)):
+            ra, rb = dsu.find(a), dsu.find(b)
+            if ra == rb:
+                continue
+            if any(
+                distance(x, y) > phash_distance
+                for x in groups[ra]
+                if x in hashes
+                for y in groups[rb]
+                if y in hashes
+            ):
+                continue
+            dsu.union(a, b)
+            root = dsu.find(a)
+            groups[root] = sorted(groups.pop(ra) + groups.pop(rb))
+            near_roots.discard(ra)
+            near_roots.discard(rb)
+            near_roots.add(root)
+
+    result = []
+    for root, members in sorted(groups.items(), key=lambda g: g[1][0]):
+        if len(members) < 2:
+            continue
+        kind = "near" if root in near_roots else "exact"
+        result.append(([items[m] for m in members], kind))
+    return result
+
+
+@timed()
+def collapse_duplicates(
+    items: List[Item],
+    phash_distance: int = DEDUPE_PHASH_DISTANCE,
+    max_workers: int = HASH_WORKERS,
+) -> Tuple[List[Item], Dict[str, List[Item]], List[Dict]]:
+    """Keep one representative per duplicate group.
+
+    Args:
+        items: Ingested items
+        phash_distance: Max pHash Hamming distance for near duplicates
+        max_workers: Threads for content hashing
+
+    Returns:
+        Tuple of:
+            - representatives + unique items (input order)
+            - {representative id: [duplicate items]}
+            - JSON-ready duplicate group records
+    """
+    duplicates: Dict[str, List[Item]] = {}
+    records: List[Dict] = []
+    dropped = set()
+
+    for group, kind in find_duplicate_groups(items, phash_distance, max_workers):
+        rep = min(group, key=_representative_key)
+        dups = [it for it in group if it is not rep]
+        duplicates[rep.id] = dups
+        dropped.update(id(it) for it in dups)
+        records.append(
+            {
+                "representative": rep.id,
+                "kind": kind,
+                "duplicates": [it.id for it in dups],
+            }
+        )
+
+    kept = [it for it in items if id(it) not in dropped]
+    if duplicates:
+        exact = sum(len(r["duplicates"]) for r in records if r["kind"] == "exact")
+        print(
+            f"🧬 Collapsed {len(dropped)} duplicates into {len(duplicates)} representatives "
+            f"({exact} in exact groups, {len(dropped) - exact} in near groups)"
+        )
+    return kept, duplicates, records
+
+
+def expand_duplicates(
+    groups: List[List[Item]],
+    duplicates: Dict[str, List[Item]],
+    labels: Dict[str, Dict],
+) -> List[List[Item]]:
+    """Put duplicates back after their representative; copy label and strategy.
+
+    Args:
+        groups: Final clusters of representatives
+        duplicates: {representative id: [duplicate items]}
+        labels: Labels by item id (updated in place for duplicates)
+
+    Returns:
+        Clusters including duplicates
+    """
+    if not duplicates:
+        return groups
+
+    expanded = []
+    for group in groups:
+        out = []
+        for it in group:
+            out.append(it)
+            for dup in duplicates.get(it.id, []):
+                if hasattr(it, "strategy"):
+                    dup.strategy = it.strategy
+                if it.id in labels:
+                    labels[dup.id] = dict(labels[it.id])
+                out.append(dup)
+        expanded.append(out)
+    return expanded
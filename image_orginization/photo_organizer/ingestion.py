@@ -7,8 +7,19 @@ from .models import Item
 from .config import SUPPORTED_EXTS, THUMBNAIL_SIZE
 from .utils.image import register_heif, ensure_thumb, phash
 from .utils.exif import read_exif_batch
+from .utils.profiling import PROFILER, timed
 
 
+def find_images(input_dir: Path) -> List[Path]:
+    """All supported image files under input_dir (recursive)."""
+    return [
+        p
+        for p in input_dir.rglob("*")
+        if p.is_file() and p.suffix.lower() in SUPPORTED_EXTS
+    ]
+
+
+@timed()
 def ingest(input_dir: Path, work_dir: Path, max_workers: int = 8) -> List[Item]:
     """Ingest photos from input directory, creating thumbnails and extracting metadata.
 
@@ -25,16 +36,20 @@ def ingest(input_dir: Path, work_dir: Path, max_workers: int = 8) -> List[Item]:
     Returns:
         List of Item objects with extracted metadata
     """
+    return ingest_files(find_images(input_dir), work_dir, max_workers)
+
+
+def ingest_files(
+    files: List[Path], work_dir: Path, max_workers: int = 8
+) -> List[Item]:
+    """Ingest specific files (thumbnail, EXIF, pHash); see ingest().
+
+    Used directly by watch mode to ingest only new or changed files.
+    """
     register_heif()
     thumbs_dir = work_dir / "thumbs"
     thumbs_dir.mkdir(parents=True, exist_ok=True)
 
-    files = [
-        p
-        for p in input_dir.rglob("*")
-        if p.is_file() and p.suffix.lower() in SUPPORTED_EXTS
-    ]
-
     # Step 1: Create thumbnails (sequential because it's CPU/disk intensive)
     valid_files = []
     for p in tqdm(files, desc="Creating thumbnails", unit="img"):
@@ -44,6 +59,7 @@ def ingest(input_dir: Path, work_dir: Path, max_workers: int = 8) -> List[Item]:
             valid_files.append(p)
         except Exception as e:
             print(f"[warn] thumb failed for {p.name}: {e}")
+    PROFILER.count("files", len(valid_files))
 
     # Step 2: Extract EXIF data concurrently (much faster!)
     print(
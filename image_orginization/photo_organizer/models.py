@@ -3,8 +3,10 @@
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
-import imagehash
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:  # imagehash pulls in numpy/scipy/PIL; only needed for typing
+    import imagehash
 
 
 @dataclass
@@ -26,7 +28,33 @@ class Item:
     thumb: Path
     dt: Optional[datetime]
     gps: Optional[Tuple[float, float]]
-    h: Optional[imagehash.ImageHash]
+    h: Optional["imagehash.ImageHash"]
+
+
+def item_to_dict(item: Item) -> Dict:
+    """JSON-ready form of an Item (watch state, shard results)."""
+    return {
+        "id": item.id,
+        "path": str(item.path),
+        "thumb": str(item.thumb),
+        "dt": item.dt.isoformat() if item.dt else None,
+        "gps": list(item.gps) if item.gps else None,
+        "phash": str(item.h) if item.h is not None else None,
+    }
+
+
+def item_from_dict(data: Dict) -> Item:
+    """Inverse of item_to_dict()."""
+    import imagehash
+
+    return Item(
+        id=data["id"],
+        path=Path(data["path"]),
+        thumb=Path(data["thumb"]),
+        dt=datetime.fromisoformat(data["dt"]) if data["dt"] else None,
+        gps=tuple(data["gps"]) if data["gps"] else None,
+        h=imagehash.hex_to_hash(data["phash"]) if data["phash"] else None,
+    )
 
 
 class DSU:
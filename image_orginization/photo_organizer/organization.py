@@ -1,9 +1,8 @@
 """Photo organization and renaming logic."""
 
 import json
-import shutil
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from slugify import slugify
 from .models import Item
 from .config import (
@@ -13,8 +12,13 @@ from .config import (
     SURFACE_MAP,
     SEMANTIC_KEYWORDS,
     USE_SEMANTIC_KEYWORDS,
+    DEFAULT_PLACEMENT,
+    DEFAULT_VERIFY_COPIES,
+    PLACEMENT_MAX_WORKERS,
 )
-from .utils.geo import nearest_city
+from .placement import PlacementEngine
+from .transcode import TranscodeOptions
+from .utils.geo import nearest_city, nearest_cities
 
 
 def extract_surface_from_descriptor(descriptor: str, label_words: set) -> str:
@@ -43,6 +47,84 @@ def extract_surface_from_descriptor(descriptor: str, label_words: set) -> str:
     return ""
 
 
+def cluster_folder(grp: List[Item], labels: Dict[str, Dict], city: str):
+    """Folder name for a multi-image cluster.
+
+    Args:
+        grp: Items in the cluster
+        labels: Classification labels by item id
+        city: City for the folder name
+
+    Returns:
+        Tuple of (folder name, majority label, surface noun or None)
+    """
+    # Get classification label (majority vote)
+    votes: Dict[str, int] = {}
+    for it in grp:
+        lab = labels.get(it.id, {}).get("label", "unknown")
+        votes[lab] = votes.get(lab, 0) + 1
+
+    label = max(votes, key=votes.get) if votes else "unknown"
+
+    # Smart disambiguation: Add surface noun only for generic primaries
+    # Check if primary is generic and needs a surface noun
+    surface = None
+    if label in GENERIC_PRIMARIES:
+        label_words = set(label.split("-"))
+
+        # Try to extract surface from AI descriptors in this group
+        for it in grp:
+            item_labels = labels.get(it.id, {})
+            descriptor = item_labels.get("descriptor", "")
+
+            if descriptor:
+                surface = extract_surface_from_descriptor(descriptor, label_words)
+                if surface:
+                    break  # Found a surface noun
+
+        # Fallback to SURFACE_MAP if configured
+        if not surface:
+            surface_candidate = SURFACE_MAP.get(label, "")
+            if surface_candidate and surface_candidate not in label_words:
+                surface = surface_candidate
+
+    # Build folder name
+    if surface:
+        # Generic primary + surface: decorative-concrete-steps-bellevue
+        folder_name = f"{slugify(label, lowercase=True)}-{slugify(surface, lowercase=True)}-{slugify(city, lowercase=True)}"
+    else:
+        # Specific primary (no surface): stamped-concrete-driveway-bellevue
+        folder_name = (
+            f"{slugify(label, lowercase=True)}-{slugify(city, lowercase=True)}"
+        )
+    return folder_name, label, surface
+
+
+def semantic_variants_for(label: str, use_semantic_keywords: bool) -> List[str]:
+    """Keyword variants to rotate through for a label (just the label if disabled)."""
+    if use_semantic_keywords:
+        return SEMANTIC_KEYWORDS.get(label, [label]) or [label]
+    return [label]
+
+
+def seo_basename(
+    keyword: str, surface: Optional[str], city: str, brand: str, idx: int
+) -> str:
+    """Build {keyword}[-{surface}]-{city}-{brand}-{index} (no extension).
+
+    Example: stamped-concrete-driveway-bellevue-rc-concrete-01
+    """
+    parts = [slugify(keyword, lowercase=True)]
+    # Add surface only if needed (generic primary)
+    if surface:
+        parts.append(slugify(surface, lowercase=True))
+    parts.append(slugify(city, lowercase=True))
+    if brand:
+        parts.append(slugify(brand, lowercase=True))
+    parts.append(f"{idx:02d}")
+    return "-".join(parts)
+
+
 def organize(
     groups: List[List[Item]],
     labels: Dict[str, Dict],
@@ -50,6 +132,10 @@ def organize(
     brand: str,
     rotate_cities: bool,
     use_semantic_keywords: bool = USE_SEMANTIC_KEYWORDS,
+    placement: str = DEFAULT_PLACEMENT,
+    verify: bool = DEFAULT_VERIFY_COPIES,
+    max_workers: int = PLACEMENT_MAX_WORKERS,
+    transcode: Optional[TranscodeOptions] = None,
 ):
     """
     Gets the cluster label from AI classification
@@ -57,12 +143,19 @@ def organize(
     Loops through each photo in the cluster
     Rotates through semantic variants: variant_idx = (idx - 1) % len(semantic_variants)
     Builds filename: {keyword}[-{surface}]-{city}-{brand}-{index}.jpg
-    Copies files and creates manifest
+    Places files in parallel (copy/hardlink/reflink/symlink/move, journaled,
+    resumable) and creates manifest
     """
     out_dir.mkdir(parents=True, exist_ok=True)
     cycle = list(CITIES.keys())
 
-    manifest = []
+    engine = PlacementEngine(
+        out_dir,
+        mode=placement,
+        verify=verify,
+        max_workers=max_workers,
+        transcode=transcode,
+    )
 
     # Separate multi-image clusters from singletons
     multi_clusters = [grp for grp in groups if len(grp) > 1]
@@ -77,14 +170,6 @@ def organize(
 
     # Process multi-image clusters (each gets its own folder)
     for gi, grp in enumerate(multi_clusters, start=1):
-        # Get classification label (majority vote)
-        votes: Dict[str, int] = {}
-        for it in grp:
-            lab = labels.get(it.id, {}).get("label", "unknown")
-            votes[lab] = votes.get(lab, 0) + 1
-
-        label = max(votes, key=votes.get) if votes else "unknown"
-
         # Determine city
         gps_any = next((it.gps for it in grp if it.gps), None)
         city = nearest_city(
@@ -93,49 +178,13 @@ def organize(
             gi - 1,
         )
 
-        # Smart disambiguation: Add surface noun only for generic primaries
-        # Check if primary is generic and needs a surface noun
-        surface = None
-        if label in GENERIC_PRIMARIES:
-            label_words = set(label.split("-"))
-
-            # Try to extract surface from AI descriptors in this group
-            for it in grp:
-                item_labels = labels.get(it.id, {})
-                descriptor = item_labels.get("descriptor", "")
-
-                if descriptor:
-                    surface = extract_surface_from_descriptor(descriptor, label_words)
-                    if surface:
-                        break  # Found a surface noun
-
-            # Fallback to SURFACE_MAP if configured
-            if not surface:
-                surface_candidate = SURFACE_MAP.get(label, "")
-                if surface_candidate and surface_candidate not in label_words:
-                    surface = surface_candidate
-
-        # Build folder name
-        if surface:
-            # Generic primary + surface: decorative-concrete-steps-bellevue
-            folder_name = f"{slugify(label, lowercase=True)}-{slugify(surface, lowercase=True)}-{slugify(city, lowercase=True)}"
-        else:
-            # Specific primary (no surface): stamped-concrete-driveway-bellevue
-            folder_name = (
-                f"{slugify(label, lowercase=True)}-{slugify(city, lowercase=True)}"
-            )
-
+        # Majority label; generic primaries get a surface noun
+        folder_name, label, surface = cluster_folder(grp, labels, city)
         folder = out_dir / folder_name
         folder.mkdir(parents=True, exist_ok=True)
 
         # Get semantic keyword variants for this label (if enabled)
-        if use_semantic_keywords:
-            semantic_variants = SEMANTIC_KEYWORDS.get(label, [label])
-            if not semantic_variants:
-                semantic_variants = [label]
-        else:
-            # Use only the primary label
-            semantic_variants = [label]
+        semantic_variants = semantic_variants_for(label, use_semantic_keywords)
 
         # Process each photo in the group
         for idx, it in enumerate(grp, start=1):
@@ -148,41 +197,15 @@ def organize(
             # Example: stamped-concrete-driveway-bellevue-rc-concrete-01.jpg
             # Example: imprinted-concrete-driveway-bellevue-rc-concrete-02.jpg (semantic variant)
             # Example: decorative-concrete-steps-bellevue-rc-concrete-01.jpg
-            parts = []
-
-            # Add keyword (primary or semantic variant)
-            parts.append(slugify(current_keyword, lowercase=True))
-
-            # Add surface only if needed (generic primary)
-            if surface:
-                parts.append(slugify(surface, lowercase=True))
-
-            # Add city
-            parts.append(slugify(city, lowercase=True))
-
-            # Add brand
-            if brand:
-                parts.append(slugify(brand, lowercase=True))
-
-            # Add index
-            parts.append(f"{idx:02d}")
-
-            base = "-".join(parts)
-            ext = it.path.suffix.lower()
-
-            # Convert HEIC/HEIF to JPG extension
-            if ext in {".heic", ".heif"}:
-                ext = ".jpg"
+            base = seo_basename(current_keyword, surface, city, brand, idx)
+            # HEIC/HEIF become .jpg/.webp/.avif when transcoding
+            ext = engine.output_ext(it.path)
 
             dst = folder / f"{base}{ext}"
 
-            try:
-                shutil.copy2(it.path, dst)
-            except Exception as e:
-                print(f"[warn] copy failed {it.path.name}: {e}")
-                continue
-
-            manifest.append(
+            engine.submit(
+                it.path,
+                dst,
                 {
                     "src": str(it.path),
                     "dst": str(dst),
@@ -191,17 +214,19 @@ def organize(
                     "semantic_keyword": current_keyword,
                     "city": city,
                     "index": idx,
-                }
+                },
             )
 
     # Process singletons - group by city into misc folders
     if singleton_clusters:
         # Group singletons by city
         singletons_by_city: Dict[str, List[Item]] = {}
-        for grp in singleton_clusters:
+        singleton_cities = nearest_cities(
+            [grp[0].gps for grp in singleton_clusters],
+            cycle if rotate_cities else CITIES,
+        )
+        for grp, city in zip(singleton_clusters, singleton_cities):
             it = grp[0]  # Only one item per singleton cluster
-            gps_any = it.gps
-            city = nearest_city(gps_any, cycle if rotate_cities else CITIES, 0)
             if city not in singletons_by_city:
                 singletons_by_city[city] = []
             singletons_by_city[city].append(it)
@@ -221,43 +246,22 @@ def organize(
                 descriptor = labels.get(it.id, {}).get("descriptor", "")
 
                 # Get semantic keyword variants (if enabled)
-                if use_semantic_keywords:
-                    semantic_variants = SEMANTIC_KEYWORDS.get(label, [label])
-                    if not semantic_variants:
-                        semantic_variants = [label]
-                else:
-                    semantic_variants = [label]
+                semantic_variants = semantic_variants_for(label, use_semantic_keywords)
 
                 # Rotate through semantic variants
                 variant_idx = (idx - 1) % len(semantic_variants)
                 current_keyword = semantic_variants[variant_idx]
 
                 # Build filename: {keyword}-{city}-{brand}-{index}
-                parts = []
-                parts.append(slugify(current_keyword, lowercase=True))
-                parts.append(slugify(city, lowercase=True))
-
-                if brand:
-                    parts.append(slugify(brand, lowercase=True))
-
-                parts.append(f"{idx:02d}")
-
-                base = "-".join(parts)
-                ext = it.path.suffix.lower()
-
-                # Convert HEIC/HEIF to JPG extension
-                if ext in {".heic", ".heif"}:
-                    ext = ".jpg"
+                base = seo_basename(current_keyword, None, city, brand, idx)
+                # HEIC/HEIF become .jpg/.webp/.avif when transcoding
+                ext = engine.output_ext(it.path)
 
                 dst = folder / f"{base}{ext}"
 
-                try:
-                    shutil.copy2(it.path, dst)
-                except Exception as e:
-                    print(f"[warn] copy failed {it.path.name}: {e}")
-                    continue
-
-                manifest.append(
+                engine.submit(
+                    it.path,
+                    dst,
                     {
                         "src": str(it.path),
                         "dst": str(dst),
@@ -266,9 +270,11 @@ def organize(
                         "semantic_keyword": current_keyword,
                         "city": city,
                         "index": idx,
-                    }
+                    },
                 )
 
+    manifest = engine.finish()
+
     # Write manifest
     with open(out_dir / "manifest.json", "w", encoding="utf-8") as f:
         json.dump(manifest, f, indent=2)
@@ -9,15 +9,21 @@ This module handles the final organization step for name-only mode:
 """
 
 import json
-import shutil
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from collections import defaultdict
 from slugify import slugify
 
 from .models import Item
-from .config import CITIES
-from .utils.geo import nearest_city
+from .config import (
+    CITIES,
+    DEFAULT_PLACEMENT,
+    DEFAULT_VERIFY_COPIES,
+    PLACEMENT_MAX_WORKERS,
+)
+from .placement import PlacementEngine
+from .transcode import TranscodeOptions
+from .utils.geo import nearest_city, nearest_cities
 
 
 def organize_name_only(
@@ -26,6 +32,10 @@ def organize_name_only(
     out_dir: Path,
     brand: str,
     rotate_cities: bool,
+    placement: str = DEFAULT_PLACEMENT,
+    verify: bool = DEFAULT_VERIFY_COPIES,
+    max_workers: int = PLACEMENT_MAX_WORKERS,
+    transcode: Optional[TranscodeOptions] = None,
 ):
     """Organize photos using SEO-optimized filenames from AI.
 
@@ -42,11 +52,21 @@ def organize_name_only(
         out_dir: Output directory for organized photos
         brand: Brand name to add to filenames
         rotate_cities: Whether to rotate cities if no GPS
+        placement: copy | hardlink | reflink | symlink | move
+        verify: Hash-verify each copy
+        max_workers: Copy threads (0 = auto)
+        transcode: HEIC/HEIF output format options (default: config)
     """
     out_dir.mkdir(parents=True, exist_ok=True)
     cycle = list(CITIES.keys())
 
-    manifest = []
+    engine = PlacementEngine(
+        out_dir,
+        mode=placement,
+        verify=verify,
+        max_workers=max_workers,
+        transcode=transcode,
+    )
 
     # Separate small and large clusters
     large_clusters = [grp for grp in groups if len(grp) > 2]
@@ -99,22 +119,16 @@ def organize_name_only(
                 final_base = base
                 folder_filenames[folder_name][base] = 1
 
-            # Get file extension
-            ext = it.path.suffix.lower()
-            if ext in {".heic", ".heif"}:
-                ext = ".jpg"
+            # Get file extension (HEIC/HEIF become .jpg/.webp/.avif when transcoding)
+            ext = engine.output_ext(it.path)
 
             dst = folder / f"{final_base}{ext}"
 
-            # Copy file
-            try:
-                shutil.copy2(it.path, dst)
-                print(f"     ✓ {dst.name}")
-            except Exception as e:
-                print(f"     ✗ Failed to copy {it.path.name}: {e}")
-                continue
-
-            manifest.append(
+            # Copy file (in the background)
+            print(f"     → {dst.name}")
+            engine.submit(
+                it.path,
+                dst,
                 {
                     "src": str(it.path),
                     "dst": str(dst),
@@ -122,7 +136,7 @@ def organize_name_only(
                     "seo_filename": seo_filename,
                     "city": city,
                     "folder": folder_name,
-                }
+                },
             )
 
     # Process small clusters - group ALL by city into misc folders
@@ -134,11 +148,12 @@ def organize_name_only(
         # Group all small cluster items by city
         small_items_by_city: Dict[str, List[Item]] = defaultdict(list)
 
-        for grp in small_clusters:
-            for it in grp:
-                gps_any = it.gps
-                city = nearest_city(gps_any, cycle if rotate_cities else CITIES, 0)
-                small_items_by_city[city].append(it)
+        small_items = [it for grp in small_clusters for it in grp]
+        small_cities = nearest_cities(
+            [it.gps for it in small_items], cycle if rotate_cities else CITIES
+        )
+        for it, city in zip(small_items, small_cities):
+            small_items_by_city[city].append(it)
 
         # Create one misc folder per city
         for city, items in small_items_by_city.items():
@@ -172,22 +187,16 @@ def organize_name_only(
                     final_base = base
                     folder_filenames[folder_name][base] = 1
 
-                # Get file extension
-                ext = it.path.suffix.lower()
-                if ext in {".heic", ".heif"}:
-                    ext = ".jpg"
+                # Get file extension (HEIC/HEIF become .jpg/.webp/.avif when transcoding)
+                ext = engine.output_ext(it.path)
 
                 dst = folder / f"{final_base}{ext}"
 
-                # Copy file
-                try:
-                    shutil.copy2(it.path, dst)
-                    print(f"     ✓ {dst.name}")
-                except Exception as e:
-                    print(f"     ✗ Failed to copy {it.path.name}: {e}")
-                    continue
-
-                manifest.append(
+                # Copy file (in the background)
+                print(f"     → {dst.name}")
+                engine.submit(
+                    it.path,
+                    dst,
                     {
                         "src": str(it.path),
                         "dst": str(dst),
@@ -195,9 +204,11 @@ def organize_name_only(
                         "seo_filename": seo_filename,
                         "city": city,
                         "folder": folder_name,
-                    }
+                    },
                 )
 
+    manifest = engine.finish()
+
     # Write manifest
     manifest_path = out_dir / "manifest.json"
     with open(manifest_path, "w", encoding="utf-8") as f:
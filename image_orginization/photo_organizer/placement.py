@@ -0,0 +1,347 @@
+"""Parallel, journaled file placement for the organize step.
+
+Copies run on an I/O-sized thread pool. Each file is written to a temporary
+`.part` name and renamed into place, and a line is appended to a JSONL journal
+as soon as it lands, so an interrupted run leaves no half-written outputs and a
+rerun skips everything already journaled.
+
+Placement modes:
+    copy      full byte copy (default)
+    hardlink  same inode, no extra disk space (same filesystem only)
+    reflink   copy-on-write clone (APFS, Btrfs, XFS; same filesystem only)
+    symlink   absolute symlink to the original
+    move      rename the original into place
+Any mode the filesystem refuses (cross-device, unsupported) falls back to copy
+(move falls back to copy + delete).
+
+HEIC/HEIF originals are transcoded instead of placed when a TranscodeOptions
+format is set; encodes run in a process pool alongside the placement threads
+and originals are left untouched.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from .config import (
+    DEFAULT_PLACEMENT,
+    PLACEMENT_JOURNAL,
+    PLACEMENT_MAX_WORKERS,
+    TRANSCODE_WORKERS,
+)
+from .transcode import TranscodeOptions, check_format, transcode_image
+from .utils.hashing import HASH_CHUNK_SIZE, hash_file, new_hasher
+from .utils.profiling import PROFILER
+
+PLACEMENT_MODES = ("copy", "hardlink", "reflink", "symlink", "move")
+FICLONE = 0x40049409  # Linux ioctl: clone src extents into dst
+
+
+def verified_copy(src: Path, dst: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Copy src → dst, hashing while streaming, then re-read dst to verify.
+
+    Args:
+        src: Source file
+        dst: Destination file (overwritten)
+        chunk_size: Read/write block size
+
+    Returns:
+        Hex digest (DEFAULT_HASH_ALGORITHM) of the copied content
+
+    Raises:
+        IOError: If the written file does not match the source hash
+    """
+    h = new_hasher()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(src, "rb", buffering=0) as fin, open(dst, "wb") as fout:
+        while True:
+            n = fin.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+            fout.write(view[:n])
+        fout.flush()
+        os.fsync(fout.fileno())
+    digest = h.hexdigest()
+    if hash_file(dst, chunk_size=chunk_size) != digest:
+        raise IOError(f"verification failed for {dst}")
+    shutil.copystat(src, dst)
+    return digest
+
+
+def reflink(src: Path, dst: Path):
+    """Create dst as a copy-on-write clone of src.
+
+    Raises:
+        OSError: If the platform or filesystem cannot clone
+    """
+    if sys.platform == "darwin":
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(dst))
+        return
+
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.ENOTSUP, "reflink not supported on this platform")
+
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+    shutil.copystat(src, dst)
+
+
+class PlacementEngine:
+    """Place files into the output tree in parallel with a crash-safe journal.
+
+    Usage:
+        engine = PlacementEngine(out_dir, mode="hardlink", verify=True)
+        engine.submit(src, dst, manifest_record)
+        ...
+        records = engine.finish()  # manifest records of placed files, in order
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        mode: str = DEFAULT_PLACEMENT,
+        verify: bool = False,
+        max_workers: Optional[int] = PLACEMENT_MAX_WORKERS,
+        journal_name: str = PLACEMENT_JOURNAL,
+        transcode: Optional[TranscodeOptions] = None,
+        transcode_workers: int = TRANSCODE_WORKERS,
+    ):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if mode not in PLACEMENT_MODES:
+            raise ValueError(f"Unknown placement mode: {mode}")
+        self.mode = mode
+        self.verify = verify
+        transcode = transcode if transcode is not None else TranscodeOptions()
+        self.transcode = TranscodeOptions(
+            check_format(transcode.format),
+            transcode.quality,
+            transcode.max_px,
+            transcode.keep_exif,
+        )
+        self.journal_path = self.out_dir / journal_name
+        self.done = self._load_journal()
+        self.counts = {
+            "placed": 0,
+            "skipped": 0,
+            "failed": 0,
+            "fallback": 0,
+            "transcoded": 0,
+            "bytes": 0,
+        }
+        self._fallback_reasons: set = set()
+
+        workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="place")
+        self._jobs: List[Tuple[Future, Dict]] = []
+        self._lock = threading.Lock()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._transcode_workers = transcode_workers or os.cpu_count() or 1
+        self._procs: Optional[ProcessPoolExecutor] = None
+
+    def output_ext(self, src: Path) -> str:
+        """Extension the placed file will have (e.g. .heic → .jpg when transcoding)."""
+        return self.transcode.output_ext(src)
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        """Transcode workers, started on first use (spawn: safe alongside threads)."""
+        with self._lock:
+            if self._procs is None:
+                self._procs = ProcessPoolExecutor(
+                    max_workers=self._transcode_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._procs
+
+    def _load_journal(self) -> Dict[str, Dict]:
+        """Read journal lines into {dst: entry}; ignore a torn final line."""
+        done: Dict[str, Dict] = {}
+        if not self.journal_path.exists():
+            return done
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[entry["dst"]] = entry
+        return done
+
+    def _already_placed(
+        self, src: Path, dst: Path, st: Optional[os.stat_result]
+    ) -> bool:
+        """True if the journal says this exact source already landed at dst.
+
+        st is None when the source is gone (moved on a previous run).
+        """
+        entry = self.done.get(str(dst))
+        if not entry or entry["src"] != str(src):
+            return False
+        if entry.get("transcode") != self._transcode_key(src):
+            return False
+        if st is not None and (
+            entry["src_size"] != st.st_size or entry["src_mtime"] != st.st_mtime
+        ):
+            return False
+        try:
+            return dst.stat().st_size == entry["size"]
+        except OSError:
+            return False
+
+    def _transcode_key(self, src: Path) -> Optional[str]:
+        return self.transcode.key if self.transcode.applies_to(src) else None
+
+    def _fallback(self, error: OSError):
+        """Count a fallback to copy; warn once per distinct reason."""
+        reason = error.strerror or str(error)
+        with self._lock:
+            self.counts["fallback"] += 1
+            if reason in self._fallback_reasons:
+                return
+            self._fallback_reasons.add(reason)
+        print(f"[warn] {self.mode} not possible ({reason}); falling back to copy")
+
+    def _transfer(self, src: Path, tmp: Path) -> Tuple[str, Optional[str]]:
+        """Materialize src at tmp using the configured mode.
+
+        Returns:
+            Tuple of (mode actually used, content hash if verified)
+        """
+        if self.mode != "copy":
+            try:
+                if self.mode == "hardlink":
+                    os.link(src, tmp)
+                elif self.mode == "reflink":
+                    reflink(src, tmp)
+                elif self.mode == "symlink":
+                    os.symlink(src.resolve(), tmp)
+                elif self.mode == "move":
+                    os.rename(src, tmp)
+                return self.mode, None
+            except OSError as e:
+                if os.path.lexists(tmp):
+                    tmp.unlink()
+                self._fallback(e)
+
+        if self.verify:
+            return "copy", verified_copy(src, tmp)
+        shutil.copy2(src, tmp)
+        return "copy", None
+
+    def _place(self, src: Path, dst: Path) -> str:
+        """Place one file atomically and journal it. Returns 'placed' or 'skipped'."""
+        try:
+            st = src.stat()
+        except FileNotFoundError:
+            if self.mode == "move" and self._already_placed(src, dst, None):
+                return "skipped"
+            raise
+        if self._already_placed(src, dst, st):
+            return "skipped"
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(dst.name + ".part")
+        if os.path.lexists(tmp):
+            tmp.unlink()  # Left by an interrupted run; os.link would hit EEXIST
+        mode = None
+        try:
+            if self.transcode.applies_to(src):
+                future = self._process_pool().submit(
+                    transcode_image, src, tmp, self.transcode
+                )
+                future.result()
+                mode, digest = "transcode", None
+            else:
+                mode, digest = self._transfer(src, tmp)
+            os.replace(tmp, dst)
+        except BaseException:
+            if mode == "move" and os.path.lexists(tmp):
+                os.rename(tmp, src)  # tmp is the original, not a copy: put it back
+            raise
+        finally:
+            if os.path.lexists(tmp):
+                tmp.unlink()
+        if self.mode == "move" and mode == "copy":
+            src.unlink()  # Cross-device move: copy landed, drop the original
+
+        entry = {
+            "src": str(src),
+            "dst": str(dst),
+            "mode": mode,
+            "transcode": self._transcode_key(src),
+            "src_size": st.st_size,
+            "src_mtime": st.st_mtime,
+            "size": dst.stat().st_size,
+            "hash": digest,
+            "ts": time.time(),
+        }
+        with self._lock:
+            self._journal.write(json.dumps(entry) + "\n")
+            self._journal.flush()
+            self.done[str(dst)] = entry
+            if mode == "copy":
+                self.counts["bytes"] += entry["size"]
+                PROFILER.count("bytes_copied", entry["size"])
+            elif mode == "transcode":
+                self.counts["transcoded"] += 1
+        return "placed"
+
+    def submit(self, src: Path, dst: Path, record: Dict) -> Future:
+        """Queue one placement; record is returned by finish() if it succeeds."""
+        future = self._executor.submit(self._place, Path(src), Path(dst))
+        self._jobs.append((future, record))
+        return future
+
+    def finish(self) -> List[Dict]:
+        """Wait for all placements, close the journal and return placed records."""
+        records = []
+        for future, record in tqdm(self._jobs, desc="Placing files", unit="file"):
+            try:
+                status = future.result()
+            except Exception as e:
+                self.counts["failed"] += 1
+                print(f"[warn] copy failed {Path(record['src']).name}: {e}")
+                continue
+            self.counts[status] += 1
+            records.append(record)
+        PROFILER.count("files_placed", self.counts["placed"])
+
+        self._executor.shutdown(wait=True)
+        if self._procs is not None:
+            self._procs.shutdown(wait=True)
+        self._journal.close()
+        print(
+            f"📥 Placed {self.counts['placed']} files by {self.mode} "
+            f"({self.counts['bytes'] / 1e6:.1f} MB copied), skipped {self.counts['skipped']} "
+            f"already placed, {self.counts['failed']} failed"
+            + (
+                f", {self.counts['fallback']} copied instead"
+                if self.counts["fallback"]
+                else ""
+            )
+        )
+        if self.counts["transcoded"]:
+            print(
+                f"🖼️  Transcoded {self.counts['transcoded']} HEIC/HEIF originals to "
+                f"{self.transcode.format.upper()} (quality {self.transcode.quality})"
+            )
+        return records
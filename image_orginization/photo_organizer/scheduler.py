@@ -0,0 +1,131 @@
+"""Background stage scheduler for overlapping pipeline steps.
+
+Lets cli.main start I/O-bound work (e.g. classification API calls for GPS
+clusters) while CPU-bound stages (fused clustering) run on the main thread,
+then join the results by stage name before they are needed.
+
+While stages run, stdout is routed through a per-thread buffer so a
+background stage's progress lines don't interleave with the main thread's
+output; each stage's output is printed as one block when it is joined.
+"""
+
+import io
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class _StageOutput:
+    """stdout proxy: writes from registered stage threads go to their buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._buffers: Dict[int, io.StringIO] = {}
+
+    def capture(self) -> io.StringIO:
+        buffer = io.StringIO()
+        self._buffers[threading.get_ident()] = buffer
+        return buffer
+
+    def release(self) -> str:
+        return self._buffers.pop(threading.get_ident()).getvalue()
+
+    def write(self, text: str) -> int:
+        buffer = self._buffers.get(threading.get_ident())
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        if threading.get_ident() not in self._buffers:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class StageScheduler:
+    """Run named pipeline stages in background threads and join them later."""
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="stage"
+        )
+        self._futures: Dict[str, Future] = {}
+        self._started: Dict[str, float] = {}
+        self._output: Dict[str, str] = {}
+        self._stdout = None
+        self.timings: Dict[str, float] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=exc_type is None)
+        return False
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> Future:
+        """Start a stage in the background.
+
+        Args:
+            name: Unique stage name used to join the result
+            fn: Callable to run
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            Future for the stage
+        """
+        if name in self._futures:
+            raise ValueError(f"Stage '{name}' already submitted")
+
+        if self._stdout is None:
+            self._stdout = _StageOutput(sys.stdout)
+            sys.stdout = self._stdout
+        stdout = self._stdout
+
+        def run():
+            started = time.perf_counter()
+            stdout.capture()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._output[name] = stdout.release()
+                self.timings[name] = time.perf_counter() - started
+
+        self._started[name] = time.perf_counter()
+        self._futures[name] = self._executor.submit(run)
+        print(f"⏩ Started background stage: {name}")
+        return self._futures[name]
+
+    def has(self, name: str) -> bool:
+        """True if a stage with this name was submitted."""
+        return name in self._futures
+
+    def result(self, name: str) -> Any:
+        """Block until the stage finishes and return its result (re-raises errors)."""
+        waited = time.perf_counter()
+        try:
+            value = self._futures[name].result()
+        finally:
+            output = self._output.pop(name, "")
+            if output:
+                print(f"\n--- output of background stage: {name} ---")
+                print(output.rstrip("\n"))
+        blocked = time.perf_counter() - waited
+        ran = self.timings.get(name, 0.0)
+        print(
+            f"⏹  Joined stage: {name} (ran {ran:.1f}s, waited {blocked:.1f}s, "
+            f"hidden {max(0.0, ran - blocked):.1f}s)"
+        )
+        return value
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; cancel pending stages if not waiting.
+
+        Restores sys.stdout once no stage can write to the buffers any more
+        (right away when not waiting: a stage still running keeps its buffer).
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        if self._stdout is not None and sys.stdout is self._stdout:
+            sys.stdout = self._stdout.stream
+        self._stdout = None
@@ -0,0 +1,376 @@
+"""Sharded execution: ingest and cluster parts of the library independently.
+
+Pipeline:
+    1. Plan: split the input into N shards, either by top-level folder
+       (large folders are cut into contiguous filename ranges) or by date
+       (contiguous file-mtime ranges; EXIF isn't read until ingest)
+    2. Shard: ingest → dedupe → GPS clustering → fused clustering for one
+       shard, written to _work/shards/shard_<i>.json. Shards run in a local
+       process pool, or one per machine with --shard-index over a shared
+       filesystem (same mount path everywhere)
+    3. Merge: load every shard result and stitch clusters that cross shard
+       boundaries. Shards are replayed in order through a ClusterIndex (the
+       watch-mode lookup): an item joins an earlier shard's cluster when it is
+       within the GPS site radius, or within the time gap / filename window
+       and pHash threshold. Joined clusters are unioned (DSU)
+
+Shard results carry the plan id, so a rerun (or the merging node) only
+computes shards that are missing or were planned differently.
+"""
+
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import (
+    DEDUPE_PHASH_DISTANCE,
+    DEFAULT_FUSE_THRESHOLD,
+    DEFAULT_HASH_THRESHOLD,
+    DEFAULT_MAX_EDGES,
+    DEFAULT_SHARD_BY,
+    DEFAULT_SITE_DISTANCE_FEET,
+    DEFAULT_TIME_GAP_MINUTES,
+    SHARD_DIR,
+)
+from .ingestion import find_images
+from .models import DSU, Item, item_from_dict, item_to_dict
+
+SHARD_VERSION = 1
+
+
+@dataclass
+class ShardOptions:
+    """Clustering settings every shard (and the merge) must agree on."""
+
+    site_meters: float = DEFAULT_SITE_DISTANCE_FEET * 0.3048
+    time_gap_min: int = DEFAULT_TIME_GAP_MINUTES
+    hash_threshold: int = DEFAULT_HASH_THRESHOLD
+    dedupe: bool = True
+    phash_only: bool = False
+
+
+@dataclass
+class ShardedResult:
+    """Merged output of all shards, shaped like the single-process pipeline's."""
+
+    items: List[Item]  # Everything ingested (incl. duplicates)
+    representatives: List[Item]  # Items that were clustered
+    duplicates: Dict[str, List[Item]] = field(default_factory=dict)
+    duplicate_records: List[Dict] = field(default_factory=list)
+    gps_groups: List[List[Item]] = field(default_factory=list)
+    fused_groups: List[List[Item]] = field(default_factory=list)
+    stitched: int = 0  # Cross-shard cluster joins
+
+
+def plan_shards(input_dir: Path, count: int, by: str = DEFAULT_SHARD_BY) -> List[List[Path]]:
+    """Split the input files into `count` shards (deterministic for a given tree).
+
+    Args:
+        input_dir: Library root
+        count: Number of shards
+        by: "dir" (top-level folders, greedy size balancing; folders larger
+            than a shard are cut into contiguous filename ranges) or
+            "date" (contiguous file-mtime ranges of equal size)
+
+    Returns:
+        Files per shard (some shards may be empty for tiny libraries)
+    """
+    files = sorted(find_images(input_dir))
+    count = max(1, count)
+    shards: List[List[Path]] = [[] for _ in range(count)]
+    if not files:
+        return shards
+
+    if by == "date":
+        files.sort(key=lambda p: (p.stat().st_mtime, str(p)))
+        per = -(-len(files) // count)
+        return [files[i * per : (i + 1) * per] for i in range(count)]
+    if by != "dir":
+        raise ValueError(f"Unknown shard key: {by}")
+
+    folders: Dict[str, List[Path]] = defaultdict(list)
+    for p in files:
+        rel = p.relative_to(input_dir)
+        folders[rel.parts[0] if len(rel.parts) > 1 else ""].append(p)
+
+    cap = -(-len(files) // count)
+    chunks: List[List[Path]] = []
+    for key in sorted(folders):
+        members = folders[key]
+        chunks.extend(members[i : i + cap] for i in range(0, len(members), cap))
+
+    # Largest first into the currently smallest shard
+    for chunk in sorted(chunks, key=lambda c: (-len(c), str(c[0]))):
+        target = min(range(count), key=lambda i: (len(shards[i]), i))
+        shards[target].extend(chunk)
+    return [sorted(s) for s in shards]
+
+
+def plan_id(input_dir: Path, shards: List[List[Path]], by: str, options: ShardOptions) -> str:
+    """Fingerprint of a plan: shard membership, shard key and clustering settings."""
+    payload = {
+        "by": by,
+        "options": asdict(options),
+        "shards": [[str(p.relative_to(input_dir)) for p in s] for s in shards],
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def shard_path(work_dir: Path, index: int) -> Path:
+    return work_dir / SHARD_DIR / f"shard_{index}.json"
+
+
+def _write_json(path: Path, data: Dict):
+    # Unique per process: every --shard-index node may write plan.json at once
+    tmp = path.with_name(f"{path.name}.{socket.gethostname()}.{os.getpid()}.part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def run_shard(task: Dict) -> Dict:
+    """Ingest and cluster one shard; writes shard_<i>.json (runs in a worker process).
+
+    Args:
+        task: {"index", "plan", "files", "work_dir", "options"} (plain types
+            so it pickles under the spawn start method)
+
+    Returns:
+        Small summary for progress output
+    """
+    from .clustering import cluster_gps_only, cluster_phash_only, fused_cluster
+    from .dedupe import collapse_duplicates
+    from .ingestion import ingest_files
+    from .utils.filename import name_features
+
+    index = task["index"]
+    work_dir = Path(task["work_dir"])
+    options = ShardOptions(**task["options"])
+    out = shard_path(work_dir, index)
+    started = time.perf_counter()
+
+    # Interleaved progress bars from N processes are unreadable: log per shard
+    with open(out.with_suffix(".log"), "w", encoding="utf-8") as log, contextlib.redirect_stdout(
+        log
+    ), contextlib.redirect_stderr(log):
+        items = ingest_files([Path(p) for p in task["files"]], work_dir)
+        kept, duplicates, records = items, {}, []
+        if options.dedupe and items:
+            kept, duplicates, records = collapse_duplicates(
+                items, phash_distance=DEDUPE_PHASH_DISTANCE
+            )
+
+        gps_groups, gps_singletons = cluster_gps_only(
+            [it for it in kept if it.gps], max_meters=options.site_meters
+        )
+        rest = [it for it in kept if not it.gps] + gps_singletons
+        if options.phash_only:
+            fused = cluster_phash_only(rest, hash_threshold=options.hash_threshold)
+        else:
+            name_map = {it.id: name_features(it.path) for it in rest}
+            fused = fused_cluster(
+                rest,
+                name_map,
+                fuse_threshold=DEFAULT_FUSE_THRESHOLD,
+                max_edges_per_node=DEFAULT_MAX_EDGES,
+                time_gap_minutes=options.time_gap_min,
+            )
+
+    clustered = {str(it.path) for it in kept}
+    groups = [{"kind": "gps", "members": [str(it.path) for it in g]} for g in gps_groups]
+    groups += [{"kind": "fused", "members": [str(it.path) for it in g]} for g in fused]
+    result = {
+        "version": SHARD_VERSION,
+        "plan": task["plan"],
+        "index": index,
+        "items": [item_to_dict(it) for it in items],
+        "clustered": [str(it.path) for it in items if str(it.path) in clustered],
+        "groups": groups,
+        "duplicates": {rep: [str(d.path) for d in dups] for rep, dups in duplicates.items()},
+        "duplicate_records": records,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    _write_json(out, result)
+    return {
+        "index": index,
+        "items": len(items),
+        "clusters": len(groups),
+        "seconds": result["seconds"],
+    }
+
+
+def load_shard(work_dir: Path, index: int, plan: str) -> Optional[Dict]:
+    """A shard result written for this plan, or None."""
+    path = shard_path(work_dir, index)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if data.get("version") != SHARD_VERSION or data.get("plan") != plan:
+        return None
+    return data
+
+
+def merge_shards(results: List[Dict], options: ShardOptions) -> ShardedResult:
+    """Combine shard results and stitch clusters across shard boundaries.
+
+    Args:
+        results: Shard result dicts, in shard order
+        options: Clustering settings (site radius, time gap, pHash threshold)
+
+    Returns:
+        ShardedResult with gps_groups (any member cluster came from GPS
+        clustering) and fused_groups (everything else)
+    """
+    from .watch import ClusterIndex
+
+    items: List[Item] = []
+    by_path: Dict[str, Item] = {}
+    kinds: List[str] = []
+    members: List[List[Item]] = []
+    shard_groups: List[List[int]] = []
+    duplicates: Dict[str, List[Item]] = {}
+    records: List[Dict] = []
+    representatives: List[Item] = []
+
+    for data in results:
+        for d in data["items"]:
+            it = item_from_dict(d)
+            items.append(it)
+            by_path[d["path"]] = it
+        representatives.extend(by_path[p] for p in data["clustered"])
+        gids = []
+        for g in data["groups"]:
+            gids.append(len(members))
+            kinds.append(g["kind"])
+            members.append([by_path[p] for p in g["members"]])
+        shard_groups.append(gids)
+        for rep, dups in data["duplicates"].items():
+            duplicates[rep] = [by_path[p] for p in dups]
+        records.extend(data["duplicate_records"])
+
+    dsu = DSU(len(members))
+    index = ClusterIndex(options.site_meters, options.time_gap_min, options.hash_threshold)
+    stitched = 0
+    for gids in shard_groups:
+        # Look up against earlier shards only, then make this shard searchable
+        for gid in gids:
+            for it in members[gid]:
+                hit = index.find(it)
+                if hit is not None and dsu.find(hit) != dsu.find(gid):
+                    dsu.union(hit, gid)
+                    stitched += 1
+        for gid in gids:
+            for it in members[gid]:
+                index.add(str(it.path), it, gid)
+
+    merged: Dict[int, List[int]] = defaultdict(list)
+    for gid in range(len(members)):
+        merged[dsu.find(gid)].append(gid)
+
+    result = ShardedResult(
+        items=items,
+        representatives=representatives,
+        duplicates=duplicates,
+        duplicate_records=records,
+        stitched=stitched,
+    )
+    for gids in merged.values():
+        group = [it for gid in gids for it in members[gid]]
+        if any(kinds[gid] == "gps" for gid in gids):
+            result.gps_groups.append(group)
+        else:
+            result.fused_groups.append(group)
+    return result
+
+
+def run_sharded(
+    input_dir: Path,
+    work_dir: Path,
+    count: int,
+    options: ShardOptions,
+    by: str = DEFAULT_SHARD_BY,
+    shard_index: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Optional[ShardedResult]:
+    """Plan, run missing shards, and merge.
+
+    Args:
+        input_dir: Library root
+        work_dir: Shared _work directory (thumbnails and shard results)
+        count: Number of shards
+        options: Clustering settings
+        by: Shard key ("dir" or "date")
+        shard_index: Run only this shard in-process and return None
+            (one shard per machine; a later run without it merges)
+        max_workers: Shard processes (None = min(count, CPU count))
+
+    Returns:
+        Merged result, or None when only one shard was run
+    """
+    shards = plan_shards(input_dir, count, by)
+    plan = plan_id(input_dir, shards, by, options)
+    (work_dir / SHARD_DIR).mkdir(parents=True, exist_ok=True)
+    _write_json(
+        work_dir / SHARD_DIR / "plan.json",
+        {"plan": plan, "by": by, "shards": [[str(p) for p in s] for s in shards]},
+    )
+
+    def task(i: int) -> Dict:
+        return {
+            "index": i,
+            "plan": plan,
+            "files": [str(p) for p in shards[i]],
+            "work_dir": str(work_dir),
+            "options": asdict(options),
+        }
+
+    if shard_index is not None:
+        if not 0 <= shard_index < count:
+            raise ValueError(f"--shard-index must be in [0, {count})")
+        done = run_shard(task(shard_index))
+        print(
+            f"🧩 Shard {shard_index}/{count}: {done['items']} images → {done['clusters']} clusters "
+            f"in {done['seconds']}s → {shard_path(work_dir, shard_index)}"
+        )
+        return None
+
+    todo = [i for i in range(count) if load_shard(work_dir, i, plan) is None]
+    sizes = ", ".join(str(len(s)) for s in shards)
+    print(f"🧩 {count} shards by {by} ({sizes} images); {count - len(todo)} already done")
+    if todo:
+        workers = max_workers or min(len(todo), os.cpu_count() or 1)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = [pool.submit(run_shard, task(i)) for i in todo]
+            for fut in as_completed(futures):
+                done = fut.result()
+                print(
+                    f"  ✅ shard {done['index']}: {done['items']} images → "
+                    f"{done['clusters']} clusters in {done['seconds']}s"
+                )
+
+    started = time.perf_counter()
+    results = [load_shard(work_dir, i, plan) for i in range(count)]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        raise RuntimeError(f"Shard results missing or unreadable: {missing}")
+    merged = merge_shards(results, options)
+    print(
+        f"🧵 Merged {len(merged.gps_groups) + len(merged.fused_groups)} clusters "
+        f"({merged.stitched} cross-shard joins) in {time.perf_counter() - started:.2f}s"
+    )
+    return merged
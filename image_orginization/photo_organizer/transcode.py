@@ -0,0 +1,118 @@
+"""HEIC/HEIF → web format transcoding for organized output.
+
+Each original is decoded once and re-encoded as progressive JPEG (default),
+WebP or AVIF at a configurable quality and maximum dimension. EXIF is kept
+(orientation baked into the pixels) or stripped. Runs in worker processes so
+it overlaps with the placement thread pool.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from .config import (
+    DEFAULT_TRANSCODE_HEIC,
+    TRANSCODE_KEEP_EXIF,
+    TRANSCODE_MAX_PX,
+    TRANSCODE_QUALITY,
+)
+from .utils.image import register_heif
+
+TRANSCODE_SOURCE_EXTS = {".heic", ".heif"}
+
+# format → (file extension, Pillow format name)
+TRANSCODE_FORMATS: Dict[str, Tuple[str, str]] = {
+    "jpeg": (".jpg", "JPEG"),
+    "webp": (".webp", "WEBP"),
+    "avif": (".avif", "AVIF"),
+}
+
+EXIF_ORIENTATION = 0x0112
+
+
+@dataclass(frozen=True)
+class TranscodeOptions:
+    """How HEIC/HEIF originals are published ("off" = place original bytes)."""
+
+    format: str = DEFAULT_TRANSCODE_HEIC
+    quality: int = TRANSCODE_QUALITY
+    max_px: int = TRANSCODE_MAX_PX
+    keep_exif: bool = TRANSCODE_KEEP_EXIF
+
+    @property
+    def enabled(self) -> bool:
+        return self.format != "off"
+
+    @property
+    def key(self) -> str:
+        """Fingerprint stored in the placement journal."""
+        return f"{self.format}:q{self.quality}:px{self.max_px}:exif{int(self.keep_exif)}"
+
+    def applies_to(self, path: Path) -> bool:
+        """True if this source should be transcoded."""
+        return self.enabled and Path(path).suffix.lower() in TRANSCODE_SOURCE_EXTS
+
+    def output_ext(self, path: Path) -> str:
+        """Lower-case extension the organized file should get."""
+        if self.applies_to(path):
+            return TRANSCODE_FORMATS[self.format][0]
+        return Path(path).suffix.lower()
+
+
+def check_format(fmt: str) -> str:
+    """Return fmt if this Pillow build can encode it, else fall back to jpeg."""
+    if fmt in ("off", "jpeg"):
+        return fmt
+    if fmt not in TRANSCODE_FORMATS:
+        raise ValueError(f"Unknown transcode format: {fmt}")
+    if not features.check(fmt):
+        print(f"[warn] Pillow has no {fmt.upper()} encoder; transcoding to JPEG instead")
+        return "jpeg"
+    return fmt
+
+
+def transcode_image(src: Path, dst: Path, options: TranscodeOptions) -> int:
+    """Decode src once and write it to dst in the configured format.
+
+    Args:
+        src: Original image (HEIC/HEIF or anything Pillow can open)
+        dst: Output path (written as-is; caller handles atomic rename)
+        options: Format, quality, max dimension and EXIF policy
+
+    Returns:
+        Bytes written
+    """
+    register_heif()
+    _, pil_format = TRANSCODE_FORMATS[options.format]
+
+    with Image.open(src) as im:
+        icc_profile = im.info.get("icc_profile")
+        im = ImageOps.exif_transpose(im)
+
+        exif_bytes: Optional[bytes] = None
+        if options.keep_exif:
+            exif = im.getexif()
+            exif.pop(EXIF_ORIENTATION, None)  # Pixels are already upright
+            exif_bytes = exif.tobytes() if len(exif) else None
+
+        if options.max_px:
+            im.thumbnail((options.max_px, options.max_px), Image.LANCZOS)
+
+        if pil_format == "JPEG" or im.mode not in ("RGB", "RGBA", "L"):
+            im = im.convert("RGB")
+
+        save_kwargs = {"quality": options.quality}
+        if pil_format == "JPEG":
+            save_kwargs.update(progressive=True, optimize=True)
+        elif pil_format == "WEBP":
+            save_kwargs.update(method=4)
+        if exif_bytes:
+            save_kwargs["exif"] = exif_bytes
+        if icc_profile:
+            save_kwargs["icc_profile"] = icc_profile
+
+        im.save(dst, pil_format, **save_kwargs)
+
+    return Path(dst).stat().st_size
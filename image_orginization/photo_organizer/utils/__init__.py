@@ -1,30 +1,45 @@
-"""Utility functions for photo processing."""
-
-from .image import (
-    ensure_thumb,
-    phash,
-    short_hash,
-    register_heif,
-    create_thumbnails_batch,
-    compute_phashes_batch,
-)
-from .exif import read_exif_batch
-from .geo import haversine, meters_between, nearest_city
-from .filename import name_features, filename_score
-from .loading_spinner import Spinner
-
-__all__ = [
-    "ensure_thumb",
-    "phash",
-    "short_hash",
-    "register_heif",
-    "create_thumbnails_batch",
-    "compute_phashes_batch",
-    "read_exif_batch",
-    "haversine",
-    "meters_between",
-    "nearest_city",
-    "name_features",
-    "filename_score",
-    "Spinner",
-]
+"""Utility functions for photo processing.
+
+Submodules load on first attribute access (PEP 562), so importing one light
+helper doesn't pull in PIL, imagehash, numpy or scipy.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "ensure_thumb": "image",
+    "phash": "image",
+    "short_hash": "image",
+    "register_heif": "image",
+    "create_thumbnails_batch": "image",
+    "compute_phashes_batch": "image",
+    "read_exif_batch": "exif",
+    "hash_file": "hashing",
+    "partial_hash": "hashing",
+    "hash_files": "hashing",
+    "find_duplicate_files": "hashing",
+    "haversine": "geo",
+    "meters_between": "geo",
+    "nearest_city": "geo",
+    "nearest_cities": "geo",
+    "CityLocator": "geo",
+    "get_city_locator": "geo",
+    "name_features": "filename",
+    "filename_score": "filename",
+    "Spinner": "loading_spinner",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -8,6 +8,8 @@ import json
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .profiling import timed
+
 
 def read_exif_combined(
     p: Path,
@@ -251,6 +253,7 @@ def read_exif_combined(
         return None, None
 
 
+@timed()
 def read_exif_batch(
     paths: List[Path], max_workers: int = 8
 ) -> Dict[Path, Dict[str, Optional[any]]]:
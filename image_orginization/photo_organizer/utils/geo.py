@@ -1,8 +1,33 @@
 """Geographic and geospatial utilities."""
 
+import csv
 from math import radians, sin, cos, asin, sqrt
-from typing import Optional, Tuple, List
-from ..config import CITIES
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..config import CITIES, CITY_GAZETTEER, CITY_MEMO_DECIMALS
+
+# Optional: scipy KD-tree (falls back to vectorised numpy). Imported when the
+# first locator is built: scipy.spatial costs ~0.25s at startup.
+_UNLOADED = object()
+cKDTree = _UNLOADED
+
+
+def _kdtree_class():
+    """scipy's cKDTree, or None if scipy isn't installed."""
+    global cKDTree
+    if cKDTree is _UNLOADED:
+        try:
+            from scipy.spatial import cKDTree as tree_cls  # type: ignore
+        except ImportError:  # pragma: no cover
+            tree_cls = None
+        cKDTree = tree_cls
+    return cKDTree
+
+
+EARTH_RADIUS_KM = 6371.0
 
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -15,7 +40,7 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     Returns:
         Distance in kilometers
     """
-    R = 6371.0  # Earth's radius in kilometers
+    R = EARTH_RADIUS_KM
     dlat = radians(lat2 - lat1)
     dlon = radians(lon2 - lon1)
     a = (
@@ -38,36 +63,201 @@ def meters_between(a: Tuple[float, float], b: Tuple[float, float]) -> float:
     return haversine(a[0], a[1], b[0], b[1]) * 1000.0
 
 
-def nearest_city(gps: Optional[Tuple[float, float]], fallback_cycle, idx: int) -> str:
+def _unit_vectors(lat_lon: np.ndarray) -> np.ndarray:
+    """(N, 2) degrees → (N, 3) points on the unit sphere."""
+    lat = np.radians(lat_lon[:, 0])
+    lon = np.radians(lat_lon[:, 1])
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class CityLocator:
+    """Nearest-city lookup over a spatial index built once.
+
+    Cities are stored as 3D unit vectors, where straight-line (chord) distance
+    orders points the same way as great-circle distance, so a KD-tree answers
+    nearest-neighbour queries in O(log n). Results are memoised by coordinate
+    rounded to `memo_decimals` (3 ≈ 110 m), so photos from the same site cost
+    one lookup.
+
+    `cities` is a {name: (lat, lon)} dict or a sequence of (name, (lat, lon))
+    rows; rows may repeat a name (e.g. the many "Springfield"s of a
+    gazetteer), and each row is its own point in the index.
+    """
+
+    def __init__(
+        self,
+        cities: Union[
+            Dict[str, Tuple[float, float]], Sequence[Tuple[str, Tuple[float, float]]]
+        ],
+        memo_decimals: int = CITY_MEMO_DECIMALS,
+    ):
+        rows = list(cities.items()) if isinstance(cities, dict) else list(cities)
+        if not rows:
+            raise ValueError("CityLocator needs at least one city")
+        self.names: List[str] = [name for name, _ in rows]
+        self._points = _unit_vectors(np.array([coord for _, coord in rows], dtype=float))
+        tree_cls = _kdtree_class()
+        self._tree = tree_cls(self._points) if tree_cls is not None else None
+        self.memo_decimals = memo_decimals
+        self._memo: Dict[Tuple[float, float], Tuple[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_gazetteer(cls, path: Path, min_population: int = 0, **kwargs) -> "CityLocator":
+        """Build a locator from a gazetteer file.
+
+        Supported formats:
+            - CSV with a header containing name + lat/latitude + lon/lng/longitude
+              (optional population column)
+            - GeoNames dump (tab-separated, no header: name in column 1,
+              lat/lon in columns 4/5, population in column 14)
+
+        Args:
+            path: Gazetteer file
+            min_population: Skip places with a smaller known population
+
+        Returns:
+            CityLocator over all places in the file
+        """
+        path = Path(path)
+        # Parallel lists, one entry per row: place names repeat across regions
+        names: List[str] = []
+        coords: List[Tuple[float, float]] = []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            first = f.readline()
+            f.seek(0)
+            if first.count("\t") >= 14:
+                for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                    population = int(row[14] or 0)
+                    if population < min_population:
+                        continue
+                    names.append(row[1])
+                    coords.append((float(row[4]), float(row[5])))
+            else:
+                reader = csv.DictReader(f)
+                fields = {name.lower(): name for name in reader.fieldnames or []}
+                lat_key = fields.get("lat") or fields.get("latitude")
+                lon_key = fields.get("lon") or fields.get("lng") or fields.get("longitude")
+                name_key = fields.get("name") or fields.get("city")
+                pop_key = fields.get("population")
+                if not (lat_key and lon_key and name_key):
+                    raise ValueError(f"{path}: need name, lat and lon columns")
+                for row in reader:
+                    if pop_key and int(row[pop_key] or 0) < min_population:
+                        continue
+                    names.append(row[name_key])
+                    coords.append((float(row[lat_key]), float(row[lon_key])))
+        return cls(list(zip(names, coords)), **kwargs)
+
+    def _query(self, lat_lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest city index and distance (km) for each (lat, lon) row."""
+        points = _unit_vectors(lat_lon)
+        if self._tree is not None:
+            chord, idx = self._tree.query(points, k=1)
+        else:
+            # Max dot product == min chord; chunk to bound memory
+            idx = np.empty(len(points), dtype=int)
+            dots = np.empty(len(points))
+            for start in range(0, len(points), 1024):
+                block = points[start : start + 1024] @ self._points.T
+                idx[start : start + 1024] = block.argmax(axis=1)
+                dots[start : start + 1024] = block.max(axis=1)
+            chord = np.sqrt(np.clip(2.0 - 2.0 * dots, 0.0, 4.0))
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+        return np.atleast_1d(idx), np.atleast_1d(km)
+
+    def _key(self, lat: float, lon: float) -> Tuple[float, float]:
+        return (round(lat, self.memo_decimals), round(lon, self.memo_decimals))
+
+    def nearest(self, lat: float, lon: float) -> Tuple[str, float]:
+        """Nearest city name and distance in km."""
+        return self.nearest_many([(lat, lon)])[0]
+
+    def nearest_many(self, coords: Sequence[Tuple[float, float]]) -> List[Tuple[str, float]]:
+        """Vectorised nearest-city lookup for many coordinates.
+
+        Args:
+            coords: Sequence of (lat, lon)
+
+        Returns:
+            List of (city name, distance km), same order as coords
+        """
+        keys = [self._key(lat, lon) for lat, lon in coords]
+        missing = list(dict.fromkeys(k for k in keys if k not in self._memo))
+        if missing:
+            idx, km = self._query(np.array(missing, dtype=float))
+            for key, i, d in zip(missing, idx, km):
+                self._memo[key] = (self.names[int(i)], float(d))
+        return [self._memo[k] for k in keys]
+
+
+_default_locator: Optional[CityLocator] = None
+
+
+def get_city_locator() -> CityLocator:
+    """Shared locator over CITY_GAZETTEER (if set) or CITIES, built on first use."""
+    global _default_locator
+    if _default_locator is None:
+        if CITY_GAZETTEER:
+            _default_locator = CityLocator.from_gazetteer(Path(CITY_GAZETTEER).expanduser())
+        else:
+            _default_locator = CityLocator(CITIES)
+    return _default_locator
+
+
+def _fallback_city(fallback_cycle, idx: int) -> str:
+    # Handle both list (for rotation) and dict (for static fallback)
+    if isinstance(fallback_cycle, dict):
+        # Use first city from dict when not rotating
+        return list(fallback_cycle.keys())[0]
+    # Cycle through list
+    return fallback_cycle[idx % len(fallback_cycle)]
+
+
+def nearest_city(
+    gps: Optional[Tuple[float, float]],
+    fallback_cycle,
+    idx: int,
+    locator: Optional[CityLocator] = None,
+) -> str:
     """Determine nearest city from GPS coordinates or use fallback.
 
     Args:
         gps: GPS coordinates (lat, lon) or None
         fallback_cycle: List of city names to cycle through, or dict of cities
         idx: Index for cycling through fallback cities (used only with list)
+        locator: CityLocator to use (default: shared locator over CITIES)
 
     Returns:
         City name
     """
     if gps:
-        lat, lon = gps
-        best = None
-        best_city = None
-        for c, (clat, clon) in CITIES.items():
-            d = haversine(lat, lon, clat, clon)
-            if best is None or d < best:
-                best, best_city = d, c
-        if best_city:
-            print(f"Best city from GPS: {best_city}")
-            return best_city
+        return (locator or get_city_locator()).nearest(gps[0], gps[1])[0]
+    return _fallback_city(fallback_cycle, idx)
 
-    # Handle both list (for rotation) and dict (for static fallback)
-    if isinstance(fallback_cycle, dict):
-        # Use first city from dict when not rotating
-        fallback = list(fallback_cycle.keys())[0]
-    else:
-        # Cycle through list
-        fallback = fallback_cycle[idx % len(fallback_cycle)]
 
-    print(f"Using fallback city: {fallback}")
-    return fallback
+def nearest_cities(
+    gps_list: Iterable[Optional[Tuple[float, float]]],
+    fallback_cycle,
+    idx: int = 0,
+    locator: Optional[CityLocator] = None,
+) -> List[str]:
+    """Batch version of nearest_city (one vectorised query for all GPS points).
+
+    Args:
+        gps_list: GPS coordinates (lat, lon) or None per item
+        fallback_cycle: List of city names to cycle through, or dict of cities
+        idx: Index for cycling through fallback cities (same for all items)
+        locator: CityLocator to use (default: shared locator over CITIES)
+
+    Returns:
+        City name per item
+    """
+    gps_list = list(gps_list)
+    with_gps = [g for g in gps_list if g]
+    found = iter((locator or get_city_locator()).nearest_many(with_gps)) if with_gps else iter(())
+    fallback = _fallback_city(fallback_cycle, idx)
+    return [next(found)[0] if g else fallback for g in gps_list]
@@ -0,0 +1,180 @@
+"""Streaming content hashing and duplicate-file detection.
+
+Files are read in fixed-size chunks into a reusable per-thread buffer
+(readinto), so hashing a 50 MB RAW never holds more than one chunk in memory.
+Duplicate detection filters by size, then a head+tail partial hash, and only
+computes full hashes for files that still collide.
+"""
+
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..config import DEFAULT_HASH_ALGORITHM, HASH_WORKERS
+
+# Optional: xxhash (much faster than the hashlib algorithms)
+try:
+    import xxhash  # type: ignore
+except ImportError:  # pragma: no cover
+    xxhash = None
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB reads
+PARTIAL_HASH_BYTES = 64 * 1024  # Head and tail sample for the prefilter
+
+HASHLIB_ALGORITHMS = ("md5", "sha1", "sha256", "blake2b", "blake2s")
+XXHASH_ALGORITHMS = ("xxh64", "xxh3_64", "xxh3_128")
+
+_local = threading.local()
+
+
+def new_hasher(algorithm: str = DEFAULT_HASH_ALGORITHM):
+    """Create a hash object (hashlib-compatible update/hexdigest).
+
+    Args:
+        algorithm: md5, sha1, sha256, blake2b, blake2s, or xxh64/xxh3_64/xxh3_128
+            (xxhash package required)
+
+    Raises:
+        ValueError: Unknown algorithm or xxhash not installed
+    """
+    if algorithm in XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(f"{algorithm} requires the xxhash package")
+        return getattr(xxhash, algorithm)()
+    if algorithm not in HASHLIB_ALGORITHMS:
+        raise ValueError(f"Unknown hash algorithm: {algorithm}")
+    try:
+        # Python 3.9+ supports usedforsecurity parameter
+        return hashlib.new(algorithm, usedforsecurity=False)
+    except TypeError:
+        return hashlib.new(algorithm)
+
+
+def _buffer(size: int) -> bytearray:
+    """Reusable read buffer for the calling thread."""
+    buf = getattr(_local, "buf", None)
+    if buf is None or len(buf) != size:
+        buf = _local.buf = bytearray(size)
+    return buf
+
+
+def hash_file(
+    path: Path,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    chunk_size: int = HASH_CHUNK_SIZE,
+) -> str:
+    """Hash a file's contents with constant memory.
+
+    Args:
+        path: File to hash
+        algorithm: Hash algorithm (see new_hasher)
+        chunk_size: Bytes per read
+
+    Returns:
+        Hex digest
+    """
+    h = new_hasher(algorithm)
+    buf = _buffer(chunk_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def partial_hash(
+    path: Path,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    sample_bytes: int = PARTIAL_HASH_BYTES,
+) -> str:
+    """Hash the size plus the first and last sample_bytes of a file.
+
+    Cheap prefilter: files with different partial hashes cannot be identical.
+    """
+    h = new_hasher(algorithm)
+    size = os.path.getsize(path)
+    h.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        h.update(f.read(sample_bytes))
+        if size > 2 * sample_bytes:
+            f.seek(-sample_bytes, os.SEEK_END)
+            h.update(f.read(sample_bytes))
+        elif size > sample_bytes:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _map_paths(
+    fn: Callable[[Path], str], paths: List[Path], max_workers: int
+) -> Dict[Path, Optional[str]]:
+    """Run fn over paths on a thread pool; unreadable files map to None."""
+
+    def safe(p: Path) -> Optional[str]:
+        try:
+            return fn(p)
+        except OSError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers or HASH_WORKERS) as pool:
+        return dict(zip(paths, pool.map(safe, paths)))
+
+
+def hash_files(
+    paths: Iterable[Path],
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    max_workers: int = HASH_WORKERS,
+) -> Dict[Path, Optional[str]]:
+    """Full-content hashes for many files in parallel (None if unreadable)."""
+    return _map_paths(lambda p: hash_file(p, algorithm), list(paths), max_workers)
+
+
+def find_duplicate_files(
+    paths: Iterable[Path],
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    max_workers: int = HASH_WORKERS,
+) -> List[List[Path]]:
+    """Group byte-identical files.
+
+    Stages (each only on files that still collide):
+        1. size (stat only)
+        2. partial hash (head + tail)
+        3. full streaming hash
+
+    Args:
+        paths: Files to check
+        algorithm: Hash algorithm (see new_hasher)
+        max_workers: Hashing threads
+
+    Returns:
+        Groups of 2+ identical files (input order within each group)
+    """
+    by_size: Dict[int, List[Path]] = defaultdict(list)
+    for p in paths:
+        try:
+            by_size[os.path.getsize(p)].append(p)
+        except OSError:
+            continue
+    candidates = [p for group in by_size.values() if len(group) > 1 for p in group]
+
+    for fn in (
+        lambda p: partial_hash(p, algorithm),
+        lambda p: hash_file(p, algorithm),
+    ):
+        if not candidates:
+            return []
+        digests = _map_paths(fn, candidates, max_workers)
+        buckets: Dict[str, List[Path]] = defaultdict(list)
+        for p in candidates:
+            if digests[p] is not None:
+                buckets[digests[p]].append(p)
+        groups = [g for g in buckets.values() if len(g) > 1]
+        candidates = [p for g in groups for p in g]
+
+    return groups
@@ -1,12 +1,14 @@
 """Image processing utilities."""
 
-import hashlib
 from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 from PIL import Image
 import imagehash
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
+from .hashing import hash_file
+from .profiling import timed
+
 
 def register_heif():
     """Register HEIF image format handler."""
@@ -18,6 +20,7 @@ def register_heif():
         pass
 
 
+@timed()
 def ensure_thumb(src: Path, dst: Path, max_px: int = 512):
     """Create a thumbnail for the given image.
 
@@ -35,6 +38,7 @@ def ensure_thumb(src: Path, dst: Path, max_px: int = 512):
         im.save(dst, "JPEG", quality=50, optimize=True)
 
 
+@timed()
 def phash(path_or_image, hash_size: int = 8) -> Optional[imagehash.ImageHash]:
     """Calculate perceptual hash using pHash algorithm (DCT-based).
 
@@ -111,6 +115,8 @@ def short_hash(p: Path, length: int = 12) -> str:
         - 12 chars: 16 trillion combinations (safe for millions) ✅
         - 16 chars: Full 128-bit hash (overkill but safest)
 
+    The file is streamed in chunks, so large originals are never fully loaded.
+
     Args:
         p: Path to file
         length: Number of hex characters to return (default: 12)
@@ -118,12 +124,7 @@ def short_hash(p: Path, length: int = 12) -> str:
     Returns:
         First N characters of MD5 hash (hex string)
     """
-    try:
-        # Python 3.9+ supports usedforsecurity parameter
-        return hashlib.md5(p.read_bytes(), usedforsecurity=False).hexdigest()[:length]
-    except TypeError:
-        # Fallback for older Python versions
-        return hashlib.md5(p.read_bytes()).hexdigest()[:length]
+    return hash_file(p, "md5")[:length]
 
 
 def _process_single_thumbnail(
@@ -22,12 +22,18 @@ class Spinner:
         return False
 
     def start(self):
+        # Only the main thread animates: a spinner from a background stage
+        # would overwrite the main thread's line (see StageScheduler)
+        if threading.current_thread() is not threading.main_thread():
+            return
         self.running = True
         self.thread = threading.Thread(target=self._spin)
         self.thread.daemon = True
         self.thread.start()
 
     def stop(self):
+        if not self.running:
+            return
         self.running = False
         if self.thread:
             self.thread.join()
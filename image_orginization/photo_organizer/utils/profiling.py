@@ -0,0 +1,218 @@
+"""Lightweight pipeline instrumentation: stage timers, function timers,
+counters and peak memory, written to `_work/profile.json`.
+
+Usage:
+    from .utils.profiling import PROFILER, timed
+
+    PROFILER.begin("ingest")
+    ...
+    PROFILER.end("ingest")
+
+    with PROFILER.stage("organize"):
+        ...
+
+    @timed()
+    def fused_cluster(...): ...
+
+    PROFILER.count("api_calls")
+
+One stage can also be deep-profiled (pyinstrument if installed, else cProfile)
+by setting PROFILER.profile_stage before it starts.
+"""
+
+import functools
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Optional: peak RSS (Unix only)
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Peak resident set size in MB for this process (or its finished children)."""
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class Profiler:
+    """Collects stage timings, function timings and counters for one run."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.stages: List[Dict] = []
+        self.functions: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.profile_stage: Optional[str] = None
+        self.profile_dir: Optional[Path] = None
+        self._open: Dict[str, float] = {}
+        self._profiler = None
+        self._lock = threading.Lock()
+
+    # Stages -----------------------------------------------------------------
+
+    def begin(self, name: str):
+        """Start timing a pipeline stage (and deep-profile it if selected)."""
+        self._open[name] = time.perf_counter()
+        if name == self.profile_stage:
+            self._start_deep_profile()
+
+    def end(self, name: str):
+        """Stop timing a pipeline stage."""
+        started = self._open.pop(name, None)
+        if started is None:
+            return
+        if name == self.profile_stage:
+            self._stop_deep_profile(name)
+        self.stages.append(
+            {
+                "stage": name,
+                "seconds": round(time.perf_counter() - started, 4),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        )
+
+    @contextmanager
+    def stage(self, name: str):
+        """Context manager form of begin/end."""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    # Functions and counters -------------------------------------------------
+
+    def record(self, name: str, seconds: float):
+        """Add one call of `seconds` to a function timer."""
+        with self._lock:
+            entry = self.functions.setdefault(name, {"calls": 0, "seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+
+    def count(self, name: str, n: int = 1):
+        """Increment a counter (files, api_calls, api_retries, bytes_copied, ...)."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # Deep profiling ---------------------------------------------------------
+
+    def _start_deep_profile(self):
+        import cProfile
+
+        try:
+            from pyinstrument import Profiler as PyInstrument  # type: ignore
+
+            self._profiler = PyInstrument()
+            self._profiler.start()
+        except ImportError:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _stop_deep_profile(self, name: str):
+        import cProfile
+        import io
+        import pstats
+
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return
+        out_dir = self.profile_dir or Path(".")
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = out_dir / f"profile_{name}.prof"
+            profiler.dump_stats(path)
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(25)
+            print(text.getvalue())
+            print(f"🔬 cProfile for stage '{name}' → {path} (open with snakeviz or pstats)")
+        else:
+            profiler.stop()
+            path = out_dir / f"profile_{name}.html"
+            path.write_text(profiler.output_html(), encoding="utf-8")
+            print(profiler.output_text(unicode=True, color=False))
+            print(f"🔬 pyinstrument for stage '{name}' → {path}")
+
+    # Report -----------------------------------------------------------------
+
+    def report(self) -> Dict:
+        """Everything collected so far as a JSON-ready dict."""
+        with self._lock:
+            functions = {
+                name: {"calls": int(v["calls"]), "seconds": round(v["seconds"], 4)}
+                for name, v in sorted(
+                    self.functions.items(), key=lambda kv: -kv[1]["seconds"]
+                )
+            }
+            counters = dict(self.counters)
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": list(self.stages),
+            "functions": functions,
+            "counters": counters,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_children_mb": peak_rss_mb(children=True),
+        }
+
+    def write(self, path: Path) -> Dict:
+        """Write the report as JSON and return it."""
+        data = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return data
+
+    def print_summary(self):
+        """Print stage timings and counters."""
+        data = self.report()
+        total = data["total_seconds"] or 1.0
+        print("\n⏱️  Stage timings:")
+        for row in data["stages"]:
+            print(
+                f"  {row['stage']:<16} {row['seconds']:8.2f}s "
+                f"({row['seconds'] / total * 100:4.1f}%)"
+            )
+        if data["counters"]:
+            print(
+                "  "
+                + "  ".join(f"{k}={v}" for k, v in sorted(data["counters"].items()))
+            )
+        if data["peak_rss_mb"] is not None:
+            print(f"  peak RSS: {data['peak_rss_mb']:.0f} MB")
+
+
+PROFILER = Profiler()
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator: accumulate call count and wall time in PROFILER.functions."""
+
+    def decorator(fn: Callable) -> Callable:
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PROFILER.record(label, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
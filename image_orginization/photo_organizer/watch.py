@@ -0,0 +1,599 @@
+"""Watch-folder mode: keep the organized output current as photos arrive.
+
+Each cycle:
+    1. Scan the input tree (polling; if watchdog is installed, file events
+       wake the scan immediately instead of waiting for the interval)
+    2. Ingest files that are new or changed and have settled (mtime older than
+       WATCH_SETTLE_SECONDS, so half-copied files are skipped until complete)
+    3. Assign each new item to an existing cluster via the stored indexes:
+           GPS      nearest clustered photo within the site radius (grid cells)
+           no GPS   photos within the time gap or ±WATCH_FILENAME_WINDOW
+                    filename numbers, accepted if pHash distance ≤ threshold
+       Leftovers are clustered among themselves (cluster_gps_only +
+       fused_cluster) and become new clusters
+    4. Reclassify and place only new or changed clusters. Placed files are
+       never moved or renamed, so existing output stays stable: a singleton
+       lands in misc-concrete-{city}/ and, once its cluster grows, later
+       members go to the cluster's own folder. A changed file replaces its
+       organized copy (same name if it stays in the same folder)
+
+With placement="move" the originals leave the input folder once placed;
+they are remembered as moved, not reported as removed. Files whose
+thumbnail fails are remembered too and retried only once they change.
+
+State (items, clusters, labels, placements, per-folder counters) is kept in
+_work/watch_state.json and rewritten atomically after every batch.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from slugify import slugify
+
+from .config import (
+    CITIES,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_BRAND,
+    DEFAULT_FUSE_THRESHOLD,
+    DEFAULT_HASH_THRESHOLD,
+    DEFAULT_MAX_EDGES,
+    DEFAULT_MODEL,
+    DEFAULT_PLACEMENT,
+    DEFAULT_SITE_DISTANCE_FEET,
+    DEFAULT_TIME_GAP_MINUTES,
+    DEFAULT_VERIFY_COPIES,
+    PLACEMENT_MAX_WORKERS,
+    USE_SEMANTIC_KEYWORDS,
+    WATCH_FILENAME_WINDOW,
+    WATCH_INTERVAL_SECONDS,
+    WATCH_SETTLE_SECONDS,
+    WATCH_STATE,
+)
+from .ingestion import find_images, ingest_files
+from .models import Item, item_from_dict, item_to_dict
+from .organization import cluster_folder, semantic_variants_for, seo_basename
+from .placement import PlacementEngine
+from .transcode import TranscodeOptions
+from .utils.filename import name_features
+from .utils.geo import meters_between, nearest_city
+
+METERS_PER_DEGREE = 111_320
+STATE_VERSION = 1
+
+
+@dataclass
+class WatchOptions:
+    """Settings shared by every incremental batch."""
+
+    site_meters: float = DEFAULT_SITE_DISTANCE_FEET * 0.3048
+    time_gap_min: int = DEFAULT_TIME_GAP_MINUTES
+    hash_threshold: int = DEFAULT_HASH_THRESHOLD
+    filename_window: int = WATCH_FILENAME_WINDOW
+    brand: str = DEFAULT_BRAND
+    rotate_cities: bool = True
+    use_semantic_keywords: bool = USE_SEMANTIC_KEYWORDS
+    classify: bool = True
+    batch_size: int = DEFAULT_BATCH_SIZE
+    model: str = DEFAULT_MODEL
+    place: bool = True
+    placement: str = DEFAULT_PLACEMENT
+    verify: bool = DEFAULT_VERIFY_COPIES
+    placement_workers: int = PLACEMENT_MAX_WORKERS
+    transcode: Optional[TranscodeOptions] = None
+    interval: float = WATCH_INTERVAL_SECONDS
+    settle: float = WATCH_SETTLE_SECONDS
+
+
+class ClusterIndex:
+    """Lookup structures over already-clustered items.
+
+    - GPS: grid cells about site_meters wide (3x3 neighbourhood lookup)
+    - time: sorted (timestamp, key) list, bisected by the time gap
+    - filename: per-prefix sorted (number, key) lists, bisected by the window
+    """
+
+    def __init__(
+        self,
+        site_meters: float,
+        time_gap_min: int,
+        hash_threshold: int,
+        filename_window: int = WATCH_FILENAME_WINDOW,
+    ):
+        self.site_meters = site_meters
+        self.time_gap_s = time_gap_min * 60
+        self.hash_threshold = hash_threshold
+        self.filename_window = filename_window
+        self.items: Dict[str, Item] = {}
+        self.cluster_of: Dict[str, int] = {}
+        self._cell_deg = max(site_meters, 1.0) / METERS_PER_DEGREE
+        self._cells: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        self._times: List[Tuple[float, str]] = []
+        self._names: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+
+    def _cell(self, gps: Tuple[float, float]) -> Tuple[int, int]:
+        lat, lon = gps
+        return (
+            math.floor(lat / self._cell_deg),
+            math.floor(lon * math.cos(math.radians(lat)) / self._cell_deg),
+        )
+
+    def add(self, key: str, item: Item, cluster: int):
+        self.items[key] = item
+        self.cluster_of[key] = cluster
+        if item.gps:
+            self._cells[self._cell(item.gps)].append(key)
+        if item.dt:
+            insort(self._times, (item.dt.timestamp(), key))
+        nf = name_features(item.path)
+        if nf.num is not None:
+            insort(self._names[nf.prefix], (nf.num, key))
+
+    def remove(self, key: str) -> Optional[int]:
+        """Drop an item; returns the cluster it belonged to."""
+        item = self.items.pop(key, None)
+        cluster = self.cluster_of.pop(key, None)
+        if item is None:
+            return cluster
+        if item.gps:
+            self._cells[self._cell(item.gps)].remove(key)
+        if item.dt:
+            self._times.remove((item.dt.timestamp(), key))
+        nf = name_features(item.path)
+        if nf.num is not None:
+            self._names[nf.prefix].remove((nf.num, key))
+        return cluster
+
+    def _nearest_site(self, gps: Tuple[float, float]) -> Optional[int]:
+        row, col = self._cell(gps)
+        best, best_m = None, self.site_meters
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                for key in self._cells.get((row + dr, col + dc), ()):
+                    m = meters_between(gps, self.items[key].gps)
+                    if m <= best_m:
+                        best, best_m = self.cluster_of[key], m
+        return best
+
+    def _candidates(self, item: Item) -> Set[str]:
+        keys: Set[str] = set()
+        if item.dt:
+            t = item.dt.timestamp()
+            lo = bisect_left(self._times, (t - self.time_gap_s, ""))
+            hi = bisect_right(self._times, (t + self.time_gap_s, "\uffff"))
+            keys.update(key for _, key in self._times[lo:hi])
+        nf = name_features(item.path)
+        if nf.num is not None:
+            bucket = self._names.get(nf.prefix, [])
+            lo = bisect_left(bucket, (nf.num - self.filename_window, ""))
+            hi = bisect_right(bucket, (nf.num + self.filename_window, "\uffff"))
+            keys.update(key for _, key in bucket[lo:hi])
+        return keys
+
+    def find(self, item: Item) -> Optional[int]:
+        """Existing cluster for a new item, or None."""
+        if item.gps:
+            cluster = self._nearest_site(item.gps)
+            if cluster is not None:
+                return cluster
+        if item.h is None:
+            return None
+        best, best_d = None, self.hash_threshold
+        for key in sorted(self._candidates(item)):
+            other = self.items[key].h
+            if other is None:
+                continue
+            d = item.h - other
+            if d <= best_d:
+                best, best_d = self.cluster_of[key], d
+        return best
+
+
+class Watcher:
+    """Incremental ingest → assign → classify → place over one input folder."""
+
+    def __init__(self, input_dir: Path, out_dir: Path, options: WatchOptions):
+        self.input_dir = input_dir
+        self.options = options
+        self.work_dir = out_dir / "_work"
+        self.organized_dir = out_dir / "organized_photos"
+        self.state_path = self.work_dir / WATCH_STATE
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.state = self._load_state()
+        self.index = ClusterIndex(
+            options.site_meters,
+            options.time_gap_min,
+            options.hash_threshold,
+            options.filename_window,
+        )
+        for key, data in self.state["items"].items():
+            self.index.add(key, item_from_dict(data), self.state["files"][key]["cluster"])
+
+    # State -----------------------------------------------------------------
+
+    def _load_state(self) -> Dict:
+        empty = {
+            "version": STATE_VERSION,
+            "next_cluster": 1,
+            "files": {},
+            "items": {},
+            "clusters": {},
+            "folders": {},
+            "failed": {},
+        }
+        if not self.state_path.exists():
+            return empty
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION:
+            print(f"[warn] {self.state_path.name} has an unknown version; starting fresh")
+            return empty
+        state.setdefault("failed", {})
+        return state
+
+    def save_state(self):
+        """Write the state atomically (temp file + rename)."""
+        tmp = self.state_path.with_suffix(".json.part")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _cluster(self, cid: int) -> Dict:
+        return self.state["clusters"].setdefault(
+            str(cid),
+            {
+                "members": [],
+                "label": None,
+                "folder": None,
+                "surface": None,
+                "city": None,
+                "placed": {},
+            },
+        )
+
+    def _new_cluster(self) -> int:
+        cid = self.state["next_cluster"]
+        self.state["next_cluster"] = cid + 1
+        return cid
+
+    def _drop(self, key: str) -> Optional[int]:
+        """Forget a file (removed or changed); returns its former cluster."""
+        cid = self.index.remove(key)
+        self.state["files"].pop(key, None)
+        self.state["items"].pop(key, None)
+        if cid is not None:
+            cluster = self._cluster(cid)
+            if key in cluster["members"]:
+                cluster["members"].remove(key)
+            # A changed file is placed again; organized copies of removed files are kept
+            cluster["placed"].pop(key, None)
+            if not cluster["members"]:
+                del self.state["clusters"][str(cid)]
+                return None
+        return cid
+
+    # Scan ------------------------------------------------------------------
+
+    def scan(self, settle: Optional[float] = None) -> Tuple[List[Path], List[str]]:
+        """Settled new/changed files and keys of files that disappeared.
+
+        Files moved into the output (placement="move") are not reported as
+        removed, and files that failed to ingest come back only once changed.
+        """
+        settle = self.options.settle if settle is None else settle
+        now = time.time()
+        current: Dict[str, Tuple[int, float]] = {}
+        for p in find_images(self.input_dir):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            current[str(p)] = (st.st_size, st.st_mtime)
+
+        ready = []
+        for key, (size, mtime) in sorted(current.items()):
+            known = self.state["files"].get(key) or self.state["failed"].get(key)
+            if known and known["size"] == size and known["mtime"] == mtime:
+                continue
+            if now - mtime < settle:
+                continue  # Still being written
+            ready.append(Path(key))
+        removed = [
+            key
+            for key, entry in self.state["files"].items()
+            if key not in current and not entry.get("moved")
+        ]
+        return ready, removed
+
+    # Batch -----------------------------------------------------------------
+
+    def process(self, paths: List[Path], removed: Optional[List[str]] = None) -> Dict:
+        """Ingest, assign, reclassify and place one batch of changes."""
+        from .clustering import cluster_gps_only, fused_cluster
+
+        started = time.perf_counter()
+        changed: Set[int] = set()
+        # Changed file → its current organized copy, replaced once it is placed again
+        superseded: Dict[str, str] = {}
+
+        for key in removed or []:
+            cid = self._drop(key)
+            if cid is not None:
+                changed.add(cid)
+        for p in paths:
+            key = str(p)
+            entry = self.state["files"].get(key)
+            if entry is None:
+                continue
+            if not entry.get("moved"):  # A moved file's copy is the original
+                old = self._cluster(entry["cluster"])["placed"].get(key)
+                if old:
+                    superseded[key] = old
+            cid = self._drop(key)
+            if cid is not None:
+                changed.add(cid)
+
+        items = ingest_files(paths, self.work_dir) if paths else []
+        self._record_failures(paths, items)
+        items.sort(key=lambda it: (it.dt is None, it.dt or datetime.min, it.path.name))
+
+        joined = 0
+        leftovers: List[Item] = []
+        for it in items:
+            cid = self.index.find(it)
+            if cid is None:
+                leftovers.append(it)
+                continue
+            self._add(it, cid)
+            changed.add(cid)
+            joined += 1
+
+        # Photos that matched nothing: cluster them among themselves
+        gps_groups, gps_singletons = cluster_gps_only(
+            [it for it in leftovers if it.gps], max_meters=self.options.site_meters
+        )
+        rest = [it for it in leftovers if not it.gps] + gps_singletons
+        name_map = {it.id: name_features(it.path) for it in rest}
+        new_groups = gps_groups + fused_cluster(
+            rest,
+            name_map,
+            fuse_threshold=DEFAULT_FUSE_THRESHOLD,
+            max_edges_per_node=DEFAULT_MAX_EDGES,
+            time_gap_minutes=self.options.time_gap_min,
+        )
+        for group in new_groups:
+            cid = self._new_cluster()
+            for it in group:
+                self._add(it, cid)
+            changed.add(cid)
+
+        changed = {cid for cid in changed if str(cid) in self.state["clusters"]}
+        self._label(changed)
+        placed = self._place(changed, superseded) if self.options.place else 0
+        self.save_state()
+
+        summary = {
+            "ingested": len(items),
+            "joined": joined,
+            "new_clusters": len(new_groups),
+            "changed_clusters": len(changed),
+            "removed": len(removed or []),
+            "placed": placed,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+        print(
+            f"⚡ {summary['ingested']} new/changed files → {joined} joined existing clusters, "
+            f"{summary['new_clusters']} new clusters; {len(changed)} clusters updated, "
+            f"{placed} files placed in {summary['seconds']}s"
+        )
+        return summary
+
+    def _record_failures(self, paths: List[Path], items: List[Item]):
+        """Remember files that didn't ingest so scan() skips them until they change."""
+        failed = self.state["failed"]
+        ingested = {str(it.path) for it in items}
+        for p in paths:
+            key = str(p)
+            if key in ingested:
+                failed.pop(key, None)
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                failed.pop(key, None)
+                continue
+            failed[key] = {"size": st.st_size, "mtime": st.st_mtime}
+        for key in [k for k in failed if not os.path.exists(k)]:
+            del failed[key]
+
+    def _add(self, item: Item, cid: int):
+        key = str(item.path)
+        st = item.path.stat()
+        self.index.add(key, item, cid)
+        self.state["items"][key] = item_to_dict(item)
+        self.state["files"][key] = {"size": st.st_size, "mtime": st.st_mtime, "cluster": cid}
+        self._cluster(cid)["members"].append(key)
+
+    def _members(self, cid: int) -> List[Item]:
+        return [self.index.items[key] for key in self._cluster(cid)["members"]]
+
+    def _label(self, clusters: Set[int]):
+        """Reclassify changed clusters (one example each) or assign fallback labels."""
+        if not clusters:
+            return
+        ordered = sorted(clusters)
+        if self.options.classify:
+            from .ai_classification import classify_cluster_examples
+
+            groups = [self._members(cid) for cid in ordered]
+            labels = classify_cluster_examples(
+                groups, self.options.batch_size, self.options.model
+            )
+            for cid, group in zip(ordered, groups):
+                self._cluster(cid)["label"] = labels.get(group[0].id)
+        for cid in ordered:
+            cluster = self._cluster(cid)
+            if not cluster["label"]:
+                cluster["label"] = {
+                    "label": f"cluster-{cid}",
+                    "confidence": 0.0,
+                    "descriptor": "",
+                }
+
+    def _next_index(self, folder: Path, base_for, ext: str) -> Tuple[int, Path]:
+        """Next free per-folder index (skips names already on disk)."""
+        idx = self.state["folders"].get(folder.name, 0)
+        while True:
+            idx += 1
+            dst = folder / f"{base_for(idx)}{ext}"
+            if not os.path.lexists(dst):
+                self.state["folders"][folder.name] = idx
+                return idx, dst
+
+    def _place(self, clusters: Set[int], superseded: Optional[Dict[str, str]] = None) -> int:
+        """Place members of changed clusters that haven't been placed yet.
+
+        superseded maps changed files to their previous organized copy: the
+        new version reuses that name if it lands in the same folder, otherwise
+        the old copy is deleted once the new one is placed.
+        """
+        superseded = superseded or {}
+        todo = []
+        for cid in sorted(clusters):
+            cluster = self._cluster(cid)
+            unplaced = [k for k in cluster["members"] if k not in cluster["placed"]]
+            if unplaced:
+                todo.append((cid, unplaced))
+        if not todo:
+            return 0
+
+        engine = PlacementEngine(
+            self.organized_dir,
+            mode=self.options.placement,
+            verify=self.options.verify,
+            max_workers=self.options.placement_workers,
+            transcode=self.options.transcode,
+        )
+        cycle = list(CITIES.keys())
+        for cid, unplaced in todo:
+            cluster = self._cluster(cid)
+            members = self._members(cid)
+            label = cluster["label"]
+            gps_any = next((it.gps for it in members if it.gps), None)
+            city = cluster["city"] or nearest_city(
+                gps_any, cycle if self.options.rotate_cities else CITIES, cid - 1
+            )
+
+            if len(members) > 1:
+                cluster["city"] = city
+                if not cluster["folder"]:
+                    labels = {it.id: label for it in members}
+                    cluster["folder"], _, cluster["surface"] = cluster_folder(
+                        members, labels, city
+                    )
+                folder = self.organized_dir / cluster["folder"]
+                surface = cluster.get("surface")
+            else:
+                folder = self.organized_dir / f"misc-concrete-{slugify(city, lowercase=True)}"
+                surface = None
+            folder.mkdir(parents=True, exist_ok=True)
+            variants = semantic_variants_for(label["label"], self.options.use_semantic_keywords)
+
+            for key in unplaced:
+                it = self.index.items[key]
+                ext = engine.output_ext(it.path)
+
+                def base_for(idx: int) -> str:
+                    keyword = variants[(idx - 1) % len(variants)]
+                    return seo_basename(keyword, surface, city, self.options.brand, idx)
+
+                old = superseded.get(key)
+                if old and Path(old).parent == folder and Path(old).suffix == ext:
+                    idx, dst = None, Path(old)
+                else:
+                    idx, dst = self._next_index(folder, base_for, ext)
+                engine.submit(
+                    it.path,
+                    dst,
+                    {
+                        "key": key,
+                        "src": str(it.path),
+                        "dst": str(dst),
+                        "cluster": cid,
+                        "label": label["label"],
+                        "city": city,
+                        "index": idx,
+                    },
+                )
+
+        records = engine.finish()
+        for record in records:
+            key = record["key"]
+            self._cluster(record["cluster"])["placed"][key] = record["dst"]
+            if self.options.placement == "move":
+                self.state["files"][key]["moved"] = True
+            old = superseded.get(key)
+            if old and old != record["dst"] and os.path.lexists(old):
+                os.unlink(old)
+        return len(records)
+
+    # Loop ------------------------------------------------------------------
+
+    def _start_observer(self, wake: threading.Event):
+        """watchdog observer that sets `wake` on any file event (None if unavailable)."""
+        try:
+            from watchdog.events import FileSystemEventHandler  # type: ignore
+            from watchdog.observers import Observer  # type: ignore
+        except ImportError:
+            return None
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        observer = Observer()
+        observer.schedule(Handler(), str(self.input_dir), recursive=True)
+        observer.start()
+        return observer
+
+    def run(self, once: bool = False):
+        """Process changes until interrupted (once=True: one pass, no settle wait)."""
+        if once:
+            paths, removed = self.scan(settle=0)
+            if paths or removed:
+                self.process(paths, removed)
+            else:
+                print("✅ Nothing new to organize")
+            return
+
+        wake = threading.Event()
+        observer = self._start_observer(wake)
+        mode = "inotify/FSEvents via watchdog" if observer else "polling"
+        print(
+            f"👀 Watching {self.input_dir} ({mode}, every {self.options.interval}s); "
+            f"output → {self.organized_dir}. Ctrl+C to stop."
+        )
+        try:
+            while True:
+                paths, removed = self.scan()
+                if paths or removed:
+                    self.process(paths, removed)
+                wake.wait(self.options.interval)
+                if wake.is_set():
+                    wake.clear()
+                    # Let a burst of events (multi-file drop) finish landing
+                    time.sleep(self.options.settle)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
@@ -0,0 +1,154 @@
+"""Tests for sharded ingest/clustering and the cross-shard merge."""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import imagehash
+import numpy as np
+import pytest
+from PIL import Image
+from photo_organizer import sharding
+from photo_organizer.models import Item, item_to_dict
+from photo_organizer.sharding import ShardOptions, merge_shards, plan_shards, run_sharded
+
+
+def make_item(name, phash_hex=None, gps=None, dt=None):
+    return Item(
+        id=name,
+        path=Path("/lib") / name,
+        thumb=Path(name),
+        dt=dt,
+        gps=gps,
+        h=imagehash.hex_to_hash(phash_hex) if phash_hex else None,
+    )
+
+
+def shard_result(groups, kind="fused"):
+    """Shard result dict as written by run_shard (no duplicates)."""
+    items = [it for g in groups for it in g]
+    return {
+        "items": [item_to_dict(it) for it in items],
+        "clustered": [str(it.path) for it in items],
+        "groups": [{"kind": kind, "members": [str(it.path) for it in g]} for g in groups],
+        "duplicates": {},
+        "duplicate_records": [],
+    }
+
+
+def write_scene(path: Path, scene: int, shot: int):
+    """Small JPEG whose pHash depends on the scene, with per-shot noise."""
+    base = np.random.default_rng(scene).integers(0, 256, size=(6, 8, 3), dtype=np.uint8)
+    img = np.asarray(Image.fromarray(base, "RGB").resize((160, 120)), dtype=np.int16)
+    noise = np.random.default_rng(1000 + shot).normal(0, 4, img.shape)
+    Image.fromarray(np.clip(img + noise, 0, 255).astype(np.uint8), "RGB").save(path, "JPEG")
+
+
+class TestPlanShards:
+    """Partitioning is balanced and deterministic."""
+
+    def test_by_dir_keeps_folders_together(self, tmp_path):
+        for folder, n in (("a", 4), ("b", 2), ("c", 2)):
+            (tmp_path / folder).mkdir()
+            for i in range(n):
+                (tmp_path / folder / f"IMG_{i}.jpg").write_bytes(b"x")
+
+        shards = plan_shards(tmp_path, 2, by="dir")
+        assert sorted(len(s) for s in shards) == [4, 4]
+        assert {p.parent.name for p in shards[0]} in ({"a"}, {"b", "c"})
+        assert shards == plan_shards(tmp_path, 2, by="dir")
+
+    def test_by_dir_splits_large_folder(self, tmp_path):
+        for i in range(9):
+            (tmp_path / f"IMG_{i}.jpg").write_bytes(b"x")
+        shards = plan_shards(tmp_path, 3, by="dir")
+        assert [len(s) for s in shards] == [3, 3, 3]
+        # Contiguous filename ranges
+        assert [p.name for p in shards[0]] == ["IMG_0.jpg", "IMG_1.jpg", "IMG_2.jpg"]
+
+    def test_by_date_uses_mtime_ranges(self, tmp_path):
+        for i in range(6):
+            p = tmp_path / f"IMG_{i}.jpg"
+            p.write_bytes(b"x")
+            os.utime(p, (1_700_000_000 - i * 60, 1_700_000_000 - i * 60))
+        shards = plan_shards(tmp_path, 2, by="date")
+        assert [p.name for p in shards[0]] == ["IMG_5.jpg", "IMG_4.jpg", "IMG_3.jpg"]
+
+
+class TestMergeShards:
+    """Clusters cut by a shard boundary are stitched back together."""
+
+    def test_time_window_and_gps_joins(self):
+        dt = datetime(2024, 5, 1, 12, 0)
+        burst_a = [
+            make_item(f"IMG_{i:04d}.jpg", "ffff0000ffff0000", dt=dt + timedelta(minutes=i))
+            for i in (1, 2)
+        ]
+        burst_b = [make_item("IMG_0003.jpg", "ffff0000ffff0001", dt=dt + timedelta(minutes=3))]
+        other = [make_item("IMG_0004.jpg", "0000ffff0000ffff", dt=dt + timedelta(minutes=4))]
+        site_a = [make_item("DSC_0001.jpg", gps=(47.25, -122.44))]
+        site_b = [make_item("DSC_0900.jpg", gps=(47.2501, -122.4401))]
+
+        merged = merge_shards(
+            [
+                shard_result([burst_a]),
+                shard_result([burst_b, other]),
+                shard_result([site_a], kind="gps"),
+                shard_result([site_b], kind="gps"),
+            ],
+            ShardOptions(site_meters=50, time_gap_min=30, hash_threshold=4),
+        )
+        assert merged.stitched == 2
+        assert sorted(sorted(it.id for it in g) for g in merged.fused_groups) == [
+            ["IMG_0001.jpg", "IMG_0002.jpg", "IMG_0003.jpg"],
+            ["IMG_0004.jpg"],
+        ]
+        assert [sorted(it.id for it in g) for g in merged.gps_groups] == [
+            ["DSC_0001.jpg", "DSC_0900.jpg"]
+        ]
+
+
+class TestRunSharded:
+    """Local process pool end to end."""
+
+    def test_pool_and_resume(self, tmp_path, capsys):
+        input_dir, work_dir = tmp_path / "in", tmp_path / "_work"
+        for folder, shots in (("day1", (1, 2, 3)), ("day2", (4, 5))):
+            (input_dir / folder).mkdir(parents=True)
+            for i in shots:
+                write_scene(input_dir / folder / f"IMG_{i:04d}.jpg", scene=1, shot=i)
+        write_scene(input_dir / "day2" / "DSC_0500.jpg", scene=2, shot=9)
+
+        options = ShardOptions(dedupe=False)
+        merged = run_sharded(input_dir, work_dir, 2, options, by="dir")
+        assert len(merged.items) == 6
+        groups = sorted(sorted(it.id for it in g) for g in merged.fused_groups)
+        assert ["IMG_0001.jpg", "IMG_0002.jpg", "IMG_0003.jpg", "IMG_0004.jpg", "IMG_0005.jpg"] in groups
+        assert (work_dir / "shards" / "shard_0.json").exists()
+
+        # Second run reuses both shard results
+        run_sharded(input_dir, work_dir, 2, options, by="dir")
+        assert "2 already done" in capsys.readouterr().out
+
+    def test_concurrent_writers_use_separate_temp_files(self, tmp_path, monkeypatch):
+        temps = []
+        real_replace = os.replace
+
+        def record_replace(src, dst):
+            temps.append(Path(src).name)
+            real_replace(src, dst)
+
+        monkeypatch.setattr(sharding.os, "replace", record_replace)
+        for pid in (101, 102):  # Two --shard-index processes writing plan.json
+            monkeypatch.setattr(sharding.os, "getpid", lambda pid=pid: pid)
+            sharding._write_json(tmp_path / "plan.json", {"pid": pid})
+        assert len(set(temps)) == 2
+        assert list(tmp_path.iterdir()) == [tmp_path / "plan.json"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -10,7 +10,24 @@ sys.path.insert(0, str(project_root))
 import pytest
 from photo_organizer.models import NameFeat
 from photo_organizer.utils.filename import name_features, filename_score, lcp_len
-from photo_organizer.utils.geo import haversine, meters_between
+import hashlib
+import subprocess
+from photo_organizer.utils import geo
+from photo_organizer.utils.image import short_hash
+from photo_organizer.utils.hashing import (
+    hash_file,
+    partial_hash,
+    hash_files,
+    find_duplicate_files,
+)
+from photo_organizer.utils.geo import (
+    haversine,
+    meters_between,
+    nearest_city,
+    nearest_cities,
+    CityLocator,
+)
+from photo_organizer.utils.profiling import Profiler, PROFILER, timed
 
 
 class TestFilenameUtils:
@@ -76,5 +93,179 @@ class TestGeoUtils:
         assert 80 < distance < 120  # ~100m with some margin for calculation precision
 
 
+CITIES_SAMPLE = {
+    "puyallup": (47.1854, -122.2929),
+    "bellevue": (47.6101, -122.2015),
+    "tacoma": (47.2529, -122.4443),
+    "sydney": (-33.8688, 151.2093),
+}
+
+
+class TestCityLocator:
+    """Test KD-tree city lookup."""
+
+    def test_nearest_matches_brute_force(self):
+        locator = CityLocator(CITIES_SAMPLE)
+        points = [(47.60, -122.33), (47.20, -122.40), (-33.9, 151.0), (47.19, -122.29)]
+        for lat, lon in points:
+            name, km = locator.nearest(lat, lon)
+            best = min(CITIES_SAMPLE, key=lambda c: haversine(lat, lon, *CITIES_SAMPLE[c]))
+            assert name == best
+            assert km == pytest.approx(haversine(lat, lon, *CITIES_SAMPLE[best]), rel=1e-6)
+
+    def test_numpy_fallback(self, monkeypatch):
+        monkeypatch.setattr(geo, "cKDTree", None)
+        locator = CityLocator(CITIES_SAMPLE)
+        assert [n for n, _ in locator.nearest_many([(47.25, -122.44), (-33.0, 150.0)])] == [
+            "tacoma",
+            "sydney",
+        ]
+
+    def test_memoised_by_rounded_coordinate(self):
+        locator = CityLocator(CITIES_SAMPLE, memo_decimals=2)
+        locator.nearest_many([(47.6101, -122.2015), (47.6102, -122.2016)])
+        assert len(locator._memo) == 1
+
+    def test_gazetteer_csv_and_geonames(self, tmp_path):
+        csv_path = tmp_path / "places.csv"
+        csv_path.write_text("name,latitude,longitude,population\nfife,47.239,-122.357,10000\nhamlet,47.24,-122.36,12\n")
+        locator = CityLocator.from_gazetteer(csv_path, min_population=100)
+        assert locator.names == ["fife"]
+
+        row = ["1", "auburn", "auburn", ""] + ["47.307", "-122.228"] + [""] * 8 + ["87000"] + [""] * 4
+        tsv_path = tmp_path / "US.txt"
+        tsv_path.write_text("\t".join(row) + "\n")
+        assert CityLocator.from_gazetteer(tsv_path).nearest(47.3, -122.2)[0] == "auburn"
+
+    def test_gazetteer_keeps_every_row_of_a_repeated_name(self, tmp_path):
+        csv_path = tmp_path / "places.csv"
+        csv_path.write_text(
+            "name,lat,lon\nspringfield,39.80,-89.64\nspringfield,44.05,-123.02\n"
+        )
+        locator = CityLocator.from_gazetteer(csv_path)
+        assert len(locator) == 2
+        name, km = locator.nearest(44.0, -123.0)  # Springfield, Oregon
+        assert name == "springfield"
+        assert km < 10
+
+    def test_nearest_city_fallbacks(self):
+        assert nearest_city(None, ["a", "b"], 3) == "b"
+        assert nearest_city(None, {"x": (0, 0), "y": (1, 1)}, 3) == "x"
+        assert nearest_cities([(47.25, -122.44), None], ["a"]) == ["tacoma", "a"]
+
+
+class TestHashing:
+    """Test streaming hashes and duplicate detection."""
+
+    def test_streaming_matches_hashlib(self, tmp_path):
+        p = tmp_path / "big.raw"
+        data = bytes(range(256)) * 5000  # Spans several small chunks
+        p.write_bytes(data)
+        assert hash_file(p, "blake2b", chunk_size=4096) == hashlib.blake2b(data).hexdigest()
+        assert hash_file(p, "sha1") == hashlib.sha1(data).hexdigest()
+        assert short_hash(p) == hashlib.md5(data).hexdigest()[:12]
+
+    def test_unknown_algorithm(self, tmp_path):
+        p = tmp_path / "a"
+        p.write_bytes(b"x")
+        with pytest.raises(ValueError):
+            hash_file(p, "crc32")
+
+    def test_partial_hash_ignores_middle(self, tmp_path):
+        a, b = tmp_path / "a", tmp_path / "b"
+        head, tail = b"h" * 70000, b"t" * 70000
+        a.write_bytes(head + b"AAAA" + tail)
+        b.write_bytes(head + b"BBBB" + tail)
+        assert partial_hash(a) == partial_hash(b)
+        assert hash_file(a) != hash_file(b)
+
+    def test_find_duplicates(self, tmp_path):
+        head, tail = b"h" * 70000, b"t" * 70000
+        files = {
+            "orig.jpg": head + b"AAAA" + tail,
+            "orig (1).jpg": head + b"AAAA" + tail,
+            "airdrop.jpg": head + b"AAAA" + tail,
+            "edited.jpg": head + b"BBBB" + tail,  # Same size + partial, differs
+            "other.jpg": b"small",
+        }
+        paths = []
+        for name, data in files.items():
+            (tmp_path / name).write_bytes(data)
+            paths.append(tmp_path / name)
+        paths.append(tmp_path / "missing.jpg")
+
+        groups = find_duplicate_files(paths, max_workers=2)
+        assert [[p.name for p in g] for g in groups] == [
+            ["orig.jpg", "orig (1).jpg", "airdrop.jpg"]
+        ]
+
+        digests = hash_files(paths, max_workers=2)
+        assert digests[tmp_path / "missing.jpg"] is None
+        assert digests[paths[0]] == digests[paths[1]]
+
+
+class TestProfiling:
+    """Test stage timers, function timers and counters."""
+
+    def test_stages_counters_and_report(self, tmp_path):
+        prof = Profiler()
+        prof.begin("ingest")
+        prof.end("ingest")
+        with prof.stage("organize"):
+            prof.count("files_placed", 3)
+            prof.count("files_placed")
+        prof.end("never_started")  # Ignored
+
+        data = prof.write(tmp_path / "profile.json")
+        assert [s["stage"] for s in data["stages"]] == ["ingest", "organize"]
+        assert data["counters"] == {"files_placed": 4}
+        assert (tmp_path / "profile.json").exists()
+
+    def test_timed_decorator(self):
+        @timed("test.square")
+        def square(x):
+            return x * x
+
+        before = PROFILER.functions.get("test.square", {"calls": 0})["calls"]
+        assert square(3) == 9
+        assert square(4) == 16
+        assert PROFILER.functions["test.square"]["calls"] == before + 2
+
+    def test_deep_profile_stage(self, tmp_path):
+        prof = Profiler()
+        prof.profile_stage = "cluster_gps"
+        prof.profile_dir = tmp_path
+        with prof.stage("cluster_gps"):
+            sum(range(1000))
+        assert list(tmp_path.glob("profile_cluster_gps.*"))
+
+
+class TestLazyImports:
+    """Importing the CLI must not load heavy dependencies."""
+
+    def test_cli_import_is_light(self):
+        code = (
+            "import sys, photo_organizer.cli; "
+            "print(','.join(m for m in ('PIL', 'numpy', 'scipy', 'imagehash', 'openai', 'dotenv') "
+            "if m in sys.modules))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert out.stdout.strip() == ""
+
+    def test_package_exports_resolve_lazily(self):
+        from photo_organizer import clustering, utils
+
+        assert callable(utils.meters_between)
+        assert callable(clustering.fused_cluster)
+        with pytest.raises(AttributeError):
+            utils.not_a_helper
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -6,10 +6,12 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+import imagehash
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from photo_organizer.models import Item
-from photo_organizer.clustering import cluster_gps_only, phash_score, time_score
+from photo_organizer.clustering import cluster_gps_only, fused_cluster, phash_score, time_score
+from photo_organizer.utils.filename import name_features
 
 
 class TestGPSClustering:
@@ -102,5 +104,41 @@ class TestTemporalScoring:
         assert score == 0.0
 
 
+class TestFusedClustering:
+    """Test candidate generation in fused clustering."""
+
+    @staticmethod
+    def make_item(name, dt, phash_hex):
+        return Item(
+            id=name,
+            path=Path(f"/tmp/{name}"),
+            thumb=Path(f"/tmp/{name}"),
+            dt=dt,
+            gps=None,
+            h=imagehash.hex_to_hash(phash_hex),
+        )
+
+    def test_same_minute_different_cameras(self):
+        """Phone and DSLR shots from the same minute meet via the time sweep."""
+        dt = datetime(2024, 5, 1, 12, 0, 0)
+        items = [
+            self.make_item("PXL_20240501_120004512.jpg", dt, "ffff0000ffff0000"),
+            self.make_item("DSC_0500.JPG", dt + timedelta(seconds=30), "ffff0000ffff0001"),
+            self.make_item("DSC_0501.JPG", dt + timedelta(days=2), "0000ffff0000ffff"),
+        ]
+        name_map = {it.id: name_features(it.path) for it in items}
+        assert name_map[items[0].id].prefix != name_map[items[1].id].prefix
+
+        clusters = fused_cluster(items, name_map, fuse_threshold=0.5, max_edges_per_node=32)
+        ids = sorted(sorted(it.id for it in c) for c in clusters)
+        assert ids == [["DSC_0500.JPG", "PXL_20240501_120004512.jpg"], ["DSC_0501.JPG"]]
+
+        # A tighter time gap keeps the 30 s apart shots out of each other's candidates
+        clusters = fused_cluster(
+            items, name_map, fuse_threshold=0.5, max_edges_per_node=32, time_gap_minutes=0
+        )
+        assert len(clusters) == 3
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,160 @@
+"""Tests for token-aware batch planning."""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from photo_organizer.models import Item
+from photo_organizer.config import PROMPT_OVERHEAD_TOKENS
+from photo_organizer.ai_classification import openai_classifier
+from photo_organizer.ai_classification.batch_planner import (
+    BatchPlanner,
+    estimate_image_tokens,
+    estimate_cost,
+)
+
+
+def make_items(n):
+    return [
+        Item(
+            id=f"{i}.jpg",
+            path=Path(f"/tmp/{i}.jpg"),
+            thumb=Path(f"/tmp/missing_thumb_{i}.jpg"),
+            dt=None,
+            gps=None,
+            h=None,
+        )
+        for i in range(n)
+    ]
+
+
+class TestTokenEstimates:
+    """Test OpenAI tile-rule token estimates."""
+
+    def test_single_tile(self):
+        assert estimate_image_tokens(512, 384) == 85 + 170
+
+    def test_low_detail(self):
+        assert estimate_image_tokens(4000, 3000, detail="low") == 85
+
+    def test_large_image_scaled(self):
+        # 4000x3000 → 2048x1536 → 1024x768 → 2x2 tiles
+        assert estimate_image_tokens(4000, 3000) == 85 + 170 * 4
+
+    def test_cost_unknown_model(self):
+        assert estimate_cost("no-such-model", 1000, 100) is None
+        assert estimate_cost("gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+
+
+class TestBatchPlanner:
+    """Test packing, shrinking and growth."""
+
+    def test_fixed_batch_size(self):
+        planner = BatchPlanner(batch_size=4)
+        batches = planner.plan(make_items(10))
+        assert [len(b) for b in batches] == [4, 4, 2]
+
+    def test_token_budget_packing(self):
+        per_image = BatchPlanner(1).image_tokens(make_items(1)[0])
+        budget = PROMPT_OVERHEAD_TOKENS + 3 * per_image
+        planner = BatchPlanner(batch_size=12, token_budget=budget)
+        batches = planner.plan(make_items(7))
+        assert [len(b) for b in batches] == [3, 3, 1]
+
+    def test_shrink_and_grow(self):
+        planner = BatchPlanner(batch_size=8)
+        planner.record_pressure()
+        assert planner.max_images == 4
+        for _ in range(BatchPlanner.GROW_AFTER_SUCCESSES):
+            planner.record_success()
+        assert planner.max_images == 5
+        for _ in range(20 * BatchPlanner.GROW_AFTER_SUCCESSES):
+            planner.record_success()
+        assert planner.max_images == 8
+
+    def test_report(self, tmp_path):
+        planner = BatchPlanner(batch_size=4, model="gpt-4o")
+        usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=100)
+        planner.record_batch(4, 2800, 1.5, usage=usage)
+        planner.record_batch(4, 2800, 0.5, retries=3, status="failed")
+        summary = planner.summary()
+        assert summary["batches"] == 1
+        assert summary["failed_batches"] == 1
+        assert summary["retries"] == 3
+        assert summary["cost_usd"] == pytest.approx(0.0035)
+
+        planner.write_report(tmp_path / "report.json")
+        data = json.loads((tmp_path / "report.json").read_text())
+        assert len(data["batches"]) == 2
+
+
+class RateLimited(Exception):
+    """Stand-in for openai.RateLimitError."""
+
+    def __str__(self):
+        return "rate_limit exceeded"
+
+
+class FakeClient:
+    """Fails any batch larger than max_ok images with a rate limit error."""
+
+    def __init__(self, max_ok):
+        self.max_ok = max_ok
+        self.sizes = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, response_format, messages):
+        ids = [
+            m["content"][0]["text"][3:]
+            for m in messages
+            if isinstance(m.get("content"), list)
+        ]
+        self.sizes.append(len(ids))
+        if len(ids) > self.max_ok:
+            raise RateLimited()
+        rows = [
+            {"id": i, "label": "concrete", "confidence": 0.9, "descriptor": ""}
+            for i in ids
+        ]
+        content = json.dumps({"images": rows})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10),
+        )
+
+
+def text_only_message(image_id, thumb_path):
+    return {"role": "user", "content": [{"type": "text", "text": f"id={image_id}"}]}
+
+
+class TestClassifyBatchesAdaptive:
+    """classify_batches shrinks and re-queues batches under rate limits."""
+
+    def test_requeue_after_rate_limits(self):
+        client = FakeClient(max_ok=2)
+        items = make_items(6)
+        planner = BatchPlanner(batch_size=6, model="gpt-4o")
+
+        with patch.object(openai_classifier, "OpenAI", lambda: client), patch.object(
+            openai_classifier, "create_image_message", text_only_message
+        ), patch.object(openai_classifier, "API_RATE_LIMIT_DELAY", 0), patch.object(
+            openai_classifier.time, "sleep"
+        ):
+            out = openai_classifier.classify_batches(
+                items, batch_size=6, model="gpt-4o", planner=planner
+            )
+
+        assert set(out) == {it.id for it in items}
+        assert client.sizes[0] == 6
+        assert planner.max_images <= 2
+        assert planner.summary()["failed_batches"] >= 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,247 @@
+"""Tests for parallel, journaled file placement."""
+
+import errno
+import json
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from photo_organizer import placement
+from photo_organizer.placement import PlacementEngine, verified_copy
+from photo_organizer.transcode import TranscodeOptions, transcode_image
+from PIL import Image
+
+
+def make_sources(root: Path, n: int):
+    src_dir = root / "src"
+    src_dir.mkdir()
+    paths = []
+    for i in range(n):
+        p = src_dir / f"IMG_{i}.jpg"
+        p.write_bytes(bytes([i]) * (1000 + i))
+        paths.append(p)
+    return paths
+
+
+def place_all(out_dir: Path, sources, **kwargs):
+    engine = PlacementEngine(out_dir, **kwargs)
+    for i, src in enumerate(sources):
+        dst = out_dir / "folder" / f"photo-{i:02d}.jpg"
+        engine.submit(src, dst, {"src": str(src), "dst": str(dst), "index": i})
+    return engine, engine.finish()
+
+
+class TestPlacementEngine:
+    """Copies, journals and resumes."""
+
+    def test_copies_in_submission_order(self, tmp_path):
+        sources = make_sources(tmp_path, 5)
+        out_dir = tmp_path / "out"
+        engine, records = place_all(out_dir, sources, max_workers=4)
+
+        assert [r["index"] for r in records] == list(range(5))
+        for src, rec in zip(sources, records):
+            assert Path(rec["dst"]).read_bytes() == src.read_bytes()
+        assert engine.counts["placed"] == 5
+        assert not list(out_dir.rglob("*.part"))
+
+        lines = (out_dir / engine.journal_path.name).read_text().splitlines()
+        assert len(lines) == 5
+
+    def test_rerun_skips_journaled(self, tmp_path):
+        sources = make_sources(tmp_path, 3)
+        out_dir = tmp_path / "out"
+        place_all(out_dir, sources)
+
+        # Changed source must be copied again; the others are skipped
+        sources[0].write_bytes(b"changed")
+        engine, records = place_all(out_dir, sources)
+
+        assert (engine.counts["placed"], engine.counts["skipped"]) == (1, 2)
+        assert engine.counts["bytes"] == len(b"changed")
+        assert len(records) == 3
+        assert (out_dir / "folder" / "photo-00.jpg").read_bytes() == b"changed"
+
+    def test_torn_journal_line_ignored(self, tmp_path):
+        sources = make_sources(tmp_path, 2)
+        out_dir = tmp_path / "out"
+        engine, _ = place_all(out_dir, sources)
+        with open(engine.journal_path, "a") as f:
+            f.write('{"src": "trunc')
+
+        engine, _ = place_all(out_dir, sources)
+        assert engine.counts["skipped"] == 2
+
+    def test_missing_source_is_reported_not_raised(self, tmp_path):
+        out_dir = tmp_path / "out"
+        engine, records = place_all(out_dir, [tmp_path / "nope.jpg"])
+        assert records == []
+        assert engine.counts["failed"] == 1
+
+    def test_verified_copy(self, tmp_path):
+        sources = make_sources(tmp_path, 2)
+        out_dir = tmp_path / "out"
+        engine, records = place_all(out_dir, sources, verify=True)
+        assert len(records) == 2
+        entries = [json.loads(l) for l in engine.journal_path.read_text().splitlines()]
+        assert all(e["hash"] for e in entries)
+
+        digest = verified_copy(sources[0], tmp_path / "copy.bin")
+        assert digest in {e["hash"] for e in entries}
+
+
+class TestPlacementModes:
+    """hardlink / reflink / symlink / move with fallback to copy."""
+
+    def test_hardlink_shares_inode(self, tmp_path):
+        sources = make_sources(tmp_path, 2)
+        engine, records = place_all(tmp_path / "out", sources, mode="hardlink")
+        for src, rec in zip(sources, records):
+            assert os.path.samefile(src, rec["dst"])
+        assert engine.counts["bytes"] == 0
+
+    def test_symlink_points_at_original(self, tmp_path):
+        sources = make_sources(tmp_path, 1)
+        _, records = place_all(tmp_path / "out", sources, mode="symlink")
+        dst = Path(records[0]["dst"])
+        assert dst.is_symlink()
+        assert dst.resolve() == sources[0].resolve()
+
+    def test_move_and_rerun(self, tmp_path):
+        sources = make_sources(tmp_path, 2)
+        data = [p.read_bytes() for p in sources]
+        out_dir = tmp_path / "out"
+        _, records = place_all(out_dir, sources, mode="move")
+        assert not any(p.exists() for p in sources)
+        assert [Path(r["dst"]).read_bytes() for r in records] == data
+
+        # Originals are gone; the journal still lets a rerun succeed
+        engine, records = place_all(out_dir, sources, mode="move")
+        assert engine.counts["skipped"] == 2
+        assert len(records) == 2
+
+    def test_move_restores_original_when_replace_fails(self, tmp_path, monkeypatch):
+        sources = make_sources(tmp_path, 1)
+        data = sources[0].read_bytes()
+
+        def failing_replace(src, dst):
+            raise OSError(errno.EACCES, os.strerror(errno.EACCES))
+
+        monkeypatch.setattr(placement.os, "replace", failing_replace)
+        engine, records = place_all(tmp_path / "out", sources, mode="move")
+        assert records == []
+        assert engine.counts["failed"] == 1
+        assert sources[0].read_bytes() == data
+        assert not list((tmp_path / "out").rglob("*.part"))
+
+    def test_stale_part_does_not_force_copy(self, tmp_path):
+        sources = make_sources(tmp_path, 1)
+        out_dir = tmp_path / "out"
+        stale = out_dir / "folder" / "photo-00.jpg.part"
+        stale.parent.mkdir(parents=True)
+        stale.write_bytes(b"interrupted")
+
+        engine, records = place_all(out_dir, sources, mode="hardlink")
+        assert engine.counts["fallback"] == 0
+        assert os.path.samefile(sources[0], records[0]["dst"])
+
+    def test_reflink_falls_back_when_unsupported(self, tmp_path):
+        sources = make_sources(tmp_path, 2)
+        _, records = place_all(tmp_path / "out", sources, mode="reflink")
+        for src, rec in zip(sources, records):
+            assert Path(rec["dst"]).read_bytes() == src.read_bytes()
+
+    def test_cross_device_hardlink_falls_back(self, tmp_path, monkeypatch):
+        def cross_device(src, dst):
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+        monkeypatch.setattr(placement.os, "link", cross_device)
+        sources = make_sources(tmp_path, 3)
+        engine, records = place_all(tmp_path / "out", sources, mode="hardlink")
+        assert engine.counts["fallback"] == 3
+        assert engine.counts["placed"] == 3
+        entries = [json.loads(l) for l in engine.journal_path.read_text().splitlines()]
+        assert {e["mode"] for e in entries} == {"copy"}
+
+    def test_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            PlacementEngine(tmp_path, mode="teleport")
+
+
+def make_heic(path: Path, size=(800, 600)):
+    from pillow_heif import register_heif_opener
+
+    register_heif_opener()
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotate 90° CW on display
+    exif[0x010F] = "Apple"
+    Image.new("RGB", size, (180, 120, 60)).save(path, exif=exif.tobytes())
+    return path
+
+
+class TestTranscode:
+    """HEIC/HEIF originals are re-encoded instead of copied."""
+
+    def test_transcode_jpeg_with_exif(self, tmp_path):
+        src = make_heic(tmp_path / "IMG_1.HEIC")
+        dst = tmp_path / "out.jpg"
+        transcode_image(src, dst, TranscodeOptions("jpeg", 80, 400, True))
+        with Image.open(dst) as im:
+            assert im.format == "JPEG"
+            assert im.info.get("progressive")
+            assert im.size == (300, 400)  # Orientation baked in, then resized
+            exif = im.getexif()
+            assert exif.get(0x010F) == "Apple"
+            assert 0x0112 not in exif
+
+    def test_strip_exif(self, tmp_path):
+        src = make_heic(tmp_path / "IMG_1.heic")
+        dst = tmp_path / "out.webp"
+        transcode_image(src, dst, TranscodeOptions("webp", 70, 0, False))
+        with Image.open(dst) as im:
+            assert im.format == "WEBP"
+            assert not im.getexif()
+
+    def test_engine_transcodes_and_resumes(self, tmp_path):
+        src = make_heic(tmp_path / "IMG_1.heic")
+        out_dir = tmp_path / "out"
+        options = TranscodeOptions("jpeg", 85, 0, True)
+
+        engine = PlacementEngine(out_dir, transcode=options, transcode_workers=1)
+        dst = out_dir / f"photo-01{engine.output_ext(src)}"
+        assert dst.suffix == ".jpg"
+        engine.submit(src, dst, {"dst": str(dst)})
+        engine.finish()
+        assert engine.counts["transcoded"] == 1
+        with Image.open(dst) as im:
+            assert im.format == "JPEG"
+
+        # Same options: skipped; new quality: re-encoded
+        engine = PlacementEngine(out_dir, transcode=options, transcode_workers=1)
+        engine.submit(src, dst, {"dst": str(dst)})
+        engine.finish()
+        assert engine.counts["skipped"] == 1
+
+        engine = PlacementEngine(
+            out_dir, transcode=TranscodeOptions("jpeg", 60, 0, True), transcode_workers=1
+        )
+        engine.submit(src, dst, {"dst": str(dst)})
+        engine.finish()
+        assert engine.counts["transcoded"] == 1
+
+    def test_off_places_original(self, tmp_path):
+        src = make_heic(tmp_path / "IMG_1.heic")
+        engine = PlacementEngine(tmp_path / "out", transcode=TranscodeOptions("off"))
+        assert engine.output_ext(src) == ".heic"
+        dst = tmp_path / "out" / "photo-01.heic"
+        engine.submit(src, dst, {"dst": str(dst)})
+        engine.finish()
+        assert dst.read_bytes() == src.read_bytes()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
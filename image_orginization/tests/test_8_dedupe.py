@@ -0,0 +1,109 @@
+"""Tests for duplicate collapsing before clustering."""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import imagehash
+import pytest
+from photo_organizer.models import Item
+from photo_organizer.dedupe import (
+    collapse_duplicates,
+    expand_duplicates,
+    find_duplicate_groups,
+)
+
+
+def make_item(tmp_path, name, content, phash_hex, gps=None, dt=None):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return Item(
+        id=name,
+        path=path,
+        thumb=path,
+        dt=dt,
+        gps=gps,
+        h=imagehash.hex_to_hash(phash_hex),
+    )
+
+
+class TestDedupe:
+    """Exact and near-duplicate grouping."""
+
+    def test_exact_and_near_groups(self, tmp_path):
+        items = [
+            make_item(tmp_path, "IMG_1.jpg", b"A" * 500, "ffff0000ffff0000"),
+            make_item(tmp_path, "IMG_1 (1).jpg", b"A" * 500, "ffff0000ffff0000"),
+            # Re-saved edit: different bytes, pHash distance 2
+            make_item(tmp_path, "IMG_2.jpg", b"B" * 500, "0f0f0f0f0f0f0f0f"),
+            make_item(tmp_path, "IMG_2_edit.jpg", b"C" * 600, "0f0f0f0f0f0f0f0c"),
+            # Far from both: not a near duplicate
+            make_item(tmp_path, "IMG_3.jpg", b"D" * 500, "0f0f0f0f0f0f0ff0"),
+        ]
+        groups = find_duplicate_groups(items, phash_distance=2)
+        found = sorted((sorted(it.id for it in g), kind) for g, kind in groups)
+        assert found == [
+            (["IMG_1 (1).jpg", "IMG_1.jpg"], "exact"),
+            (["IMG_2.jpg", "IMG_2_edit.jpg"], "near"),
+        ]
+
+    def test_near_groups_do_not_chain(self, tmp_path):
+        # Each step is 2 bits, but the ends are 8 bits apart
+        chain = [0b0, 0b11, 0b1111, 0b111111, 0b11111111]
+        items = [
+            make_item(tmp_path, f"IMG_{i}.jpg", bytes([i]) * 500, f"{value:016x}")
+            for i, value in enumerate(chain)
+        ]
+        groups = find_duplicate_groups(items, phash_distance=2)
+        for group, kind in groups:
+            assert kind == "near"
+            hashes = [it.h for it in group]
+            assert all(a - b <= 2 for a in hashes for b in hashes)
+        assert sum(len(g) for g, _ in groups) <= 4
+        assert len(groups) == 2
+
+    def test_exact_pairs_joined_by_phash_are_near(self, tmp_path):
+        items = [
+            make_item(tmp_path, "a.jpg", b"A" * 500, "0f0f0f0f0f0f0f0f"),
+            make_item(tmp_path, "a (1).jpg", b"A" * 500, "0f0f0f0f0f0f0f0f"),
+            make_item(tmp_path, "b.jpg", b"B" * 500, "0f0f0f0f0f0f0f0e"),
+            make_item(tmp_path, "b (1).jpg", b"B" * 500, "0f0f0f0f0f0f0f0e"),
+        ]
+        groups = find_duplicate_groups(items, phash_distance=2)
+        assert [(len(g), kind) for g, kind in groups] == [(4, "near")]
+
+    def test_exact_only(self, tmp_path):
+        items = [
+            make_item(tmp_path, "a.jpg", b"B" * 500, "0f0f0f0f0f0f0f0f"),
+            make_item(tmp_path, "b.jpg", b"C" * 600, "0f0f0f0f0f0f0f0e"),
+        ]
+        assert find_duplicate_groups(items, phash_distance=-1) == []
+
+    def test_collapse_prefers_gps_and_expands(self, tmp_path):
+        dt = datetime(2024, 5, 1, 12, 0)
+        items = [
+            make_item(tmp_path, "copy.jpg", b"A" * 500, "ffff0000ffff0000"),
+            make_item(tmp_path, "orig.jpg", b"A" * 500, "ffff0000ffff0000", gps=(47.2, -122.4), dt=dt),
+            make_item(tmp_path, "other.jpg", b"Z" * 50, "1234567812345678"),
+        ]
+        kept, duplicates, records = collapse_duplicates(items)
+
+        assert [it.id for it in kept] == ["orig.jpg", "other.jpg"]
+        assert records == [
+            {"representative": "orig.jpg", "kind": "exact", "duplicates": ["copy.jpg"]}
+        ]
+
+        kept[0].strategy = "gps_location"
+        labels = {"orig.jpg": {"label": "stamped-concrete", "confidence": 0.9}}
+        groups = expand_duplicates([[kept[0]], [kept[1]]], duplicates, labels)
+
+        assert [[it.id for it in g] for g in groups] == [["orig.jpg", "copy.jpg"], ["other.jpg"]]
+        assert labels["copy.jpg"]["label"] == "stamped-concrete"
+        assert groups[0][1].strategy == "gps_location"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,171 @@
+"""Tests for watch mode: incremental assignment and placement."""
+
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import imagehash
+import numpy as np
+import pytest
+from PIL import Image
+from photo_organizer.models import Item
+from photo_organizer.watch import ClusterIndex, Watcher, WatchOptions
+
+
+def make_item(name, phash_hex=None, gps=None, dt=None):
+    return Item(
+        id=name,
+        path=Path(name),
+        thumb=Path(name),
+        dt=dt,
+        gps=gps,
+        h=imagehash.hex_to_hash(phash_hex) if phash_hex else None,
+    )
+
+
+def write_scene(path: Path, scene: int, shot: int):
+    """Small JPEG whose pHash depends on the scene, with per-shot noise."""
+    base = np.random.default_rng(scene).integers(0, 256, size=(6, 8, 3), dtype=np.uint8)
+    img = np.asarray(Image.fromarray(base, "RGB").resize((160, 120)), dtype=np.int16)
+    noise = np.random.default_rng(1000 + shot).normal(0, 4, img.shape)
+    Image.fromarray(np.clip(img + noise, 0, 255).astype(np.uint8), "RGB").save(path, "JPEG")
+
+
+class TestClusterIndex:
+    """Assignment of new items to stored clusters."""
+
+    def test_gps_joins_nearest_site(self):
+        index = ClusterIndex(site_meters=100, time_gap_min=60, hash_threshold=10)
+        index.add("a", make_item("IMG_1.jpg", gps=(47.25, -122.44)), 1)
+        index.add("b", make_item("IMG_2.jpg", gps=(47.30, -122.44)), 2)
+
+        assert index.find(make_item("IMG_9.jpg", gps=(47.2504, -122.4401))) == 1
+        assert index.find(make_item("IMG_9.jpg", gps=(47.40, -122.44))) is None
+
+    def test_time_and_filename_candidates_need_similar_hash(self):
+        dt = datetime(2024, 5, 1, 12, 0)
+        index = ClusterIndex(site_meters=100, time_gap_min=30, hash_threshold=4)
+        index.add("a", make_item("IMG_0100.jpg", "ffff0000ffff0000", dt=dt), 1)
+        index.add("b", make_item("DSC_0500.jpg", "0f0f0f0f0f0f0f0f"), 2)
+
+        # Within the time gap and visually similar
+        near_time = make_item("x.jpg", "ffff0000ffff0001", dt=dt + timedelta(minutes=10))
+        assert index.find(near_time) == 1
+        # Within the time gap but a different scene
+        assert index.find(make_item("y.jpg", "0000ffff0000ffff", dt=dt)) is None
+        # No timestamp: neighbouring filename number
+        assert index.find(make_item("DSC_0503.jpg", "0f0f0f0f0f0f0f0e")) == 2
+        # Far filename number, no time: nothing to compare against
+        assert index.find(make_item("DSC_0900.jpg", "0f0f0f0f0f0f0f0e")) is None
+
+    def test_remove(self):
+        index = ClusterIndex(site_meters=100, time_gap_min=60, hash_threshold=10)
+        index.add("a", make_item("IMG_1.jpg", gps=(47.25, -122.44)), 1)
+        assert index.remove("a") == 1
+        assert index.find(make_item("IMG_2.jpg", gps=(47.25, -122.44))) is None
+
+
+class TestWatcher:
+    """End-to-end incremental batches (no API: fallback labels)."""
+
+    def test_incremental_batches(self, tmp_path):
+        input_dir, out_dir = tmp_path / "in", tmp_path / "out"
+        input_dir.mkdir()
+        for i in range(1, 4):
+            write_scene(input_dir / f"IMG_{i:04d}.jpg", scene=1, shot=i)
+        write_scene(input_dir / "DSC_0500.jpg", scene=2, shot=9)
+
+        options = WatchOptions(classify=False, settle=0)
+        watcher = Watcher(input_dir, out_dir, options)
+        first = watcher.process(*watcher.scan())
+        assert first["ingested"] == 4
+        assert first["placed"] == 4
+
+        # A new shot of scene 1 joins its cluster; scene 2 is untouched
+        write_scene(input_dir / "IMG_0004.jpg", scene=1, shot=4)
+        watcher = Watcher(input_dir, out_dir, options)  # Reload state from disk
+        paths, removed = watcher.scan()
+        assert [p.name for p in paths] == ["IMG_0004.jpg"]
+
+        second = watcher.process(paths, removed)
+        assert second["joined"] == 1
+        assert second["new_clusters"] == 0
+        assert second["changed_clusters"] == 1
+        assert second["placed"] == 1
+
+        state = json.loads((out_dir / "_work" / "watch_state.json").read_text())
+        cid = state["files"][str(input_dir / "IMG_0004.jpg")]["cluster"]
+        assert cid == state["files"][str(input_dir / "IMG_0001.jpg")]["cluster"]
+        assert len(list((out_dir / "organized_photos").rglob("*.jpg"))) == 5
+
+        # Nothing changed: nothing to do
+        assert watcher.scan() == ([], [])
+
+    def test_move_mode_keeps_moved_files(self, tmp_path):
+        input_dir, out_dir = tmp_path / "in", tmp_path / "out"
+        input_dir.mkdir()
+        for i in range(1, 3):
+            write_scene(input_dir / f"IMG_{i:04d}.jpg", scene=1, shot=i)
+
+        options = WatchOptions(classify=False, settle=0, placement="move")
+        watcher = Watcher(input_dir, out_dir, options)
+        assert watcher.process(*watcher.scan())["placed"] == 2
+        assert not list(input_dir.iterdir())
+
+        # Moved originals are placed, not removed: their cluster survives
+        watcher = Watcher(input_dir, out_dir, options)
+        assert watcher.scan() == ([], [])
+        write_scene(input_dir / "IMG_0003.jpg", scene=1, shot=3)
+        paths, removed = watcher.scan()
+        assert removed == []
+        result = watcher.process(paths, removed)
+        assert (result["joined"], result["placed"]) == (1, 1)
+        assert len(list((out_dir / "organized_photos").rglob("*.jpg"))) == 3
+
+    def test_changed_file_replaces_its_copy(self, tmp_path):
+        input_dir, out_dir = tmp_path / "in", tmp_path / "out"
+        input_dir.mkdir()
+        for i in range(1, 3):
+            write_scene(input_dir / f"IMG_{i:04d}.jpg", scene=1, shot=i)
+
+        options = WatchOptions(classify=False, settle=0)
+        watcher = Watcher(input_dir, out_dir, options)
+        watcher.process(*watcher.scan())
+        organized = out_dir / "organized_photos"
+        before = sorted(p.relative_to(organized) for p in organized.rglob("*.jpg"))
+
+        changed = input_dir / "IMG_0002.jpg"
+        write_scene(changed, scene=1, shot=7)
+        paths, removed = watcher.scan()
+        assert paths == [changed]
+        assert watcher.process(paths, removed)["placed"] == 1
+
+        after = sorted(p.relative_to(organized) for p in organized.rglob("*.jpg"))
+        assert after == before
+        state = json.loads((out_dir / "_work" / "watch_state.json").read_text())
+        cid = state["files"][str(changed)]["cluster"]
+        dst = Path(state["clusters"][str(cid)]["placed"][str(changed)])
+        assert dst.read_bytes() == changed.read_bytes()
+
+    def test_failed_thumbnail_not_retried_until_changed(self, tmp_path):
+        input_dir, out_dir = tmp_path / "in", tmp_path / "out"
+        input_dir.mkdir()
+        write_scene(input_dir / "IMG_0001.jpg", scene=1, shot=1)
+        broken = input_dir / "IMG_0002.jpg"
+        broken.write_bytes(b"not a jpeg")
+
+        options = WatchOptions(classify=False, settle=0)
+        watcher = Watcher(input_dir, out_dir, options)
+        assert watcher.process(*watcher.scan())["ingested"] == 1
+        assert watcher.scan() == ([], [])
+
+        write_scene(broken, scene=2, shot=1)
+        assert watcher.scan() == ([broken], [])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])